@@ -1,5 +1,5 @@
 from django.contrib import admin
-from finance.models import Income, Expense, Loan
+from finance.models import Income, Expense, Loan, IncomeMonthlyRollup, ExpenseMonthlyRollup
 
 # Register your models here.
 @admin.register(Income)
@@ -25,4 +25,25 @@ class LoanAdmin(admin.ModelAdmin):
     list_filter = ['status', 'remaining_balance', 'user']
 
 
-admin.site.register(Loan, LoanAdmin)
\ No newline at end of file
+admin.site.register(Loan, LoanAdmin)
+
+
+# Rollups are maintained from Income/Expense writes, so they are read-only in admin
+class RollupAdminBase(admin.ModelAdmin):
+    list_filter = ['month', 'user']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(IncomeMonthlyRollup)
+class IncomeMonthlyRollupAdmin(RollupAdminBase):
+    list_display = ['id', 'user', 'month', 'status', 'total_amount', 'entry_count']
+
+
+@admin.register(ExpenseMonthlyRollup)
+class ExpenseMonthlyRollupAdmin(RollupAdminBase):
+    list_display = ['id', 'user', 'month', 'category', 'status', 'total_amount', 'entry_count']
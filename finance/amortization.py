@@ -0,0 +1,278 @@
+"""
+Loan amortization engine.
+
+Balances are computed with the closed form of the annuity recurrence,
+
+    B_k = P * (1 + r)^k - E * ((1 + r)^k - 1) / r
+
+so every period of a schedule is independent of the previous one: a date window
+is computed directly without replaying the months before it. Each loan's
+schedule is still built on its own, costing one balance per period in the
+window. Rows are rounded to cents from the rounded balances, so principal
+always telescopes to the loan amount and the final installment absorbs the
+rounding residue.
+"""
+from datetime import date
+from decimal import Decimal
+
+CENT = Decimal('0.01')
+
+# What-if scenarios are replayed for at most this many times the loan's tenure
+SIMULATION_TENURE_FACTOR = 4
+
+
+def to_money(value):
+    return Decimal(f"{value:.2f}")
+
+
+def as_decimal(value):
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def calculate_emis(principals, annual_rates, tenures):
+    """
+    EMIs for parallel sequences of principal amounts, annual rates (percent) and tenures (months),
+    rounded to cents; None where an input is missing or the tenure is not positive.
+
+    The rate-dependent factor r * (1 + r)^n / ((1 + r)^n - 1) is computed once per distinct
+    (rate, tenure) pair, so a column of loans costs one multiplication per row.
+    """
+    factors = {}
+    emis = []
+    for principal, annual_rate, tenure in zip(principals, annual_rates, tenures):
+        if principal is None or annual_rate is None or not tenure or tenure < 0:
+            emis.append(None)
+            continue
+        key = (as_decimal(annual_rate), int(tenure))
+        factor = factors.get(key)
+        if factor is None:
+            rate = key[0] / 12 / 100
+            if rate == 0:
+                factor = 1 / Decimal(key[1])
+            else:
+                growth = (1 + rate) ** key[1]
+                factor = rate * growth / (growth - 1)
+            factors[key] = factor
+        emis.append(round(as_decimal(principal) * factor, 2))
+    return emis
+
+
+def add_months(value, months):
+    month_index = value.year * 12 + value.month - 1 + months
+    year, month = divmod(month_index, 12)
+    # Clamp the day for shorter months (e.g. Jan 31 + 1 month -> Feb 28/29)
+    for day in (value.day, 30, 29, 28):
+        try:
+            return date(year, month + 1, day)
+        except ValueError:
+            continue
+
+
+def months_between(start, end):
+    return (end.year - start.year) * 12 + end.month - start.month
+
+
+class Amortization:
+    """
+    Closed-form amortization of one loan (principal, annual rate in percent, tenure in months).
+    `installment` defaults to the EMI rounded to cents, as stored on Loan.monthly_installment.
+    """
+
+    def __init__(self, principal, annual_rate, tenure_months, installment=None, first_payment_date=None):
+        self.principal = float(principal)
+        self.rate = float(annual_rate) / 12 / 100
+        self.tenure = int(tenure_months)
+        self.installment = float(installment) if installment is not None else float(self.emi(principal, annual_rate, tenure_months))
+        self.first_payment_date = first_payment_date
+
+    @staticmethod
+    def emi(principal, annual_rate, tenure_months):
+        return calculate_emis([principal], [annual_rate], [tenure_months])[0]
+
+    def balance(self, period):
+        """
+        Outstanding balance after `period` installments, rounded to cents.
+        """
+        if period >= self.tenure:
+            return Decimal('0.00')
+        if self.rate == 0:
+            return to_money(max(self.principal - self.installment * period, 0))
+        growth = (1 + self.rate) ** period
+        return to_money(max(self.principal * growth - self.installment * (growth - 1) / self.rate, 0))
+
+    def final_installment(self):
+        opening = self.balance(self.tenure - 1)
+        return (opening + (opening * Decimal(repr(self.rate))).quantize(CENT)).quantize(CENT)
+
+    def total_interest(self):
+        installment = to_money(self.installment)
+        return installment * (self.tenure - 1) + self.final_installment() - to_money(self.principal)
+
+    def payment_date(self, period):
+        return add_months(self.first_payment_date, period - 1) if self.first_payment_date else None
+
+    def period_range(self, start_date=None, end_date=None):
+        """
+        Installment numbers (1-based) whose payment date falls inside the window.
+        """
+        first, last = 1, self.tenure
+        if self.first_payment_date is not None:
+            if start_date is not None:
+                offset = months_between(self.first_payment_date, start_date)
+                first = max(first, offset + 1 + (self.payment_date(offset + 1) < start_date))
+            if end_date is not None:
+                offset = months_between(self.first_payment_date, end_date)
+                last = min(last, offset + 1 - (self.payment_date(offset + 1) > end_date))
+        return range(first, last + 1)
+
+    def next_period(self, on_or_after):
+        """
+        First installment number (1-based) due on or after the date, past the tenure if need be.
+        """
+        offset = max(months_between(self.first_payment_date, on_or_after), 0)
+        return offset + 1 + (self.payment_date(offset + 1) < on_or_after)
+
+    def remaining_installments(self, balance, first_period):
+        """
+        Installments repaying `balance`, the amount still owed before `first_period`, at this
+        loan's installment: (period, payment date, amount) rows until it is paid off. Rows go
+        on indefinitely when the installment doesn't cover the interest, so callers stop at
+        their own horizon.
+        """
+        installment = to_money(self.installment)
+        rate = Decimal(repr(self.rate))
+        balance = as_decimal(balance)
+        period = first_period
+        while balance > 0:
+            interest = (balance * rate).quantize(CENT)
+            # Like the schedule's final installment, the last one pays off whatever is left
+            payment = min(installment, balance + interest)
+            yield period, self.payment_date(period), payment
+            balance += interest - payment
+            period += 1
+
+    def schedule(self, start_date=None, end_date=None):
+        """
+        Month-by-month rows (installment, principal, interest, balance) for the window.
+        """
+        installment = to_money(self.installment)
+        rows = []
+        periods = self.period_range(start_date, end_date)
+        opening = self.balance(periods.start - 1) if periods else None
+        for period in periods:
+            closing = self.balance(period)
+            payment = self.final_installment() if period == self.tenure else installment
+            principal = opening - closing
+            rows.append({
+                "period": period,
+                "payment_date": self.payment_date(period),
+                "installment": payment,
+                "principal": principal,
+                "interest": payment - principal,
+                "balance": closing,
+            })
+            opening = closing
+        return rows
+
+
+class ScenarioError(ValueError):
+    """
+    A what-if scenario that can never repay the loan.
+    """
+
+
+def simulation_months(plan):
+    return plan.tenure * SIMULATION_TENURE_FACTOR
+
+
+def simulate_scenario(plan, prepayments=None, emi_change=0, emi_change_from=1, max_months=None):
+    """
+    Replay `plan` with lump-sum prepayments ({month: amount}) and an EMI change applied from
+    `emi_change_from` onwards. Months before the first change follow the original schedule,
+    so the simulation jumps straight to that month with the closed-form balance.
+
+    Returns (payoff month, total interest, total prepaid, balance left). Payoff month and
+    interest are None, and the balance left is what remains, when the loan isn't repaid
+    within `max_months` (simulation_months() by default). Raises ScenarioError when the
+    changed EMI doesn't cover the interest of the month it starts in: the balance would
+    then never go down.
+    """
+    prepayments = prepayments or {}
+    installment = float(to_money(plan.installment))
+    max_months = max_months or simulation_months(plan)
+    changes = list(prepayments) + ([emi_change_from] if emi_change else [])
+    start = min(changes, default=plan.tenure + 1)
+    if start > plan.tenure:
+        return plan.tenure, plan.total_interest(), Decimal('0.00'), Decimal('0.00')
+
+    balance = float(plan.balance(start - 1))
+    total_interest = installment * (start - 1) - (plan.principal - balance)
+    prepaid = 0.0
+    for month in range(start, max_months + 1):
+        emi = installment + (float(emi_change) if month >= emi_change_from else 0)
+        interest = round(balance * plan.rate, 2)
+        if emi <= interest and month >= emi_change_from:
+            raise ScenarioError(
+                f"An EMI of {to_money(emi)} does not cover the interest of {to_money(interest)} due in month {month}, "
+                f"the loan would never be repaid."
+            )
+        due = balance + interest
+        # As in the schedule, the last installment of the original term absorbs the rounding residue
+        payment = due if emi >= due or (month >= plan.tenure and emi >= installment) else emi
+        total_interest += interest
+        balance = round(due - payment, 2)
+
+        lump_sum = min(float(prepayments.get(month, 0)), balance)
+        prepaid += lump_sum
+        balance = round(balance - lump_sum, 2)
+        if balance <= 0:
+            return month, to_money(total_interest), to_money(prepaid), Decimal('0.00')
+    return None, None, to_money(prepaid), to_money(balance)
+
+
+def simulate_scenarios(plan, scenarios):
+    """
+    Simulate many what-if scenarios of one loan against its original schedule.
+    Returns (results, errors): a result per scenario that can repay the loan and
+    {index: message} for the ones that never can.
+    """
+    baseline_interest = plan.total_interest()
+    results, errors = [], {}
+    for index, scenario in enumerate(scenarios):
+        try:
+            payoff_month, total_interest, prepaid, balance_left = simulate_scenario(
+                plan, scenario.get('prepayments'), scenario.get('emi_change', 0), scenario.get('emi_change_from', 1)
+            )
+        except ScenarioError as exc:
+            errors[index] = str(exc)
+            continue
+        results.append({
+            "index": index,
+            "paid_off": payoff_month is not None,
+            "payoff_month": payoff_month,
+            "payoff_date": plan.payment_date(payoff_month) if payoff_month else None,
+            "months_saved": plan.tenure - payoff_month if payoff_month else None,
+            "total_interest": total_interest,
+            "interest_saved": baseline_interest - total_interest if total_interest is not None else None,
+            "total_prepaid": prepaid,
+            "balance_left": balance_left,
+        })
+    return results, errors
+
+
+def loan_amortization(loan):
+    """
+    Amortization of a Loan, with the first installment due one month after it was created.
+    """
+    first_payment_date = add_months(loan.created_at.date(), 1) if loan.created_at else None
+    return Amortization(
+        loan.principal_amount, loan.interest_rate, loan.tenure_months,
+        installment=loan.monthly_installment, first_payment_date=first_payment_date,
+    )
+
+
+def build_schedules(loans, start_date=None, end_date=None):
+    """
+    Schedules for many loans: {loan id: rows}, each built independently for the window.
+    """
+    return {loan.id: loan_amortization(loan).schedule(start_date, end_date) for loan in loans}
@@ -0,0 +1,91 @@
+"""
+Shared pieces of the benchmark commands: requests sent straight into Django's WSGI
+handler (no server or sockets), latency statistics and a reproducible seeded dataset.
+"""
+import re
+import time
+from datetime import date
+from io import BytesIO, StringIO
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.wsgi import get_wsgi_application
+from django.test.utils import override_settings
+from finance import datasets
+
+User = get_user_model()
+
+_queries_re = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def benchmark_middleware():
+    """
+    MIDDLEWARE without the debug toolbar, which is sync-only and adds tens of
+    milliseconds per request (far more under ASGI) that would drown out the views.
+    """
+    return [path for path in settings.MIDDLEWARE if not path.startswith('debug_toolbar.')]
+
+
+def build_wsgi_application():
+    # Handlers read MIDDLEWARE once, when they are built
+    with override_settings(MIDDLEWARE=benchmark_middleware()):
+        return get_wsgi_application()
+
+
+def wsgi_request(application, method, path, query_string='', body=b'', headers=()):
+    """
+    Send one request to a WSGI application and read the whole response.
+    Returns (status code, response headers, seconds).
+    """
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '127.0.0.1',
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': BytesIO(body),
+        'wsgi.errors': StringIO(),
+        **{'HTTP_' + name.upper().replace('-', '_'): value for name, value in headers},
+    }
+    started_response = []
+    started = time.perf_counter()
+    result = application(environ, lambda status, response_headers: started_response.append((status, response_headers)))
+    try:
+        for _ in result:
+            pass
+    finally:
+        result.close()  # fires request_finished, which closes the thread's connection
+    elapsed = time.perf_counter() - started
+    status, response_headers = started_response[0]
+    return int(status.split(' ', 1)[0]), dict(response_headers), elapsed
+
+
+def queries_from_server_timing(header):
+    """
+    Query count of a request from its Server-Timing header (see finance.instrumentation).
+    """
+    match = _queries_re.search(header or '')
+    return int(match.group(1)) if match else None
+
+
+def percentile(sorted_values, fraction):
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def seed_benchmark_data(users, incomes, expenses, loans, seed=0, password='benchmark-pass'):
+    """
+    Create `users` users with exactly the given number of incomes, expenses and loans
+    each (see finance.datasets), identical for the same arguments apart from dates
+    (relative to today). Returns the new users' ids; their rollups are written too.
+    """
+    first_id = (User.objects.order_by('-id').values_list('id', flat=True).first() or 0) + 1
+    created = datasets.create_users(users, f"bench{first_id}-", password)
+    datasets.seed_users(
+        created, {'income': incomes, 'expense': expenses, 'loan': loans}, seed, skew=0, end_date=date.today(),
+    )
+    return [user_id for _, user_id in created]
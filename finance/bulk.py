@@ -0,0 +1,43 @@
+"""
+Bulk INSERT of plain row dicts for the high-volume write paths (seed_dataset,
+statement imports). bulk_create() compiles SQL for every value of every object,
+which costs several times more than the database spends inserting the rows; here
+values are adapted with the backend's converters and sent with one executemany().
+Rows get no primary keys back, so this is only for callers that don't need them.
+"""
+from functools import partial
+from django.db import connection
+from django.utils import timezone
+
+
+def insert_rows(model, rows):
+    """
+    INSERT row dicts (field attnames -> values, the same keys in every row) with a
+    single executemany(). Database triggers (the search index) still run; save() and
+    signals don't, and auto_now(_add) fields are set to now.
+    """
+    ops = connection.ops
+    meta = model._meta
+    names = list(rows[0])
+    adapters = []
+    for name in names:
+        field = meta.get_field(name)
+        if field.get_internal_type() == 'DateField':
+            adapters.append(ops.adapt_datefield_value)
+        elif field.get_internal_type() == 'DecimalField':
+            adapters.append(partial(ops.adapt_decimalfield_value, max_digits=field.max_digits, decimal_places=field.decimal_places))
+        else:
+            adapters.append(None)
+    timestamp_fields = [field for field in meta.concrete_fields if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    timestamps = (ops.adapt_datetimefield_value(timezone.now()),) * len(timestamp_fields)
+
+    columns = [meta.get_field(name).column for name in names] + [field.column for field in timestamp_fields]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        ops.quote_name(meta.db_table), ', '.join(map(ops.quote_name, columns)), ', '.join(['%s'] * len(columns)),
+    )
+    values = [
+        tuple(row[name] if adapt is None else adapt(row[name]) for name, adapt in zip(names, adapters)) + timestamps
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, values)
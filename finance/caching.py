@@ -0,0 +1,73 @@
+"""
+Versioned cache keys for per-user finance data.
+
+Each user has a data-version counter in the cache that is bumped after every
+committed Income/Expense/Loan write. Every cached report or list embeds that
+version in its key, so a write makes all of the user's cached entries
+unreachable at once and they can be kept with a long TTL without going stale.
+"""
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+# Entries are invalidated by version bumps, the TTL only bounds memory usage
+CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def data_version_key(user_id):
+    return f"finance_data_version_{user_id}"
+
+
+def _fresh_version():
+    # Seeding from the clock means a counter lost to eviction never reuses an older version
+    return time.time_ns()
+
+
+def get_data_version(user_id):
+    """
+    Return the current data version of a user, initialising it if needed.
+    """
+    key = data_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _fresh_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_data_versions(user_ids):
+    """
+    Return {user_id: data version} for many users, reading existing versions in one round trip.
+    """
+    keys = {data_version_key(user_id): user_id for user_id in user_ids}
+    versions = {keys[key]: version for key, version in cache.get_many(keys).items()}
+    for user_id in user_ids:
+        if versions.get(user_id) is None:
+            versions[user_id] = get_data_version(user_id)
+    return versions
+
+
+def bump_data_version(user_id):
+    key = data_version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), timeout=None)
+
+
+def bump_on_commit(user_id):
+    """
+    Bump the user's data version once the current transaction commits, so no
+    reader can cache pre-commit data under the new version.
+    """
+    transaction.on_commit(lambda: bump_data_version(user_id))
+
+
+def user_cache_key(prefix, user_id, *parts):
+    """
+    Build a cache key for user data that embeds the user's current data version.
+    """
+    key = f"{prefix}_{user_id}_v{get_data_version(user_id)}"
+    for part in parts:
+        key += f"_{part}"
+    return key
@@ -0,0 +1,192 @@
+"""
+Reproducible synthetic datasets: users with their incomes, expenses and loans, for
+load tests and benchmarks (see the seed_dataset command).
+
+Every (user index, kind of row) pair draws from its own random.Random seeded with
+the dataset seed, so a user's rows are the same whichever process generates them and
+however the users are split into shards. The number of rows per user follows a
+Pareto (power-law) distribution: most users have a few rows, a few users have very
+many, as in real ledgers. Rows are built lazily and written in fixed-size batches,
+so memory stays flat however large the dataset is.
+"""
+import math
+import random
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from finance import rollups
+from finance.bulk import insert_rows
+from finance.models import Income, Expense, Loan
+
+User = get_user_model()
+
+INCOME_SOURCES = ('Salary', 'Freelance', 'Dividends', 'Rent', 'Bonus', 'Interest')
+# Category -> relative frequency, everyday spending dominates
+EXPENSE_CATEGORIES = {
+    'Groceries': 30, 'Dining': 15, 'Transport': 15, 'Utilities': 10,
+    'Rent': 8, 'Health': 8, 'Insurance': 7, 'Travel': 7,
+}
+LOAN_NAMES = ('Home Loan', 'Car Loan', 'Student Loan', 'Personal Loan', 'Credit Line')
+NOTE_WORDS = ('monthly', 'invoice', 'card', 'transfer', 'cash', 'annual', 'refund', 'shared', 'online', 'family')
+LOAN_TENURES = (12, 24, 36, 60, 120, 240)
+
+# Log-normal amounts: kind -> (median, sigma, lowest, highest)
+AMOUNTS = {
+    'income': (1500, 0.8, 10, 250000),
+    'expense': (40, 1.1, 1, 50000),
+    'loan': (20000, 1.2, 500, 2000000),
+}
+
+# Cap on a single user's rows, as a multiple of the mean, so one draw can't dominate a run
+MAX_ROWS_FACTOR = 50
+
+# Usernames looked up per query when reading back the ids of new users
+_USER_LOOKUP_SIZE = 500
+
+
+def user_random(seed, index, kind):
+    # String seeds are hashed with SHA-512, so they don't depend on PYTHONHASHSEED
+    return random.Random(f"{seed}:{index}:{kind}")
+
+
+def row_count(rng, mean, skew):
+    """
+    Rows of one user: exactly `mean` when skew is 0, otherwise Pareto-distributed with
+    shape `skew` (> 1, smaller is more skewed) scaled so the average is about `mean`.
+    """
+    if mean <= 0:
+        return 0
+    if not skew:
+        return round(mean)
+    # paretovariate(a) is at least 1 with mean a / (a - 1)
+    count = mean * (skew - 1) / skew * rng.paretovariate(skew)
+    return min(round(count), math.ceil(mean * MAX_ROWS_FACTOR))
+
+
+def _amount(rng, kind):
+    median, sigma, lowest, highest = AMOUNTS[kind]
+    value = min(max(rng.lognormvariate(math.log(median), sigma), lowest), highest)
+    return Decimal(round(value * 100)).scaleb(-2)
+
+
+def _notes(rng):
+    return ' '.join(rng.sample(NOTE_WORDS, 2)) if rng.random() < 0.7 else None
+
+
+def income_rows(rng, user_id, count, end_date, days):
+    for _ in range(count):
+        date_received = end_date - timedelta(days=rng.randrange(days))
+        yield dict(
+            user_id=user_id, source_name=rng.choice(INCOME_SOURCES), amount=_amount(rng, 'income'),
+            date_received=date_received, notes=_notes(rng),
+            status=Income.IncomeStatus.RECEIVED if rng.random() < 0.9 else Income.IncomeStatus.PENDING,
+        )
+
+
+def expense_rows(rng, user_id, count, end_date, days):
+    categories, weights = list(EXPENSE_CATEGORIES), list(EXPENSE_CATEGORIES.values())
+    for _ in range(count):
+        # About one in ten expenses is still due
+        due_date = end_date + timedelta(days=rng.randrange(-days, days // 10 + 1))
+        paid = due_date <= end_date and rng.random() < 0.9
+        yield dict(
+            user_id=user_id, category=rng.choices(categories, weights)[0], amount=_amount(rng, 'expense'),
+            due_date=due_date, notes=_notes(rng),
+            status=Expense.ExpenseStatus.PAID if paid else Expense.ExpenseStatus.PENDING,
+        )
+
+
+def loan_rows(rng, user_id, count, end_date, days):
+    for _ in range(count):
+        principal = _amount(rng, 'loan')
+        paid = rng.random() < 0.2
+        yield dict(
+            user_id=user_id, loan_name=rng.choice(LOAN_NAMES), principal_amount=principal,
+            interest_rate=Decimal(rng.randrange(200, 1500)).scaleb(-2), tenure_months=rng.choice(LOAN_TENURES),
+            remaining_balance=Decimal(0) if paid else (principal * Decimal(rng.uniform(0.05, 1))).quantize(Decimal('0.01')),
+            status=Loan.LoanStatus.PAID if paid else Loan.LoanStatus.ACTIVE, notes=_notes(rng),
+        )
+
+
+def create_objects(model, rows):
+    # For models whose bulk path keeps derived fields in sync (LoanQuerySet sets the installments)
+    model.objects.bulk_create([model(**row) for row in rows])
+
+
+# Kind -> (model, row generator, writer), in the order they are written
+ROW_KINDS = {
+    'income': (Income, income_rows, insert_rows),
+    'expense': (Expense, expense_rows, insert_rows),
+    'loan': (Loan, loan_rows, create_objects),
+}
+
+
+def batches(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _user_rows(users, kind, make_rows, mean, seed, skew, end_date, days):
+    for index, user_id in users:
+        rng = user_random(seed, index, kind)
+        yield from make_rows(rng, user_id, row_count(rng, mean, skew), end_date, days)
+
+
+def create_users(count, username_prefix, password, batch_size=1000):
+    """
+    Create users `<prefix>0` to `<prefix><count - 1>` sharing one password hash
+    (hashing is by far the slowest part of creating a user). Returns [(index, user id)].
+    Raises IntegrityError, creating nobody, if one of the names is taken.
+    """
+    password_hash = make_password(password)
+    users = []
+    with transaction.atomic():
+        for indexes in batches(range(count), batch_size):
+            names = [f"{username_prefix}{index}" for index in indexes]
+            User.objects.bulk_create([
+                User(username=name, email=f"{name}@example.com", password=password_hash) for name in names
+            ])
+            for chunk in batches(names, _USER_LOOKUP_SIZE):
+                user_ids = dict(User.objects.filter(username__in=chunk).values_list('username', 'id'))
+                users += [(int(name[len(username_prefix):]), user_ids[name]) for name in chunk]
+    return users
+
+
+def seed_users(users, means, seed, skew, end_date, days=730, batch_size=5000):
+    """
+    Generate and insert the rows of `users` ([(index, user id)], users without rows yet),
+    `means[kind]` rows of each kind per user on average, dated in the `days` before
+    `end_date` (some expenses fall due after it). The users' Income/Expense rollups
+    are written too. Returns {kind: rows written}.
+
+    Each batch is committed on its own; if a run is interrupted, the rollups of the
+    last shard can be repaired with `rebuild_rollups`.
+    """
+    written = {}
+    for kind, (model, make_rows, write) in ROW_KINDS.items():
+        # The users have no rows, so their rollups are new rows summed while writing
+        totals = defaultdict(lambda: [0, 0]) if model in rollups.ROLLUP_SPECS else None
+        rows = _user_rows(users, kind, make_rows, means.get(kind, 0), seed, skew, end_date, days)
+        written[kind] = 0
+        for batch in batches(rows, batch_size):
+            with transaction.atomic():
+                write(model, batch)
+            if totals is not None:
+                rollups.collect_deltas(model, batch, deltas=totals)
+            written[kind] += len(batch)
+        if totals:
+            rollup_model, _, group_fields = rollups.ROLLUP_SPECS[model]
+            key_fields = ('user_id', 'month', *group_fields)
+            rollup_rows = (
+                {**dict(zip(key_fields, key)), 'total_amount': amount, 'entry_count': count}
+                for key, (amount, count) in totals.items()
+            )
+            for batch in batches(rollup_rows, batch_size):
+                with transaction.atomic():
+                    insert_rows(rollup_model, batch)
+    return written
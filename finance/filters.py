@@ -1,6 +1,11 @@
 from django_filters import FilterSet, DateFilter, CharFilter, DateFromToRangeFilter, ChoiceFilter, NumberFilter
 from finance.models import Income, Expense, Loan
-from rest_framework.filters import BaseFilterBackend
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+from finance import search
 
 # Dynamically filter Income of authenticated user with different fields
 class IncomeFilter(FilterSet):
@@ -63,30 +68,148 @@ class LoanFilter(FilterSet):
         fields = ['loan_name', 'status', 'remaining_balance_gte', 'remaining_balance_lte']
 
 
+# Full-text `?search=` backed by the database's search index
+class FullTextSearchFilter(SearchFilter):
+    """
+    SearchFilter that answers `?search=` from the full-text index (see finance/search.py)
+    and ranks the matches, best first, unless the client asked for another ordering.
+    Falls back to SearchFilter's icontains lookups when no search backend is configured.
+
+    ** Example url:
+    http://127.0.0.1:8000/finance/income/?search=salary bonus
+    """
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        backend = search.get_backend()
+        if not terms or backend is None or not backend.supports(queryset.model):
+            return super().filter_queryset(request, queryset, view)
+        if not search.search_words(terms):
+            return queryset
+
+        queryset = backend.search(queryset, terms)
+        if not self.ranking_disabled(request, view):
+            queryset = queryset.order_by(f"-{search.RANK_ALIAS}", '-id')
+        return queryset
+
+    def ranking_disabled(self, request, view):
+        # Cursor pages can only follow model fields, so they keep their own ordering
+        paginator = getattr(view, 'paginator', None)
+        return paginator is not None and getattr(paginator, 'use_keyset', lambda request: False)(request)
+
+
 # Creating Custom Dynamic FilterBackend
 class CustomDynamicFilterBackend(BaseFilterBackend):
     """
     Custom filter backend to handle dynamic filtering and sorting.
-    Supports query parameters like ?filter_field=value&sort_by=field&order=asc/desc.
+    Supports query parameters like ?filter_field=value&filter_field__lookup=value&sort_by=field&order=asc/desc.
+
+    Only what the view whitelists is accepted, anything else is rejected with a 400:
+    * `dynamic_filter_fields`: {model field: [lookups]}, lookups among DYNAMIC_LOOKUPS
+      (`in` takes a comma separated list, `range` two comma separated bounds, `isnull` true/false)
+    * `dynamic_sort_fields`: model fields accepted by `sort_by`
+    * `dynamic_filter_strict` (default: the FINANCE_STRICT_DYNAMIC_FILTERS setting): also reject
+      fields that are not backed by an index usable within the user's rows
+
+    Each parameter name is compiled once per view class into (model field, lookup) and cached.
 
     ** Example url for testing CustomDynamicFilterBackend:
     http://127.0.0.1:8000/finance/loan/?filter_status=paid&sort_by=remaining_balance&order=asc
-
+    http://127.0.0.1:8000/finance/income/?filter_status__in=pending,received&filter_date_received__range=2024-01-01,2024-03-31
     """
+    param_prefix = 'filter_'
+    sort_param = 'sort_by'
+    order_param = 'order'
+
+    # Compiled filter specs: (view class, parameter name, strict) -> (model field, lookup)
+    _compiled_specs = {}
+
     def filter_queryset(self, request, queryset, view):
         # Handle dynamic filtering
         for param, value in request.query_params.items():
-            if param.startswith('filter_'):
-                field_name = param.replace('filter_', '')  # Extract the field name
-                filter_condition = {field_name: value}
+            if param.startswith(self.param_prefix):
+                field, lookup = self.get_filter_spec(view, queryset.model, param)
+                filter_condition = {f"{field.name}__{lookup}": self.convert_value(param, field, lookup, value)}
                 queryset = queryset.filter(**filter_condition)
 
         # Handle sorting
-        sort_by = request.query_params.get('sort_by')
-        order = request.query_params.get('order', 'asc')  # Default to ascending
+        sort_by = request.query_params.get(self.sort_param)
+        order = request.query_params.get(self.order_param, 'asc')  # Default to ascending
         if sort_by:
+            field = self.get_sort_field(view, queryset.model, sort_by)
+            sort_by = field.name
             if order == 'desc':
                 sort_by = f"-{sort_by}"  # Add descending prefix
             queryset = queryset.order_by(sort_by)
 
-        return queryset
\ No newline at end of file
+        return queryset
+
+    def is_strict(self, view):
+        return getattr(view, 'dynamic_filter_strict', getattr(settings, 'FINANCE_STRICT_DYNAMIC_FILTERS', False))
+
+    def get_filter_spec(self, view, model, param):
+        key = (type(view), param, self.is_strict(view))
+        spec = self._compiled_specs.get(key)
+        if spec is None:
+            spec = self.compile_filter(view, model, param)
+            # Only whitelisted parameters get here, so the cache stays bounded
+            self._compiled_specs[key] = spec
+        return spec
+
+    def compile_filter(self, view, model, param):
+        name, _, lookup = param[len(self.param_prefix):].partition('__')
+        lookup = lookup or 'exact'
+        allowed = getattr(view, 'dynamic_filter_fields', {})
+        if name not in allowed:
+            raise ValidationError({param: [f"Filtering on '{name}' is not allowed."]})
+        if lookup not in allowed[name] or lookup not in DYNAMIC_LOOKUPS:
+            raise ValidationError({param: [f"The '{lookup}' lookup is not allowed on '{name}'."]})
+        field = model._meta.get_field(name)
+        if self.is_strict(view) and field.name not in indexed_fields(model):
+            raise ValidationError({param: [f"Filtering on '{name}' is not backed by an index."]})
+        return field, lookup
+
+    def get_sort_field(self, view, model, name):
+        if name not in getattr(view, 'dynamic_sort_fields', ()):
+            raise ValidationError({self.sort_param: [f"Sorting by '{name}' is not allowed."]})
+        field = model._meta.get_field(name)
+        if self.is_strict(view) and field.name not in indexed_fields(model):
+            raise ValidationError({self.sort_param: [f"Sorting by '{name}' is not backed by an index."]})
+        return field
+
+    def convert_value(self, param, field, lookup, value):
+        try:
+            if lookup == 'isnull':
+                if value.lower() not in BOOLEAN_VALUES:
+                    raise DjangoValidationError("Expected true or false.")
+                return BOOLEAN_VALUES[value.lower()]
+            if lookup in ('in', 'range'):
+                values = [field.to_python(item.strip()) for item in value.split(',')]
+                if lookup == 'range' and len(values) != 2:
+                    raise DjangoValidationError("Expected two comma separated bounds.")
+                return values
+            return field.to_python(value)
+        except DjangoValidationError as error:
+            raise ValidationError({param: error.messages})
+
+
+# Lookups CustomDynamicFilterBackend can ever apply (per field they are narrowed by the view)
+DYNAMIC_LOOKUPS = ('exact', 'iexact', 'in', 'gt', 'gte', 'lt', 'lte', 'range', 'isnull')
+
+BOOLEAN_VALUES = {'true': True, '1': True, 'false': False, '0': False}
+
+
+@lru_cache(maxsize=None)
+def indexed_fields(model):
+    """
+    Fields an index can serve inside one user's rows: the primary key, unique or db_index
+    fields, and the leading column of each index (or the one after `user`, which every
+    finance query is already filtered on).
+    """
+    fields = {field.name for field in model._meta.concrete_fields if field.primary_key or field.unique or field.db_index}
+    for index in model._meta.indexes:
+        columns = [name.lstrip('-') for name in index.fields]
+        if columns and columns[0] == 'user':
+            columns = columns[1:]
+        if columns:
+            fields.add(columns[0])
+    return frozenset(fields)
@@ -0,0 +1,111 @@
+"""
+Forward cash-flow forecast.
+
+Pending incomes, pending expenses and loan installments are read as date-ordered
+streams (server-side cursors for the tables, the installments repaying each loan's
+remaining balance for the loans) and combined with heapq.merge, so the timeline is
+built in a single pass that only ever holds one chunk of rows per stream.
+"""
+import heapq
+from datetime import timedelta
+from decimal import Decimal
+from operator import itemgetter
+from finance import trends
+from finance.amortization import loan_amortization
+from finance.models import Income, Expense, Loan
+
+FORECAST_GRANULARITIES = ('day', 'month')
+MAX_HORIZON_MONTHS = 60
+STREAM_CHUNK_SIZE = 2000
+
+INCOME, EXPENSE, INSTALLMENT = 'income', 'expense', 'loan_installment'
+
+
+def pending_stream(queryset, date_field, kind, start_date):
+    """
+    (date, kind, amount) events of a queryset in date order. Overdue rows are still
+    expected, so they are projected onto the first day of the forecast.
+    """
+    rows = queryset.order_by(date_field, 'id').values_list(date_field, 'amount').iterator(chunk_size=STREAM_CHUNK_SIZE)
+    for day, amount in rows:
+        yield max(day, start_date), kind, amount
+
+
+def installment_stream(loan, start_date, end_date):
+    """
+    Installments still to pay on a loan, derived from its remaining balance rather than
+    the original schedule, so prepaid loans finish early and loans behind schedule run
+    past their tenure.
+    """
+    plan = loan_amortization(loan)
+    installments = plan.remaining_installments(loan.remaining_balance, plan.next_period(start_date))
+    for _, payment_date, amount in installments:
+        if payment_date > end_date:
+            return
+        yield payment_date, INSTALLMENT, amount
+
+
+def forecast_events(user, start_date, end_date):
+    """
+    Every projected cash movement of the user between the two dates, in date order.
+    """
+    incomes = Income.objects.filter(user=user, status=Income.IncomeStatus.PENDING, date_received__lte=end_date)
+    expenses = Expense.objects.filter(user=user, status=Expense.ExpenseStatus.PENDING, due_date__lte=end_date)
+    loans = Loan.objects.filter(user=user, status=Loan.LoanStatus.ACTIVE, remaining_balance__gt=0)
+    return heapq.merge(
+        pending_stream(incomes, 'date_received', INCOME, start_date),
+        pending_stream(expenses, 'due_date', EXPENSE, start_date),
+        *[installment_stream(loan, start_date, end_date) for loan in loans.iterator(chunk_size=STREAM_CHUNK_SIZE)],
+        key=itemgetter(0),
+    )
+
+
+def project_balance(events, start_date, end_date, granularity, opening_balance=Decimal('0')):
+    """
+    Fold date-ordered events into a gap-free series of periods with the running balance.
+    """
+    events = iter(events)
+    pending = next(events, None)
+    balance = opening_balance
+    period = trends.period_start(start_date, granularity)
+    while period <= end_date:
+        following = trends.next_period(period, granularity)
+        totals = {INCOME: Decimal('0'), EXPENSE: Decimal('0'), INSTALLMENT: Decimal('0')}
+        while pending is not None and pending[0] < following:
+            totals[pending[1]] += pending[2]
+            pending = next(events, None)
+
+        net = totals[INCOME] - totals[EXPENSE] - totals[INSTALLMENT]
+        balance += net
+        yield {
+            "period": period,
+            "income": totals[INCOME],
+            "expenses": totals[EXPENSE],
+            "loan_installments": totals[INSTALLMENT],
+            "net": net,
+            "balance": balance,
+        }
+        period = following
+
+
+def build_forecast(user, start_date, horizon_months, granularity, opening_balance=Decimal('0')):
+    end_date = trends.next_period(trends.period_start(start_date, 'month'), 'month')
+    for _ in range(horizon_months - 1):
+        end_date = trends.next_period(end_date, 'month')
+    end_date -= timedelta(days=1)
+
+    timeline = list(project_balance(forecast_events(user, start_date, end_date), start_date, end_date, granularity, opening_balance))
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "granularity": granularity,
+        "opening_balance": opening_balance,
+        "closing_balance": timeline[-1]["balance"] if timeline else opening_balance,
+        "lowest_balance": min((row["balance"] for row in timeline), default=opening_balance),
+        "totals": {
+            "income": sum((row["income"] for row in timeline), Decimal('0')),
+            "expenses": sum((row["expenses"] for row in timeline), Decimal('0')),
+            "loan_installments": sum((row["loan_installments"] for row in timeline), Decimal('0')),
+        },
+        "timeline": timeline,
+    }
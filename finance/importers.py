@@ -0,0 +1,199 @@
+"""
+Streaming import of transaction files (CSV exports, OFX bank statements) into the
+Income and Expense tables.
+
+Files are parsed record by record and processed in chunks: every chunk is validated
+with the model's serializer (many=True, so BatchListSerializer reports bad rows
+individually) and the valid rows are inserted with one executemany() (finance.bulk)
+in a transaction that also updates their rollups. Only one chunk is held in memory
+at a time, whatever the size of the file. Chunks already written stay written if a
+later one fails.
+"""
+import csv
+import html
+import re
+from datetime import datetime
+from django.db import transaction
+from finance import rollups
+from finance.bulk import insert_rows
+from finance.models import Income, Expense, invalidate_user_reports
+from finance.serializers import IncomeSerializer, ExpenseImportSerializer
+
+FORMATS = ('csv', 'ofx')
+
+# Model -> (field holding the payee/description, date field, statement sign of its rows, status of imported rows)
+IMPORT_SPECS = {
+    Income: ('source_name', 'date_received', 1, Income.IncomeStatus.RECEIVED),
+    Expense: ('category', 'due_date', -1, Expense.ExpenseStatus.PAID),
+}
+
+IMPORT_SERIALIZERS = {
+    Income: IncomeSerializer,
+    Expense: ExpenseImportSerializer,
+}
+
+_ofx_tag_re = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+class StatementError(ValueError):
+    """
+    The file can't be imported at all (unknown format, missing columns).
+    """
+
+
+def import_fields(model):
+    name_field, date_field, _, _ = IMPORT_SPECS[model]
+    return (name_field, 'amount', date_field, 'status', 'notes')
+
+
+def default_mapping(model):
+    # Columns named like the fields, as in the CSV export, so exports import back as they are
+    return {field: field for field in import_fields(model)}
+
+
+def read_csv(stream, model, mapping=None, date_format=None, signed=False):
+    """
+    Check the header of a CSV file and return an iterator of (line number, serializer
+    data) over its rows. `mapping` is {field: column}, by default the field names.
+
+    By default amounts are positive, as in the CSV export, and negative ones are left
+    to the serializer to reject. With `signed`, amounts follow the bank statement (and
+    OFX) convention, debits negative and credits positive: rows of the other sign
+    belong to the other model and are skipped, as read_ofx() does.
+    """
+    unknown = set(mapping or ()) - set(import_fields(model))
+    if unknown:
+        raise StatementError(f"Unknown field(s): {', '.join(sorted(unknown))}.")
+    mapping = {**default_mapping(model), **(mapping or {})}
+
+    reader = csv.reader(stream)
+    positions = {column.strip(): index for index, column in enumerate(next(reader, None) or [])}
+    _, date_field, _, status = IMPORT_SPECS[model]
+    # Status and notes are optional
+    missing = [column for field, column in mapping.items() if field not in ('status', 'notes') and column not in positions]
+    if missing:
+        raise StatementError(f"Missing column(s): {', '.join(missing)}.")
+    columns = {field: positions[column] for field, column in mapping.items() if column in positions}
+    sign = IMPORT_SPECS[model][2] if signed else None
+    return _csv_records(reader, columns, date_field, status, date_format, sign)
+
+
+def _csv_records(reader, columns, date_field, status, date_format, sign):
+    for row in reader:
+        if not any(row):
+            continue
+        data = {field: row[index] if index < len(row) else '' for field, index in columns.items()}
+        data['amount'] = data['amount'].strip() if sign is None else _unsigned_amount(data['amount'], sign)
+        if data['amount'] is None:
+            continue
+        if date_format:
+            data[date_field] = _parse_date(data[date_field], date_format)
+        if not data.get('status'):
+            data['status'] = status
+        yield reader.line_num, data
+
+
+def _parse_date(value, date_format):
+    try:
+        return datetime.strptime(value.strip(), date_format).date()
+    except ValueError:
+        return value  # Left to the serializer, which reports it with the row
+
+
+def _unsigned_amount(amount, sign):
+    """
+    Strip the sign of a statement amount, or return None if the sign isn't `sign`
+    (debits are negative, credits positive).
+    """
+    amount = amount.strip()
+    if amount.startswith('-') != (sign < 0):
+        return None
+    return amount.lstrip('+-')
+
+
+def read_ofx_transactions(stream, read_size=64 * 1024):
+    """
+    Yield (transaction number, {tag: value}) for every <STMTTRN> of an OFX file,
+    SGML (1.x, unclosed elements) or XML (2.x), reading it in blocks.
+    """
+    buffer = ''
+    transaction = None
+    number = 0
+    while True:
+        data = stream.read(read_size)
+        buffer += data
+        # The last tag of a block may be cut off, keep it for the next one
+        end = len(buffer) if not data else buffer.rfind('<')
+        for match in _ofx_tag_re.finditer(buffer, 0, max(end, 0)):
+            closing, tag, value = match.groups()
+            tag = tag.upper()
+            if tag == 'STMTTRN':
+                if closing and transaction is not None:
+                    number += 1
+                    yield number, transaction
+                transaction = None if closing else {}
+            elif transaction is not None and not closing:
+                transaction[tag] = html.unescape(value.strip())
+        buffer = buffer[end:] if end >= 0 else ''  # No '<' at all: text outside any tag
+        if not data:
+            return
+
+
+def read_ofx(stream, model):
+    """
+    Yield (transaction number, serializer data) for the transactions of an OFX
+    statement that belong to `model`: credits are incomes, debits expenses.
+    """
+    name_field, date_field, sign, status = IMPORT_SPECS[model]
+    for number, transaction in read_ofx_transactions(stream):
+        amount = _unsigned_amount(transaction.get('TRNAMT', ''), sign)
+        if amount is None:
+            continue
+        posted = transaction.get('DTPOSTED', '')
+        yield number, {
+            name_field: transaction.get('NAME') or transaction.get('PAYEE') or transaction.get('TRNTYPE', ''),
+            'amount': amount,
+            date_field: f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}",
+            'status': status,
+            'notes': transaction.get('MEMO') or None,
+        }
+
+
+def import_records(records, serializer_class, user, chunk_size=10000, max_errors=100):
+    """
+    Validate and write (position, data) records in chunks, yielding the running
+    totals after each chunk. Errors of the first `max_errors` bad records are kept,
+    by position (CSV line or OFX transaction number).
+    """
+    progress = {'processed': 0, 'created': 0, 'failed': 0, 'errors': []}
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            _import_chunk(chunk, serializer_class, user, progress, max_errors)
+            chunk = []
+            yield progress
+    if chunk or not progress['processed']:
+        _import_chunk(chunk, serializer_class, user, progress, max_errors)
+        yield progress
+
+
+def _import_chunk(chunk, serializer_class, user, progress, max_errors):
+    model = serializer_class.Meta.model
+    serializer = serializer_class(data=[data for _, data in chunk], many=True)
+    serializer.is_valid()
+    blank = dict.fromkeys(import_fields(model))
+    rows = [{**blank, **attrs, 'user_id': user.id} for attrs in serializer.validated_data]
+    if rows:
+        # The batch endpoints' bulk_create() would return ids nobody needs here, at several times the cost
+        with transaction.atomic():
+            insert_rows(model, rows)
+            rollups.apply_rows(model, rows)
+            invalidate_user_reports(user.id)
+    progress['processed'] += len(chunk)
+    progress['created'] += len(serializer.valid_indexes)
+    progress['failed'] += len(serializer.item_errors)
+    for index, detail in sorted(serializer.item_errors.items()):
+        if len(progress['errors']) >= max_errors:
+            break
+        progress['errors'].append({'position': chunk[index][0], 'errors': detail})
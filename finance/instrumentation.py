@@ -0,0 +1,211 @@
+"""
+Per-request performance counters: SQL queries, cache lookups and view/render time.
+
+APILoggingMiddleware activates a RequestMetrics for every request. The database and
+cache hooks below add to whichever one is active; it lives in a context variable, so
+it follows the request into sync_to_async threads. Outside a request they only cost
+a context variable lookup.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.core.cache.backends.locmem import LocMemCache
+from django_redis.cache import RedisCache
+
+# Metrics of the request being handled, None outside of a request
+_current_metrics = ContextVar('finance_request_metrics', default=None)
+
+_MISSING = object()
+
+
+class RequestMetrics:
+    """
+    Counters of one request. Times are perf_counter() seconds.
+    """
+    __slots__ = (
+        'started', 'finished', 'view_started', 'view_finished',
+        'db_queries', 'db_time', 'cache_hits', 'cache_misses', 'cache_time',
+    )
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.view_started = None
+        self.view_finished = None  # set when the view hands its response over for rendering
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def total_time(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def view_time(self):
+        if self.view_started is None:
+            return 0.0
+        return (self.view_finished or self.finished or time.perf_counter()) - self.view_started
+
+    @property
+    def render_time(self):
+        if self.view_finished is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.view_finished
+
+    def as_fields(self):
+        """
+        The counters as flat log fields, times in milliseconds.
+        """
+        return {
+            'duration_ms': round(self.total_time * 1000, 2),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_ms': round(self.cache_time * 1000, 2),
+            'view_ms': round(self.view_time * 1000, 2),
+            'render_ms': round(self.render_time * 1000, 2),
+        }
+
+    def server_timing(self):
+        """
+        Value of the `Server-Timing` response header.
+        """
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.2f};desc="{self.db_queries} queries"',
+            f'cache;dur={self.cache_time * 1000:.2f};desc="{self.cache_hits} hits {self.cache_misses} misses"',
+            f'view;dur={self.view_time * 1000:.2f}',
+            f'render;dur={self.render_time * 1000:.2f}',
+            f'total;dur={self.total_time * 1000:.2f}',
+        ])
+
+
+def current_metrics():
+    return _current_metrics.get()
+
+
+@contextmanager
+def activate_metrics(metrics):
+    """
+    Make `metrics` the active RequestMetrics for the duration of the block.
+    """
+    token = _current_metrics.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_metrics.reset(token)
+
+
+@contextmanager
+def collect_metrics():
+    """
+    Make a fresh RequestMetrics the active one for the duration of the block.
+    """
+    metrics = RequestMetrics()
+    try:
+        with activate_metrics(metrics):
+            yield metrics
+    finally:
+        metrics.finish()
+
+
+def stream_with_metrics(metrics, content):
+    """
+    Wrap a streaming response body so the queries and cache lookups made while the
+    server iterates it (after the middleware has returned) count towards `metrics`.
+    """
+    if hasattr(content, '__aiter__'):
+        return _astream_with_metrics(metrics, content)
+    return _stream_with_metrics(metrics, iter(content))
+
+
+def _stream_with_metrics(metrics, iterator):
+    while True:
+        with activate_metrics(metrics):
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                return
+        yield chunk
+
+
+async def _astream_with_metrics(metrics, iterator):
+    iterator = aiter(iterator)
+    while True:
+        with activate_metrics(metrics):
+            try:
+                chunk = await anext(iterator)
+            except StopAsyncIteration:
+                return
+        yield chunk
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Database execute wrapper counting queries and their time (see `instrument_connection`).
+    """
+    metrics = _current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_queries += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def instrument_connection(connection):
+    # Wrappers stay on the connection object across reconnects, so only add it once
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class CacheMetricsMixin:
+    """
+    Count hits and misses of get()/get_many() on a cache backend. A stored None counts
+    as a miss, as it does for the callers (and for django-redis with IGNORE_EXCEPTIONS
+    when Redis is down).
+    """
+    def get(self, key, default=None, version=None, **kwargs):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return super().get(key, default, version=version, **kwargs)
+        started = time.perf_counter()
+        value = super().get(key, _MISSING, version=version, **kwargs)
+        metrics.cache_time += time.perf_counter() - started
+        if value is _MISSING or value is None:
+            metrics.cache_misses += 1
+            return default if value is _MISSING else value
+        metrics.cache_hits += 1
+        return value
+
+    def get_many(self, keys, version=None, **kwargs):
+        metrics = _current_metrics.get()
+        if metrics is None:
+            return super().get_many(keys, version=version, **kwargs)
+        keys = list(keys)
+        started = time.perf_counter()
+        # Backends without a native get_many loop over get(), which must not count again
+        token = _current_metrics.set(None)
+        try:
+            values = super().get_many(keys, version=version, **kwargs)
+        finally:
+            _current_metrics.reset(token)
+        metrics.cache_time += time.perf_counter() - started
+        metrics.cache_hits += len(values)
+        metrics.cache_misses += len(keys) - len(values)
+        return values
+
+
+class InstrumentedRedisCache(CacheMetricsMixin, RedisCache):
+    pass
+
+
+class InstrumentedLocMemCache(CacheMetricsMixin, LocMemCache):
+    pass
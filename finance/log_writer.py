@@ -0,0 +1,178 @@
+"""
+Background writer for the API request log.
+
+Request threads only put records on a bounded queue (QueueHandler); one writer
+thread takes them off in batches and appends each batch to the log file with a
+single write and flush. Request latency therefore never waits on the disk or on
+the file handler's lock. When the queue is full, records are dropped rather than
+blocking the request, and the number dropped is logged once there is room again.
+"""
+import atexit
+import logging
+import os
+import queue
+import threading
+from logging.handlers import QueueHandler, RotatingFileHandler
+
+# Put on the queue by `stop()`: everything before it is written, then the thread exits
+_STOP = object()
+
+
+class BatchingRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that can write a list of records at once. Rollover is checked
+    once per batch, so a file may exceed maxBytes by up to one batch.
+    """
+    def emit_batch(self, records):
+        try:
+            text = ''.join(self.format(record) + self.terminator for record in records)
+        except Exception:
+            for record in records:
+                self.handleError(record)
+            return
+
+        with self.lock:
+            try:
+                if self.stream is None:
+                    self.stream = self._open()
+                position = self.stream.tell()
+                if self.maxBytes > 0 and position and position + len(text) >= self.maxBytes:
+                    self.doRollover()
+                    if self.stream is None:  # delay=True leaves the new file unopened
+                        self.stream = self._open()
+                self.stream.write(text)
+                self.stream.flush()
+            except Exception:
+                self.handleError(records[0])
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that drops (and counts) records when the queue is full instead of
+    raising or blocking.
+    """
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener:
+    """
+    Writer thread: takes every record currently queued (up to `batch_size`) and hands
+    them to `handler.emit_batch()` together.
+    """
+    def __init__(self, log_queue, handler, queue_handler=None, batch_size=500):
+        self.queue = log_queue
+        self.handler = handler
+        self.queue_handler = queue_handler
+        self.batch_size = batch_size
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='api-log-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        """
+        Write everything queued so far and stop the thread.
+        """
+        if not self.running:
+            return
+        self.queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                batch = [record for record in batch if record is not _STOP]
+                stopping = True
+            self._write(batch)
+
+    def _write(self, records):
+        dropped = self.queue_handler.dropped if self.queue_handler is not None else 0
+        if dropped:
+            self.queue_handler.dropped -= dropped
+            records.append(logging.makeLogRecord({
+                'name': 'api_logger', 'levelno': logging.WARNING, 'levelname': 'WARNING',
+                'msg': f"Log queue full, dropped {dropped} records",
+            }))
+        if records:
+            self.handler.emit_batch(records)
+
+
+# Writer of this process and the arguments it was started with (to restart it in forked workers)
+_listener = None
+_listener_pid = None
+_listener_args = None
+_listener_lock = threading.Lock()
+
+
+def start_writer(logger, filename, formatter, queue_size=10000, max_bytes=5 * 1024 * 1024, backup_count=5):
+    """
+    Route `logger` through a queue to a batching writer thread appending to `filename`.
+    Safe to call more than once per process; returns the listener. Called with another
+    `filename`, it drains the running writer and switches to the new file.
+    """
+    global _listener, _listener_pid, _listener_args
+
+    with _listener_lock:
+        if _listener is not None and _listener_pid == os.getpid() and _listener.running:
+            if _listener_args[1] == filename:
+                return _listener
+            _listener.stop()
+            _listener.handler.close()
+
+        for handler in list(logger.handlers):
+            if isinstance(handler, DroppingQueueHandler):
+                logger.removeHandler(handler)
+
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        file_handler = BatchingRotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        file_handler.setFormatter(formatter)
+        log_queue = queue.Queue(maxsize=queue_size)
+        queue_handler = DroppingQueueHandler(log_queue)
+        logger.addHandler(queue_handler)
+
+        _listener = BatchingQueueListener(log_queue, file_handler, queue_handler)
+        _listener.start()
+        _listener_pid = os.getpid()
+        _listener_args = (logger, filename, formatter, queue_size, max_bytes, backup_count)
+        return _listener
+
+
+def stop_writer():
+    """
+    Drain the queue to disk and stop the writer thread (registered to run at exit).
+    """
+    if _listener is not None and _listener_pid == os.getpid():
+        _listener.stop()
+
+
+def _restart_in_child():
+    # A forked worker (e.g. gunicorn --preload) inherits the queue but not the writer thread
+    global _listener_lock
+    _listener_lock = threading.Lock()
+    if _listener_args is not None:
+        start_writer(*_listener_args)
+
+
+atexit.register(stop_writer)
+os.register_at_fork(after_in_child=_restart_in_child)
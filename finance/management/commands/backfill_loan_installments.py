@@ -0,0 +1,72 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from finance.amortization import calculate_emis
+from finance.models import Loan, invalidate_user_reports
+
+"""
+** Custom Command to fill in missing or stale Loan.monthly_installment values in batches
+
+** How to use:
+python manage.py backfill_loan_installments
+python manage.py backfill_loan_installments --batch-size 20000
+python manage.py backfill_loan_installments --dry-run
+
+"""
+
+
+class Command(BaseCommand):
+    help = "Recompute Loan.monthly_installment in batches and write the rows that are missing or stale"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000, help="Number of loans read and written per batch"
+        )
+        parser.add_argument(
+            '--user', type=int, default=None, help="Restrict the backfill to a single user id"
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true', help="Only count the loans that would be updated"
+        )
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        queryset = Loan.objects.order_by('id')
+        if kwargs['user'] is not None:
+            queryset = queryset.filter(user_id=kwargs['user'])
+
+        scanned = updated = 0
+        last_id = 0
+        while True:
+            # Plain tuples walked by primary key: no model instances and no OFFSET
+            rows = list(
+                queryset.filter(id__gt=last_id).values_list(
+                    'id', 'user_id', 'principal_amount', 'interest_rate', 'tenure_months', 'monthly_installment'
+                )[:batch_size]
+            )
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            scanned += len(rows)
+
+            ids, user_ids, principals, rates, tenures, stored = zip(*rows)
+            emis = calculate_emis(principals, rates, tenures)
+            now = timezone.now()
+            changed = [
+                Loan(id=pk, monthly_installment=emi, updated_at=now)
+                for pk, emi, current in zip(ids, emis, stored)
+                if emi != current
+            ]
+            updated += len(changed)
+            if not changed or kwargs['dry_run']:
+                continue
+
+            stale_users = {user_id for user_id, emi, current in zip(user_ids, emis, stored) if emi != current}
+            with transaction.atomic():
+                # updated_at is bumped too, so schedules cached per loan revision are recomputed
+                Loan.objects.bulk_update(changed, ['monthly_installment', 'updated_at'])
+                for user_id in stale_users:
+                    invalidate_user_reports(user_id)
+
+        verb = "Would update" if kwargs['dry_run'] else "Updated"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {updated} of {scanned} loans."))
@@ -0,0 +1,355 @@
+import json
+import os
+import platform
+import shutil
+import statistics
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, timedelta
+from urllib.parse import urlencode
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from finance import log_writer, metrics as route_metrics
+from finance.benchmarking import (
+    build_wsgi_application, wsgi_request, queries_from_server_timing, percentile, seed_benchmark_data,
+)
+from finance.models import Income, Expense, Loan, invalidate_user_reports
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+"""
+** Custom Command to load-test every finance and accounts endpoint in-process
+
+Seeds users x incomes x expenses x loans into a throwaway database (created like the
+test database and dropped afterwards), then sends each endpoint's requests from
+concurrent authenticated clients straight into the WSGI handler and reports latency
+percentiles, throughput and queries per request. Cache keys get their own prefix so
+the configured cache is never shared with real data, and the run's request log and
+metrics files go to a temporary directory that is removed afterwards.
+
+** How to run the benchmark:
+python manage.py benchmark                                         # 5 users x 200 x 200 x 10, 50 requests per endpoint
+python manage.py benchmark --users 20 --incomes 2000 --expenses 2000 --loans 20 --requests 200 --concurrency 16
+python manage.py benchmark --only report --only income             # endpoints whose name contains 'report' or 'income'
+python manage.py benchmark --output after.json --baseline before.json --fail-on-regression
+
+"""
+
+BENCHMARK_PASSWORD = 'Benchmark-pass-2024'
+
+
+class Endpoint:
+    """
+    How to call one URL name. `kwargs`, `params` and `body` are values or callables
+    taking (client, request number), evaluated before the request is timed.
+    """
+    def __init__(self, name, method='GET', kwargs=None, params=None, body=None, authenticated=True):
+        self.name = name
+        self.method = method
+        self.kwargs = kwargs
+        self.params = params
+        self.body = body
+        self.authenticated = authenticated
+
+    @property
+    def label(self):
+        return f"{self.method} {self.name}"
+
+    @staticmethod
+    def evaluate(value, client, number):
+        return value(client, number) if callable(value) else value
+
+    def prepare(self, client, number):
+        path = reverse(self.name, kwargs=self.evaluate(self.kwargs, client, number))
+        params = self.evaluate(self.params, client, number)
+        body = self.evaluate(self.body, client, number)
+        headers = [('Authorization', f"Bearer {client['token']}")] if self.authenticated else []
+        return path, urlencode(params or {}), json.dumps(body).encode() if body is not None else b'', headers
+
+
+def report_params(client, number):
+    today = date.today()
+    return {'start_date': (today - timedelta(days=365)).isoformat(), 'end_date': today.isoformat(), 'granularity': 'month'}
+
+
+def pick(ids_key):
+    return lambda client, number: {'pk': client[ids_key][number % len(client[ids_key])]}
+
+
+def income_item(client, number):
+    return {'source_name': 'Benchmark', 'amount': '120.50', 'date_received': date.today().isoformat(), 'status': 'received'}
+
+
+def expense_item(client, number):
+    return {'category': 'Benchmark', 'amount': '45.25', 'due_date': (date.today() + timedelta(days=30)).isoformat(), 'status': 'pending'}
+
+
+def fresh_refresh_token(client, number):
+    return {'refresh': str(RefreshToken.for_user(client['user']))}
+
+
+# Read endpoints first, so the writes at the end don't change what they measure
+ENDPOINTS = [
+    Endpoint('income-list-create', params={'ordering': '-date_received'}),
+    Endpoint('income-list-cached'),
+    Endpoint('income-list-async'),
+    Endpoint('income-detail', kwargs=pick('income_ids')),
+    Endpoint('income-export', kwargs={'file_format': 'csv'}),
+    Endpoint('expense-list-create', params={'ordering': '-due_date'}),
+    Endpoint('expense-list-cached'),
+    Endpoint('expense-list-async'),
+    Endpoint('expense-detail', kwargs=pick('expense_ids')),
+    Endpoint('expense-export', kwargs={'file_format': 'csv'}),
+    Endpoint('loan-list-create'),
+    Endpoint('loan-list-cached'),
+    Endpoint('loan-list-async'),
+    Endpoint('loan-detail', kwargs=pick('loan_ids')),
+    Endpoint('loan-export', kwargs={'file_format': 'csv'}),
+    Endpoint('loan-schedule-list', params=lambda client, number: {'start_date': date.today().isoformat()}),
+    Endpoint('loan-schedule', kwargs=pick('loan_ids')),
+    Endpoint('loan-payoff-plan', params=lambda client, number: {'budget': client['payoff_budget']}),
+    Endpoint('financial-report', params=report_params),
+    Endpoint('financial-report-cached', params=report_params),
+    Endpoint('financial-report-async', params=report_params),
+    Endpoint('cash-flow-forecast', params={'horizon_months': 12}),
+    Endpoint('metrics', authenticated=False),
+    Endpoint('user-profile'),
+    Endpoint('loan-simulate', method='POST', kwargs=pick('loan_ids'), body={'scenarios': [
+        {'label': 'extra EMI', 'emi_change': '100.00'},
+        {'label': 'lump sum', 'prepayments': [{'month': 6, 'amount': '1000.00'}]},
+    ]}),
+    Endpoint('income-list-create', method='POST', body=income_item),
+    Endpoint('income-batch', method='POST', body=lambda client, number: [income_item(client, number)] * 10),
+    Endpoint('expense-list-create', method='POST', body=expense_item),
+    Endpoint('expense-batch', method='POST', body=lambda client, number: [expense_item(client, number)] * 10),
+    Endpoint('loan-list-create', method='POST', body={
+        'loan_name': 'Benchmark Loan', 'principal_amount': '25000.00', 'interest_rate': '7.50',
+        'tenure_months': 36, 'remaining_balance': '25000.00',
+    }),
+    Endpoint('user-login', method='POST', authenticated=False, body=lambda client, number: {
+        'email': client['user'].email, 'password': BENCHMARK_PASSWORD,
+    }),
+    Endpoint('token-refresh', method='POST', authenticated=False, body=fresh_refresh_token),
+    Endpoint('user-logout', method='POST', body=fresh_refresh_token),
+    Endpoint('user-signup', method='POST', authenticated=False, body=lambda client, number: {
+        'username': f"signup{client['user'].id}x{number}", 'email': f"signup{client['user'].id}x{number}@example.com",
+        'password1': BENCHMARK_PASSWORD, 'password2': BENCHMARK_PASSWORD,
+    }),
+]
+
+# URL names deliberately not benchmarked
+SKIPPED = {
+    'logtest': "raises on purpose to exercise error logging",
+    'income-import': "multipart upload, import_statement reports import throughput",
+    'expense-import': "multipart upload, import_statement reports import throughput",
+}
+
+
+def benchmarked_url_names():
+    """
+    Names of the finance and accounts URLs, to check that each one has an Endpoint.
+    """
+    from finance.urls import urlpatterns as finance_patterns
+    from accounts.urls import urlpatterns as accounts_patterns
+    return {pattern.name for pattern in [*finance_patterns, *accounts_patterns] if pattern.name}
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database and load-test every finance and accounts endpoint in-process"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5, help="Users to seed (each one is a client)")
+        parser.add_argument('--incomes', type=int, default=200, help="Incomes per user")
+        parser.add_argument('--expenses', type=int, default=200, help="Expenses per user")
+        parser.add_argument('--loans', type=int, default=10, help="Loans per user")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed of the dataset")
+        parser.add_argument('--requests', type=int, default=50, help="Requests per endpoint")
+        parser.add_argument('--concurrency', type=int, default=8, help="Requests in flight at once")
+        parser.add_argument('--only', action='append', default=[], help="Only endpoints whose URL name contains this (repeatable)")
+        parser.add_argument('--output', default='benchmark.json', help="Where to write the JSON results")
+        parser.add_argument('--baseline', default=None, help="Earlier results to compare against")
+        parser.add_argument('--threshold', type=float, default=0.2, help="p95 increase (fraction) counted as a regression")
+        parser.add_argument('--fail-on-regression', action='store_true', help="Exit with an error when a regression is found")
+        parser.add_argument('--reuse-db', action='store_true', help="Seed into the configured database instead of a throwaway one")
+
+    def handle(self, *args, **kwargs):
+        missing = benchmarked_url_names() - {endpoint.name for endpoint in ENDPOINTS} - set(SKIPPED)
+        if missing:
+            raise CommandError(f"No benchmark defined for: {', '.join(sorted(missing))}")
+
+        if kwargs['reuse_db']:
+            return self.benchmark(kwargs)
+
+        old_name = connection.settings_dict['NAME']
+        if connection.vendor == 'sqlite':
+            # A file rather than shared in-memory SQLite, and transactions that take the write
+            # lock up front, so concurrent writers wait for each other instead of failing
+            connection.settings_dict['TEST']['NAME'] = os.path.join(tempfile.mkdtemp(), 'benchmark.sqlite3')
+            connection.settings_dict['OPTIONS']['transaction_mode'] = 'IMMEDIATE'
+        self.stdout.write("Creating the benchmark database...")
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.benchmark(kwargs)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def benchmark(self, kwargs):
+        caches = {
+            alias: {**config, 'KEY_PREFIX': f"{config.get('KEY_PREFIX', '')}benchmark"}
+            for alias, config in settings.CACHES.items()
+        }
+        # Requests are addressed to localhost, which ALLOWED_HOSTS only implies when DEBUG is on
+        with override_settings(CACHES=caches, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'localhost']), self.temporary_logs():
+            started = time.perf_counter()
+            user_ids = seed_benchmark_data(
+                kwargs['users'], kwargs['incomes'], kwargs['expenses'], kwargs['loans'],
+                seed=kwargs['seed'], password=BENCHMARK_PASSWORD,
+            )
+            for user_id in user_ids:
+                invalidate_user_reports(user_id)  # Leftover cache entries of an earlier run
+            self.stdout.write(f"Seeded {len(user_ids)} users in {time.perf_counter() - started:.1f}s")
+
+            clients = [self.make_client(user) for user in User.objects.filter(id__in=user_ids).order_by('id')]
+            application = build_wsgi_application()
+            endpoints = [
+                endpoint for endpoint in ENDPOINTS
+                if not kwargs['only'] or any(part in endpoint.name for part in kwargs['only'])
+            ]
+
+            results = {}
+            self.stdout.write(f"{'endpoint':<36}{'req/s':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'errors':>8}")
+            for endpoint in endpoints:
+                result = self.run_endpoint(application, endpoint, clients, kwargs['requests'], kwargs['concurrency'])
+                results[endpoint.label] = result
+                self.stdout.write(
+                    f"{endpoint.label:<36}{result['throughput_rps']:>8.1f}{result['p50_ms']:>9.1f}"
+                    f"{result['p95_ms']:>9.1f}{result['p99_ms']:>9.1f}"
+                    f"{result['queries_per_request'] if result['queries_per_request'] is not None else '-':>9}"
+                    f"{result['errors']:>8}"
+                )
+
+        output = {
+            'config': {key: kwargs[key] for key in ('users', 'incomes', 'expenses', 'loans', 'seed', 'requests', 'concurrency', 'only')},
+            'environment': {
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'cache': settings.CACHES['default']['BACKEND'],
+            },
+            'endpoints': results,
+            'skipped': SKIPPED,
+        }
+
+        regressions = []
+        if kwargs['baseline']:
+            with open(kwargs['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+            output['comparison'] = self.compare(baseline.get('endpoints', {}), results, kwargs['threshold'])
+            regressions = [label for label, change in output['comparison'].items() if change['regression']]
+
+        with open(kwargs['output'], 'w') as output_file:
+            json.dump(output, output_file, indent=2)
+        self.stdout.write(f"Results written to {kwargs['output']}")
+
+        if kwargs['baseline'] and not regressions:
+            self.stdout.write(self.style.SUCCESS(f"No regressions against {kwargs['baseline']}"))
+        for label in regressions:
+            change = output['comparison'][label]
+            self.stdout.write(self.style.ERROR(
+                f"Regression in {label}: p95 {change['p95_ms'][0]} -> {change['p95_ms'][1]} ms, "
+                f"queries {change['queries_per_request'][0]} -> {change['queries_per_request'][1]}"
+            ))
+        if regressions and kwargs['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} endpoint(s) regressed against {kwargs['baseline']}")
+
+    @contextmanager
+    def temporary_logs(self):
+        """
+        Send the request log and the metrics files to a temporary directory, so the
+        synthetic requests never reach logs/api_requests.log or /finance/metrics/.
+        """
+        directory = tempfile.mkdtemp(prefix='benchmark-logs-')
+        try:
+            with override_settings(
+                FINANCE_LOG_FILE=os.path.join(directory, 'api_requests.log'),
+                FINANCE_METRICS_DIR=os.path.join(directory, 'metrics'),
+            ):
+                try:
+                    yield
+                finally:
+                    # Counts kept in memory would be flushed to the real directory at exit
+                    route_metrics.store.reset()
+                    route_metrics.store.flush()
+                    log_writer.stop_writer()
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def make_client(self, user):
+        loan_ids = list(Loan.objects.filter(user=user).order_by('id').values_list('id', flat=True))
+        minimum_budget = Loan.objects.filter(user=user, status=Loan.LoanStatus.ACTIVE).aggregate(total=Sum('monthly_installment'))['total']
+        return {
+            'user': user,
+            'token': str(AccessToken.for_user(user)),
+            'income_ids': list(Income.objects.filter(user=user).order_by('id').values_list('id', flat=True)[:500]),
+            'expense_ids': list(Expense.objects.filter(user=user).order_by('id').values_list('id', flat=True)[:500]),
+            'loan_ids': loan_ids,
+            # Minimum payments plus 20% extra, so the plan isn't rejected
+            'payoff_budget': f"{(minimum_budget or 0) * 12 / 10 + 100:.2f}",
+        }
+
+    def run_endpoint(self, application, endpoint, clients, total, concurrency):
+        prepared = [endpoint.prepare(clients[number % len(clients)], number) for number in range(total)]
+
+        def send(request):
+            path, query_string, body, headers = request
+            return wsgi_request(application, endpoint.method, path, query_string, body, headers)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            responses = list(executor.map(send, prepared))
+        elapsed = time.perf_counter() - started
+
+        latencies = sorted(seconds * 1000 for _, _, seconds in responses)
+        queries = [queries_from_server_timing(headers.get('Server-Timing')) for _, headers, _ in responses]
+        queries = [count for count in queries if count is not None]
+        return {
+            'requests': total,
+            'errors': sum(1 for status, _, _ in responses if status >= 400),
+            'statuses': dict(Counter(str(status) for status, _, _ in responses)),
+            'throughput_rps': round(total / elapsed, 1),
+            'mean_ms': round(statistics.fmean(latencies), 2),
+            'p50_ms': round(percentile(latencies, 0.50), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'queries_per_request': round(statistics.fmean(queries), 1) if queries else None,
+        }
+
+    def compare(self, baseline, results, threshold):
+        """
+        p95 and query changes per endpoint present in both runs. A regression is a p95
+        more than `threshold` slower (and at least 1 ms), or more queries per request.
+        """
+        comparison = {}
+        for label, result in results.items():
+            before = baseline.get(label)
+            if before is None:
+                continue
+            slower = result['p95_ms'] - before['p95_ms']
+            more_queries = (result['queries_per_request'] or 0) - (before['queries_per_request'] or 0)
+            comparison[label] = {
+                'p95_ms': [before['p95_ms'], result['p95_ms']],
+                'p95_change': round(slower / before['p95_ms'], 3) if before['p95_ms'] else None,
+                'queries_per_request': [before['queries_per_request'], result['queries_per_request']],
+                'regression': (slower > 1 and slower > before['p95_ms'] * threshold) or more_queries >= 0.5,
+            }
+        return comparison
@@ -0,0 +1,132 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlencode
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+from finance.benchmarking import benchmark_middleware, build_wsgi_application, percentile, wsgi_request
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+"""
+** Custom Command to compare the sync views under WSGI with the async views under ASGI
+
+Requests go straight into Django's WSGI and ASGI handlers (no server or sockets), so
+the numbers reflect the application and database only.
+
+** How to run the benchmark:
+python manage.py benchmark_asgi                                  # first user, 200 requests, 20 concurrent
+python manage.py benchmark_asgi --user 7 --requests 1000 --concurrency 50
+python manage.py benchmark_asgi --start-date 2024-01-01 --end-date 2024-12-31 --granularity month
+
+"""
+
+# (label, interface, url name) of the runs; the sync report under ASGI shows what plain
+# sync views cost there, since Django serializes them onto one thread
+SCENARIOS = (
+    ('sync report / WSGI', 'wsgi', 'financial-report'),
+    ('sync report / ASGI', 'asgi', 'financial-report'),
+    ('async report / ASGI', 'asgi', 'financial-report-async'),
+    ('sync income list / WSGI', 'wsgi', 'income-list-create'),
+    ('async income list / ASGI', 'asgi', 'income-list-async'),
+)
+
+
+class Command(BaseCommand):
+    help = "Benchmark the sync report and list views under WSGI against their async variants under ASGI"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, default=None, help="Id of the user to request as (defaults to the first user)")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per scenario")
+        parser.add_argument('--concurrency', type=int, default=20, help="Requests in flight at once")
+        parser.add_argument('--start-date', default=None, help="Report start date")
+        parser.add_argument('--end-date', default=None, help="Report end date")
+        parser.add_argument('--granularity', default=None, help="Report trend granularity")
+
+    def handle(self, *args, **kwargs):
+        users = User.objects.order_by('id')
+        user = users.filter(id=kwargs['user']).first() if kwargs['user'] else users.first()
+        if user is None:
+            raise CommandError("No user to benchmark with; create one or seed data first.")
+
+        self.headers = [('Authorization', f"Bearer {AccessToken.for_user(user)}")]
+        self.report_params = {
+            key: kwargs[key] for key in ('start_date', 'end_date', 'granularity') if kwargs[key]
+        }
+        self.wsgi_app = build_wsgi_application()
+        # Handlers read MIDDLEWARE once, when they are built
+        with override_settings(MIDDLEWARE=benchmark_middleware()):
+            self.asgi_app = get_asgi_application()
+
+        self.stdout.write(f"user {user.id}, {kwargs['requests']} requests per scenario, concurrency {kwargs['concurrency']}")
+        self.stdout.write(f"{'scenario':<28}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}{'errors':>8}")
+        for label, interface, url_name in SCENARIOS:
+            path = reverse(url_name)
+            query_string = urlencode(self.report_params) if 'report' in url_name else ''
+            run = self.run_wsgi if interface == 'wsgi' else self.run_asgi
+            run(path, query_string, 1, 1)  # warm-up
+            elapsed, latencies, errors = run(path, query_string, kwargs['requests'], kwargs['concurrency'])
+            latencies.sort()
+            self.stdout.write(
+                f"{label:<28}{len(latencies) / elapsed:>9.1f}"
+                f"{statistics.median(latencies) * 1000:>9.1f}"
+                f"{percentile(latencies, 0.95) * 1000:>9.1f}"
+                f"{latencies[-1] * 1000:>9.1f}{errors:>8}"
+            )
+
+    def run_wsgi(self, path, query_string, total, concurrency):
+        def request(_):
+            status, _headers, elapsed = wsgi_request(self.wsgi_app, 'GET', path, query_string, headers=self.headers)
+            return elapsed, status != 200
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(request, range(total)))
+        return time.perf_counter() - started, [latency for latency, _ in results], sum(failed for _, failed in results)
+
+    def run_asgi(self, path, query_string, total, concurrency):
+        async def request(semaphore):
+            scope = {
+                'type': 'http',
+                'asgi': {'version': '3.0'},
+                'http_version': '1.1',
+                'method': 'GET',
+                'scheme': 'http',
+                'path': path,
+                'raw_path': path.encode(),
+                'query_string': query_string.encode(),
+                'root_path': '',
+                'headers': [(b'host', b'localhost'), *((name.lower().encode(), value.encode()) for name, value in self.headers)],
+                'server': ('localhost', 80),
+                'client': ('127.0.0.1', 0),
+            }
+            messages = []
+            body_sent = asyncio.Event()
+
+            async def receive():
+                # Send the (empty) body once, then wait like a client that stays connected
+                if body_sent.is_set():
+                    await asyncio.Future()
+                body_sent.set()
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+            async def send(message):
+                messages.append(message)
+
+            async with semaphore:
+                started = time.perf_counter()
+                await self.asgi_app(scope, receive, send)
+                return time.perf_counter() - started, messages[0]['status'] != 200
+
+        async def main():
+            semaphore = asyncio.Semaphore(concurrency)
+            return await asyncio.gather(*[request(semaphore) for _ in range(total)])
+
+        started = time.perf_counter()
+        results = asyncio.run(main())
+        return time.perf_counter() - started, [latency for latency, _ in results], sum(failed for _, failed in results)
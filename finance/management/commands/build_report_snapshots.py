@@ -0,0 +1,99 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+from finance.models import ReportSnapshot
+from finance.snapshots import compute_snapshots, mark_snapshot_range
+from finance.trends import GRANULARITIES
+from django.contrib.auth import get_user_model
+
+User = get_user_model()
+
+"""
+** Custom Command to precompute report snapshots (e.g. monthly statements) for all users at once
+
+** How to build snapshots:
+python manage.py build_report_snapshots                      # previous calendar month, all users
+python manage.py build_report_snapshots --start-date 2024-01-01 --end-date 2024-12-31
+python manage.py build_report_snapshots --user-from 1 --user-to 5000 --workers 4 --shard-size 1000
+
+"""
+
+
+def _init_worker():
+    # Spawned workers start without Django configured; forked ones must not reuse the parent's connections
+    django.setup()
+    connections.close_all()
+
+
+def _compute_shard(user_ids, start_date, end_date, granularity):
+    return compute_snapshots(user_ids, start_date, end_date, granularity)
+
+
+class Command(BaseCommand):
+    help = "Compute report snapshots for all users (or a user-id range) with queries grouped by user"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--start-date', type=date.fromisoformat, default=None, help="Report start date (defaults to the first day of last month)")
+        parser.add_argument('--end-date', type=date.fromisoformat, default=None, help="Report end date (defaults to the last day of last month)")
+        parser.add_argument('--granularity', choices=GRANULARITIES, default=None, help="Trend granularity of the snapshots")
+        parser.add_argument('--user-from', type=int, default=None, help="Lowest user id to include")
+        parser.add_argument('--user-to', type=int, default=None, help="Highest user id to include")
+        parser.add_argument('--shard-size', type=int, default=500, help="Number of users computed per grouped query")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Worker processes, 1 computes in-process")
+
+    def handle(self, *args, **kwargs):
+        start_date, end_date = kwargs['start_date'], kwargs['end_date']
+        if start_date is None or end_date is None:
+            last_month_end = date.today().replace(day=1) - timedelta(days=1)
+            start_date = start_date or last_month_end.replace(day=1)
+            end_date = end_date or last_month_end
+        granularity = kwargs['granularity']
+
+        users = User.objects.order_by('id')
+        if kwargs['user_from'] is not None:
+            users = users.filter(id__gte=kwargs['user_from'])
+        if kwargs['user_to'] is not None:
+            users = users.filter(id__lte=kwargs['user_to'])
+        user_ids = list(users.values_list('id', flat=True))
+        shard_size = kwargs['shard_size']
+        shards = [user_ids[i:i + shard_size] for i in range(0, len(user_ids), shard_size)]
+
+        if kwargs['workers'] <= 1 or len(shards) <= 1:
+            results = (_compute_shard(shard, start_date, end_date, granularity) for shard in shards)
+            self.write_snapshots(results, start_date, end_date, granularity)
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=kwargs['workers'], initializer=_init_worker) as executor:
+                results = executor.map(
+                    _compute_shard, shards,
+                    [start_date] * len(shards), [end_date] * len(shards), [granularity] * len(shards),
+                )
+                self.write_snapshots(results, start_date, end_date, granularity)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully built report snapshots for {len(user_ids)} users ({start_date} to {end_date})."
+        ))
+
+    def write_snapshots(self, results, start_date, end_date, granularity):
+        """
+        Upsert shard results as they arrive; writes stay in this process to avoid lock contention.
+
+        Snapshots are versioned, so one overwritten by a stale build is ignored by the report views.
+        """
+        for shard_result in results:
+            ReportSnapshot.objects.bulk_create(
+                [
+                    ReportSnapshot(
+                        user_id=user_id, start_date=start_date, end_date=end_date, granularity=granularity or '',
+                        data=data, data_version=data_version,
+                    )
+                    for user_id, (data_version, data) in shard_result.items()
+                ],
+                update_conflicts=True,
+                unique_fields=['user', 'start_date', 'end_date', 'granularity'],
+                update_fields=['data', 'data_version', 'generated_at'],
+            )
+        mark_snapshot_range(start_date, end_date, granularity)
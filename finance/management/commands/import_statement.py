@@ -0,0 +1,88 @@
+import argparse
+import os
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from finance import importers
+from finance.models import Income, Expense
+
+User = get_user_model()
+
+"""
+** Custom Command to import a CSV export or OFX bank statement into a user's incomes or expenses
+
+** How to import:
+python manage.py import_statement expenses.csv --user jane@example.com --kind expense
+python manage.py import_statement bank.csv --user 3 --kind expense --map category=Payee --map amount=Amount --map due_date=Date --date-format %d/%m/%Y --signed-amounts
+python manage.py import_statement statement.ofx --user 3 --kind income       # credits of the statement
+
+The file is read and written chunk by chunk (--chunk-size rows per transaction), so
+memory stays flat however large it is. Chunks already imported stay imported if the
+command is interrupted.
+
+"""
+
+KINDS = {'income': Income, 'expense': Expense}
+
+
+def _mapping_item(value):
+    field, separator, column = value.partition('=')
+    if not separator:
+        raise argparse.ArgumentTypeError(f"expected field=column, got '{value}'")
+    return field.strip(), column.strip()
+
+
+class Command(BaseCommand):
+    help = "Import a CSV or OFX file of transactions into a user's incomes or expenses"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or OFX file to import")
+        parser.add_argument('--user', required=True, help="Id or email of the user the rows belong to")
+        parser.add_argument('--kind', choices=list(KINDS), required=True, help="Import incomes or expenses")
+        parser.add_argument('--format', choices=importers.FORMATS, default=None, help="File format (defaults to the file extension)")
+        parser.add_argument('--map', action='append', default=[], type=_mapping_item, help="CSV column of a field, as field=column (repeatable)")
+        parser.add_argument('--date-format', default=None, help="strptime format of CSV dates, e.g. %%d/%%m/%%Y (default YYYY-MM-DD)")
+        parser.add_argument('--signed-amounts', action='store_true', help="CSV amounts are signed like a bank statement (debits negative), rows of the other kind are skipped")
+        parser.add_argument('--encoding', default='utf-8-sig', help="Text encoding of the file")
+        parser.add_argument('--chunk-size', type=int, default=10000, help="Rows validated and written per transaction")
+        parser.add_argument('--max-errors', type=int, default=20, help="Number of row errors printed")
+
+    def handle(self, *args, **kwargs):
+        user_lookup = {'id': kwargs['user']} if kwargs['user'].isdigit() else {'email': kwargs['user']}
+        user = User.objects.filter(**user_lookup).first()
+        if user is None:
+            raise CommandError(f"User '{kwargs['user']}' not found.")
+
+        model = KINDS[kwargs['kind']]
+        file_format = kwargs['format'] or os.path.splitext(kwargs['path'])[1].lstrip('.').lower()
+        if file_format not in importers.FORMATS:
+            raise CommandError(f"Unknown file format '{file_format}', pass --format {' or '.join(importers.FORMATS)}.")
+
+        started = time.perf_counter()
+        with open(kwargs['path'], encoding=kwargs['encoding'], errors='replace', newline='') as stream:
+            if file_format == 'csv':
+                try:
+                    records = importers.read_csv(stream, model, dict(kwargs['map']), kwargs['date_format'], kwargs['signed_amounts'])
+                except importers.StatementError as exc:
+                    raise CommandError(str(exc))
+            else:
+                records = importers.read_ofx(stream, model)
+
+            totals = {}
+            progress = importers.import_records(
+                records, importers.IMPORT_SERIALIZERS[model], user,
+                chunk_size=kwargs['chunk_size'], max_errors=kwargs['max_errors'],
+            )
+            for totals in progress:
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"Processed {totals['processed']} rows: {totals['created']} imported, {totals['failed']} failed "
+                    f"({totals['processed'] / elapsed:.0f} rows/s)"
+                )
+
+        for error in totals['errors']:
+            self.stdout.write(self.style.WARNING(f"{'Line' if file_format == 'csv' else 'Transaction'} {error['position']}: {error['errors']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {totals['created']} {model._meta.verbose_name_plural} for {user.email} "
+            f"in {time.perf_counter() - started:.1f}s ({totals['failed']} rows failed)."
+        ))
@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from finance import rollups
+
+"""
+** Custom Command to rebuild (or verify) the monthly Income/Expense rollups from the raw tables
+
+** How to use:
+python manage.py rebuild_rollups
+python manage.py rebuild_rollups --user 3
+python manage.py rebuild_rollups --verify
+
+"""
+
+
+class Command(BaseCommand):
+    help = "Rebuild the monthly Income/Expense rollups from the raw tables, or verify them against it"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true', help="Only compare rollups with the raw tables and report mismatches"
+        )
+        parser.add_argument(
+            '--user', type=int, default=None, help="Restrict the rebuild/verification to a single user id"
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000, help="Number of rollup rows written per INSERT"
+        )
+
+    def handle(self, *args, **kwargs):
+        user_id = kwargs['user']
+        mismatches = 0
+
+        for model, (rollup_model, _, group_fields) in rollups.ROLLUP_SPECS.items():
+            source_queryset = model.objects.all()
+            rollup_queryset = rollup_model.objects.all()
+            if user_id is not None:
+                source_queryset = source_queryset.filter(user_id=user_id)
+                rollup_queryset = rollup_queryset.filter(user_id=user_id)
+
+            expected = rollups.compute_rollups(model, source_queryset)
+            name = rollup_model._meta.verbose_name_plural
+
+            if kwargs['verify']:
+                stored = rollups.stored_rollups(model, rollup_queryset)
+                for key in expected.keys() | stored.keys():
+                    if expected.get(key) != stored.get(key):
+                        mismatches += 1
+                        self.stdout.write(f"{name} {key}: expected {expected.get(key)}, stored {stored.get(key)}")
+                continue
+
+            key_fields = ('user_id', 'month', *group_fields)
+            with transaction.atomic():
+                rollup_queryset.delete()
+                rollup_model.objects.bulk_create(
+                    [
+                        rollup_model(**dict(zip(key_fields, key)), total_amount=total, entry_count=count)
+                        for key, (total, count) in expected.items()
+                    ],
+                    batch_size=kwargs['batch_size'],
+                )
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(expected)} {name}."))
+
+        if kwargs['verify']:
+            if mismatches:
+                raise CommandError(f"Found {mismatches} rollup rows out of sync with the raw tables.")
+            self.stdout.write(self.style.SUCCESS("All rollups match the raw tables."))
@@ -0,0 +1,36 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from finance import search
+
+"""
+** Custom Command to (re)install and rebuild the full-text search index used by ?search=
+
+** How to use:
+python manage.py rebuild_search_index
+python manage.py rebuild_search_index --model finance.Income
+
+"""
+
+
+class Command(BaseCommand):
+    help = "Install (if missing) and rebuild the full-text search index of Income, Expense and Loan"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=list(search.SEARCH_FIELDS), default=None, help="Only rebuild the index of this model"
+        )
+
+    def handle(self, *args, **kwargs):
+        backend = search.get_backend()
+        if backend is None:
+            raise CommandError(f"No full-text search backend is configured for the '{connection.vendor}' database.")
+
+        labels = [kwargs['model']] if kwargs['model'] else list(search.SEARCH_FIELDS)
+        for label in labels:
+            model = apps.get_model(label)
+            # install() is idempotent, so this also repairs a dropped index or trigger
+            with connection.cursor() as cursor:
+                backend.install(cursor, model)
+            backend.rebuild(model)
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt the search index of {model._meta.verbose_name_plural}."))
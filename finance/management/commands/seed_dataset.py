@@ -0,0 +1,120 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.apps import apps
+from django.db import IntegrityError, connection, connections
+from finance import datasets, search
+
+"""
+** Custom Command to generate a reproducible dataset (users and their incomes, expenses and loans)
+   for testing, debugging and load tests. The same --seed always gives the same rows.
+
+** How to seed data:
+python manage.py seed_dataset                                     # 100 users, ~7k rows
+python manage.py seed_dataset --users 1000 --incomes 50 --expenses 200 --seed 42
+python manage.py seed_dataset --users 50000 --expenses 150 --incomes 50 --workers 8 --defer-search-index   # ~10M rows
+python manage.py seed_dataset --skew 0                            # exactly --incomes/--expenses/--loans per user
+
+Rows per user follow a power law (--skew is the Pareto shape, smaller is more skewed),
+so a few users own a large share of the rows. Parallel workers pay off most on
+PostgreSQL; SQLite serializes their writes. --defer-search-index drops the full-text
+index for the run and rebuilds it once at the end (searches don't work meanwhile).
+If a run is interrupted, run `python manage.py rebuild_rollups` (and
+`rebuild_search_index`) before using the data.
+
+"""
+
+
+def _init_worker():
+    # Spawned workers start without Django configured; forked ones must not reuse the parent's connections
+    django.setup()
+    connections.close_all()
+
+
+def _seed_shard(users, means, seed, skew, end_date, days, batch_size):
+    return len(users), datasets.seed_users(users, means, seed, skew, end_date, days, batch_size)
+
+
+def _skew(value):
+    skew = float(value)
+    if skew and skew <= 1:
+        raise argparse.ArgumentTypeError("must be 0 or greater than 1")
+    return skew
+
+
+class Command(BaseCommand):
+    help = "Generate users with power-law distributed incomes, expenses and loans, reproducibly from a seed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help="Number of users to create")
+        parser.add_argument('--incomes', type=float, default=20, help="Mean number of incomes per user")
+        parser.add_argument('--expenses', type=float, default=50, help="Mean number of expenses per user")
+        parser.add_argument('--loans', type=float, default=1, help="Mean number of loans per user")
+        parser.add_argument('--skew', type=_skew, default=1.5, help="Pareto shape of rows per user (> 1), 0 gives every user the mean")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, the same seed gives the same dataset")
+        parser.add_argument('--end-date', type=date.fromisoformat, default=None, help="Date the data ends around (defaults to today)")
+        parser.add_argument('--days', type=int, default=730, help="Number of days of history per user")
+        parser.add_argument('--username-prefix', default=None, help="Usernames are <prefix><n> (defaults to seed<seed>-)")
+        parser.add_argument('--password', default='password123', help="Password of every created user")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows generated and inserted per batch")
+        parser.add_argument('--shard-size', type=int, default=1000, help="Users generated per unit of work")
+        parser.add_argument('--workers', type=int, default=1, help="Worker processes, 1 generates in-process")
+        parser.add_argument('--defer-search-index', action='store_true', help="Drop the full-text index while seeding and rebuild it at the end")
+
+    def handle(self, *args, **kwargs):
+        seed = kwargs['seed']
+        prefix = kwargs['username_prefix'] if kwargs['username_prefix'] is not None else f"seed{seed}-"
+        means = {'income': kwargs['incomes'], 'expense': kwargs['expenses'], 'loan': kwargs['loans']}
+        end_date = kwargs['end_date'] or date.today()
+        started = time.perf_counter()
+
+        try:
+            users = datasets.create_users(kwargs['users'], prefix, kwargs['password'])
+        except IntegrityError:
+            raise CommandError(f"Users named '{prefix}<n>' already exist, choose another --seed or --username-prefix.")
+        self.stdout.write(f"Created {len(users)} users in {time.perf_counter() - started:.1f}s")
+
+        shard_size = kwargs['shard_size']
+        shards = [users[i:i + shard_size] for i in range(0, len(users), shard_size)]
+        arguments = (means, seed, kwargs['skew'], end_date, kwargs['days'], kwargs['batch_size'])
+
+        backend = search.get_backend() if kwargs['defer_search_index'] else None
+        indexed_models = [apps.get_model(label) for label in search.SEARCH_FIELDS] if backend else []
+        with connection.cursor() as cursor:
+            for model in indexed_models:
+                backend.uninstall(cursor, model)
+        try:
+            if kwargs['workers'] <= 1 or len(shards) <= 1:
+                results = (_seed_shard(shard, *arguments) for shard in shards)
+                totals = self.report_progress(results, len(users), started)
+            else:
+                connections.close_all()
+                with ProcessPoolExecutor(max_workers=kwargs['workers'], initializer=_init_worker) as executor:
+                    results = executor.map(_seed_shard, shards, *([argument] * len(shards) for argument in arguments))
+                    totals = self.report_progress(results, len(users), started)
+        finally:
+            # install() builds the index from the whole table
+            with connection.cursor() as cursor:
+                for model in indexed_models:
+                    backend.install(cursor, model)
+
+        # The users are new, so no cached report can be stale and nothing is invalidated
+        elapsed = time.perf_counter() - started
+        rows = sum(totals.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully created {len(users)} users with {totals['income']} incomes, {totals['expense']} expenses "
+            f"and {totals['loan']} loans in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s)."
+        ))
+
+    def report_progress(self, results, user_count, started):
+        totals = dict.fromkeys(datasets.ROW_KINDS, 0)
+        done = 0
+        for shard_users, written in results:
+            done += shard_users
+            for kind, count in written.items():
+                totals[kind] += count
+            self.stdout.write(f"Seeded {done}/{user_count} users, {sum(totals.values())} rows ({time.perf_counter() - started:.1f}s)")
+        return totals
@@ -0,0 +1,179 @@
+"""
+Request counters and latency histograms by route and status class, in Prometheus
+exposition format, aggregated over all worker processes without a metrics service.
+
+Each process counts in memory. A background thread replaces the process's own file,
+`<FINANCE_METRICS_DIR>/metrics-<pid>.json`, every FINANCE_METRICS_FLUSH_INTERVAL
+seconds, and the metrics endpoint sums every file in the directory. Counts of workers
+that have exited stay in the totals, like any Prometheus counter; clear the directory
+when deploying.
+"""
+import atexit
+import bisect
+import glob
+import json
+import os
+import threading
+from django.conf import settings
+
+# Upper bounds (seconds) of the latency histogram buckets, +Inf is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route label of requests that matched no URL pattern, so 404 scans can't add series
+UNMATCHED_ROUTE = 'unmatched'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_start_lock = threading.Lock()
+
+
+def metrics_dir():
+    return str(getattr(settings, 'FINANCE_METRICS_DIR', os.path.join(settings.BASE_DIR, 'logs', 'metrics')))
+
+
+def status_class(status_code):
+    return f"{status_code // 100}xx"
+
+
+class MetricsStore:
+    """
+    Histograms of this process: `series[(route, status class)]` holds per-bucket
+    (non-cumulative) counts, the last one being +Inf, and the sum of observed seconds.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._series = {}
+        self._dirty = False
+        self._pid = None
+        self._stop = threading.Event()
+
+    def observe(self, route, status_code, seconds):
+        if self._pid != os.getpid():
+            with _start_lock:
+                if self._pid != os.getpid():
+                    self._start()
+        key = (route, status_class(status_code))
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = {'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'sum': 0.0}
+            series['buckets'][bucket] += 1
+            series['sum'] += seconds
+            self._dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                f"{route}\t{status}": {'buckets': list(series['buckets']), 'sum': series['sum']}
+                for (route, status), series in self._series.items()
+            }
+
+    def flush(self):
+        """
+        Write this process's counts to its file (atomically, readers never see half a file).
+        """
+        # The flusher thread and scrapes may flush at the same time; one at a time, so an
+        # older snapshot can never replace the file after a newer one
+        with self._flush_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._dirty = False
+            try:
+                directory = metrics_dir()
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+                temporary_path = f"{path}.tmp"
+                with open(temporary_path, 'w') as metrics_file:
+                    json.dump(self.snapshot(), metrics_file)
+                os.replace(temporary_path, path)
+            except OSError:
+                with self._lock:
+                    self._dirty = True  # Written by the next flush
+                raise
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+            self._dirty = True
+
+    def _start(self):
+        # First observation in this process (or in a forked child, whose inherited
+        # counts belong to the parent's file)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._series = {}
+        self._dirty = False
+        self._pid = os.getpid()
+        self._stop = threading.Event()
+        interval = getattr(settings, 'FINANCE_METRICS_FLUSH_INTERVAL', 5)
+        threading.Thread(target=self._run, args=(interval,), name='metrics-flusher', daemon=True).start()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except OSError:
+                pass  # Try again next interval, metrics must never take the worker down
+
+    def close(self):
+        if self._pid == os.getpid():
+            self._stop.set()
+            self.flush()
+
+
+store = MetricsStore()
+atexit.register(store.close)
+
+
+def collect():
+    """
+    Sum the histograms of every process that wrote to the metrics directory.
+    """
+    store.flush()
+    totals = {}
+    for path in glob.glob(os.path.join(metrics_dir(), 'metrics-*.json')):
+        try:
+            with open(path) as metrics_file:
+                process_series = json.load(metrics_file)
+        except (OSError, ValueError):
+            continue  # The process's file is being replaced or is corrupt
+        for key, series in process_series.items():
+            total = totals.setdefault(key, {'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'sum': 0.0})
+            for index, count in enumerate(series['buckets']):
+                total['buckets'][index] += count
+            total['sum'] += series['sum']
+    return totals
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render(totals):
+    """
+    Prometheus text exposition of `collect()`'s totals.
+    """
+    series = sorted((key.split('\t'), value) for key, value in totals.items())
+    lines = [
+        "# HELP finance_http_requests_total Requests handled, by route and status class.",
+        "# TYPE finance_http_requests_total counter",
+    ]
+    for (route, status), value in series:
+        lines.append(f'finance_http_requests_total{{route="{_label(route)}",status="{status}"}} {sum(value["buckets"])}')
+
+    lines += [
+        "# HELP finance_http_request_duration_seconds Request latency, by route and status class.",
+        "# TYPE finance_http_request_duration_seconds histogram",
+    ]
+    for (route, status), value in series:
+        labels = f'route="{_label(route)}",status="{status}"'
+        cumulative = 0
+        for bound, count in zip((*LATENCY_BUCKETS, '+Inf'), value['buckets']):
+            cumulative += count
+            lines.append(f'finance_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'finance_http_request_duration_seconds_sum{{{labels}}} {value["sum"]}')
+        lines.append(f'finance_http_request_duration_seconds_count{{{labels}}} {cumulative}')
+    return '\n'.join(lines) + '\n'
@@ -1,26 +1,27 @@
+import json
 import logging
+import random
 import time
-from logging.handlers import RotatingFileHandler
+from django.conf import settings
 from django.http import JsonResponse
+from finance import log_writer, metrics as route_metrics
+from finance.instrumentation import collect_metrics, current_metrics, stream_with_metrics
 
 # Create Logger instance
 logger = logging.getLogger("api_logger")
 
-# File Handler with log rotation
-file_handler = RotatingFileHandler(
-    "logs/api_requests.log", maxBytes=5 * 1024 * 1024, backupCount=5
-)
+# Log file with rotation, written by a background thread (see finance.log_writer),
+# unless FINANCE_LOG_FILE says otherwise
+LOG_FILE = "logs/api_requests.log"
 
 # Console Handler
 # console_handler = logging.StreamHandler()
 
 # Formatter for logs
 formatter = logging.Formatter(fmt="%(asctime)s %(levelname)s; %(message)s")
-file_handler.setFormatter(formatter)
 # console_handler.setFormatter(formatter)
 
 # Add handlers to the logger
-logger.addHandler(file_handler)
 # logger.addHandler(console_handler)
 
 # Set logging level
@@ -30,44 +31,82 @@ logger.setLevel(logging.INFO)
 
 class APILoggingMiddleware:
     """
-    Middleware for logging incoming API requests and handling errors.
+    Middleware for logging API requests and handling errors.
+
+    Every request is logged as one JSON object with the request's SQL query count and
+    time, cache hits/misses, and view and render time (see finance.instrumentation),
+    and the same timings are sent in a `Server-Timing` header. Request counts and latency
+    histograms per URL name and status class are kept for the metrics endpoint
+    (see finance.metrics).
+
+    Log lines go through a queue to a background writer thread. Successful requests are
+    logged at the FINANCE_LOG_SAMPLE_RATE (0..1); errors and 4xx/5xx responses always are.
+
+    Streaming responses (e.g. the exports) produce their body after this middleware has
+    returned, so they are logged and counted when the server closes the response, with
+    the body's queries and time included. Their `Server-Timing` header is sent before the
+    body and only covers the time until the headers.
     """
 
     def __init__(self, get_response):
         self.get_response = get_response
+        log_file = str(getattr(settings, 'FINANCE_LOG_FILE', LOG_FILE))
+        log_writer.start_writer(logger, log_file, formatter, queue_size=getattr(settings, 'FINANCE_LOG_QUEUE_SIZE', 10000))
 
     def __call__(self, request):
-        # Logic executed before the request is passed to the view
-        start_time = time.time()
-        request_data = {
-            "method": request.method,
-            "ip_address": request.META.get("REMOTE_ADDR"),
-            "path": request.path,
-        }
+        # Process the request and handle any exceptions
+        with collect_metrics() as metrics:
+            try:
+                response = self.get_response(request)
+            except Exception as e:
+                # Log the error with traceback
+                logger.error(f"Error processing request: {str(e)}", exc_info=True)
+                # Return a standardized error response
+                response = JsonResponse(
+                    {"error": "An error occurred while processing your request."},
+                    status=500,
+                )
 
-        # Log the incoming request
-        logger.info(f"Incoming request: {request_data}")
+        if getattr(settings, 'FINANCE_SERVER_TIMING', True):
+            response["Server-Timing"] = metrics.server_timing()
 
-        # Process the request and handle any exceptions
-        
-        try:
-            response = self.get_response(request)
-        except Exception as e:
-            # Log the error with traceback
-            logger.error(f"Error processing request: {str(e)}", exc_info=True)
-            error = str(e)
-            # Return a standardized error response
-            return JsonResponse(
-                {"error": "An error occurred while processing your request."},
-                status=500,
-            )
-
-        # Logic executed after the view is called
-        duration = time.time() - start_time
-        response_data = {
-            "status_code": response.status_code,
-            "duration": duration,
-        }
-        logger.info(f"Response data: {response_data}")
+        if response.streaming:
+            response.streaming_content = stream_with_metrics(metrics, response.streaming_content)
+            # Closers run once the server has sent the whole body (WSGI and ASGI alike)
+            response._resource_closers.append(lambda: self.record(request, response, metrics))
+        else:
+            self.record(request, response, metrics)
+        return response
+
+    def record(self, request, response, metrics):
+        """
+        Logic executed once the response is complete: metrics and the request log line.
+        """
+        metrics.finish()
+        resolver_match = getattr(request, 'resolver_match', None)
+        route = resolver_match.view_name if resolver_match else route_metrics.UNMATCHED_ROUTE
+        route_metrics.store.observe(route, response.status_code, metrics.total_time)
+
+        sample_rate = getattr(settings, 'FINANCE_LOG_SAMPLE_RATE', 1.0)
+        if response.status_code >= 400 or sample_rate >= 1 or random.random() < sample_rate:
+            response_data = {
+                "method": request.method,
+                "ip_address": request.META.get("REMOTE_ADDR"),
+                "path": request.path,
+                "status_code": response.status_code,
+                **metrics.as_fields(),
+            }
+            logger.info(f"Response data: {json.dumps(response_data)}")
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Last middleware in the chain, so the view runs right after this
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
 
+    def process_template_response(self, request, response):
+        # Called just before a DRF Response is rendered: the view is done
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.view_finished = time.perf_counter()
         return response
@@ -0,0 +1,84 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    """
+    Build the rollups for rows that existed before the rollup tables.
+    """
+    specs = [
+        ('Income', 'IncomeMonthlyRollup', 'date_received', ['status']),
+        ('Expense', 'ExpenseMonthlyRollup', 'due_date', ['category', 'status']),
+    ]
+    for source_name, rollup_name, date_field, group_fields in specs:
+        source = apps.get_model('finance', source_name)
+        rollup = apps.get_model('finance', rollup_name)
+        rows = (
+            source.objects.order_by()
+            .annotate(month=TruncMonth(date_field))
+            .values('user_id', 'month', *group_fields)
+            .annotate(total=Sum('amount'), count=Count('id'))
+        )
+        rollup.objects.bulk_create(
+            [
+                rollup(
+                    user_id=row['user_id'],
+                    month=row['month'],
+                    total_amount=row['total'],
+                    entry_count=row['count'],
+                    **{field: row[field] for field in group_fields},
+                )
+                for row in rows.iterator()
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0002_alter_expense_options_loan'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExpenseMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month this rollup covers.')),
+                ('category', models.CharField(max_length=120)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('paid', 'Paid')], max_length=10)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='expense_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Expense Monthly Rollup',
+                'verbose_name_plural': 'Expense Monthly Rollups',
+                'constraints': [models.UniqueConstraint(fields=('user', 'month', 'category', 'status'), name='unique_expense_rollup')],
+            },
+        ),
+        migrations.CreateModel(
+            name='IncomeMonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month this rollup covers.')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('received', 'Received')], max_length=10)),
+                ('total_amount', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('entry_count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='income_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Income Monthly Rollup',
+                'verbose_name_plural': 'Income Monthly Rollups',
+                'constraints': [models.UniqueConstraint(fields=('user', 'month', 'status'), name='unique_income_rollup')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
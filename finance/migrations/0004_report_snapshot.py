@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_monthly_rollups'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('granularity', models.CharField(blank=True, default='', help_text='Trend granularity, blank for the legacy month-of-year trend.', max_length=10)),
+                ('data', models.JSONField(help_text='The rendered report, exactly as returned by the report endpoint.')),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='report_snapshots', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Report Snapshot',
+                'verbose_name_plural': 'Report Snapshots',
+                'constraints': [models.UniqueConstraint(fields=('user', 'start_date', 'end_date', 'granularity'), name='unique_report_snapshot')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.db import migrations
+from finance import search
+
+
+def install_search_index(apps, schema_editor):
+    backend = search.get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    for label in search.SEARCH_FIELDS:
+        backend.install(schema_editor, apps.get_model(label))
+
+
+def uninstall_search_index(apps, schema_editor):
+    backend = search.get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    for label in search.SEARCH_FIELDS:
+        backend.uninstall(schema_editor, apps.get_model(label))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0006_query_shape_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
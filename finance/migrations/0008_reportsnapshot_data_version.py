@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 21:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_full_text_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportsnapshot',
+            name='data_version',
+            field=models.BigIntegerField(blank=True, help_text="The user's data version the report was computed from.", null=True),
+        ),
+    ]
@@ -1,11 +1,23 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.utils.translation import gettext_lazy as _
+from finance import caching
+from finance.amortization import calculate_emis
 
 # Current User Model
 User = get_user_model()
 
 
+def invalidate_user_reports(user_id):
+    """
+    Drop everything derived from a user's Income/Expense/Loan rows after one of them changed:
+    stored report snapshots right away, cached responses once the transaction commits.
+    """
+    ReportSnapshot.objects.filter(user_id=user_id).delete()
+    caching.bump_on_commit(user_id)
+
+
 # Model for Income
 class Income(models.Model):
     class IncomeStatus(models.TextChoices):
@@ -26,9 +38,24 @@ class Income(models.Model):
         verbose_name = _("Income")
         verbose_name_plural = _("Incomes")
         indexes = [
-            models.Index(fields=['user', 'source_name', 'status'])
+            models.Index(fields=['user', 'source_name', 'status']),
+            models.Index(fields=['user', 'date_received', 'id'], name='income_user_date_id_idx'),
+            models.Index(fields=['user', 'status', 'date_received'], name='income_user_status_date_idx'),
         ]
 
+    def save(self, *args, **kwargs):
+        """
+        Save the income, apply the change to the monthly rollups in the same transaction
+        and invalidate the user's derived report data.
+        """
+        from finance import rollups
+
+        with transaction.atomic():
+            previous = rollups.fetch_previous(self)
+            super().save(*args, **kwargs)
+            rollups.record_change(previous, self, kwargs.get('update_fields'))
+            invalidate_user_reports(self.user_id)
+
     def __str__(self):
         return f"{self.user} - {self.source_name} - {self.amount} - {self.status}"
     
@@ -55,12 +82,63 @@ class Expense(models.Model):
         verbose_name_plural = _("Expenses")
         indexes = [
             models.Index(fields=['user', 'category', 'status']),
+            models.Index(fields=['user', 'due_date', 'id'], name='expense_user_due_id_idx'),
+            models.Index(fields=['user', 'status', 'due_date'], name='expense_user_status_due_idx'),
         ]
 
+    def save(self, *args, **kwargs):
+        """
+        Save the expense, apply the change to the monthly rollups in the same transaction
+        and invalidate the user's derived report data.
+        """
+        from finance import rollups
+
+        with transaction.atomic():
+            previous = rollups.fetch_previous(self)
+            super().save(*args, **kwargs)
+            rollups.record_change(previous, self, kwargs.get('update_fields'))
+            invalidate_user_reports(self.user_id)
+
     def __str__(self):
         return f"Expense({self.category}, {self.amount}, {self.user})"
 
 
+# Bulk-safe QuerySet for Loan
+class LoanQuerySet(models.QuerySet):
+    """
+    Keeps monthly_installment and updated_at in sync on the bulk paths that bypass Loan.save().
+    """
+    installment_fields = ('principal_amount', 'interest_rate', 'tenure_months')
+
+    @staticmethod
+    def set_installments(loans):
+        emis = calculate_emis(
+            [loan.principal_amount for loan in loans],
+            [loan.interest_rate for loan in loans],
+            [loan.tenure_months for loan in loans],
+        )
+        for loan, emi in zip(loans, emis):
+            loan.monthly_installment = emi
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self.set_installments(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+        if set(fields) & set(self.installment_fields):
+            self.set_installments(objs)
+            fields.append('monthly_installment')
+        # bulk_update does not apply auto_now, and cached schedules are keyed on updated_at
+        now = timezone.now()
+        for loan in objs:
+            loan.updated_at = now
+        fields = list(dict.fromkeys([*fields, 'updated_at']))
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+
 # Model for Loan Management
 class Loan(models.Model):
     class LoanStatus(models.TextChoices):
@@ -79,38 +157,94 @@ class Loan(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LoanQuerySet.as_manager()
+
     class Meta:
         ordering = ("-created_at",)
         verbose_name = _("Loan")
         verbose_name_plural = _("Loans")
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='loan_user_created_id_idx'),
+            models.Index(fields=['user', 'status', 'remaining_balance'], name='loan_user_status_balance_idx'),
+        ]
 
     def calculate_monthly_installment(self):
         """
         Calculate the monthly installment for the loan using the formula for EMI
+        (shared with the bulk paths, see LoanQuerySet)
         """
-        if self.principal_amount and self.interest_rate and self.tenure_months:
-            r = self.interest_rate / 12 / 100  # Monthly interest rate
-            n = self.tenure_months
-            P = self.principal_amount
-
-            if r == 0:  # Special case: No interest rate
-                emi = P / n
-            else:
-                emi = (P * r * (1 + r) ** n) / ((1 + r) ** n - 1)
-
-            return round(emi, 2)
-        return None
+        return calculate_emis([self.principal_amount], [self.interest_rate], [self.tenure_months])[0]
     
     def save(self, *args, **kwargs):
         """
         Override the save method to automatically calculate the monthly installment
-        before saving the model.
+        before saving the model, and invalidate the user's derived report data.
         """
         self.monthly_installment = self.calculate_monthly_installment()
-        super().save(*args, **kwargs)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            invalidate_user_reports(self.user_id)
 
     def __str__(self):
         return f"{self.loan_name} - {self.user}"
 
 
+# Per-user, per-month totals of Income, maintained incrementally on every write
+class IncomeMonthlyRollup(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='income_rollups')
+    month = models.DateField(help_text=_("First day of the month this rollup covers."))
+    status = models.CharField(max_length=10, choices=Income.IncomeStatus.choices)
+    total_amount = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    entry_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = _("Income Monthly Rollup")
+        verbose_name_plural = _("Income Monthly Rollups")
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month', 'status'], name='unique_income_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.month:%Y-%m} - {self.status} - {self.total_amount}"
+
+
+# Per-user, per-month totals of Expense by category, maintained incrementally on every write
+class ExpenseMonthlyRollup(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='expense_rollups')
+    month = models.DateField(help_text=_("First day of the month this rollup covers."))
+    category = models.CharField(max_length=120)
+    status = models.CharField(max_length=10, choices=Expense.ExpenseStatus.choices)
+    total_amount = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    entry_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name = _("Expense Monthly Rollup")
+        verbose_name_plural = _("Expense Monthly Rollups")
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month', 'category', 'status'], name='unique_expense_rollup'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.month:%Y-%m} - {self.category} - {self.status} - {self.total_amount}"
+
+
+# Precomputed report for a user and date range, built in bulk by `build_report_snapshots`
+class ReportSnapshot(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='report_snapshots')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    granularity = models.CharField(max_length=10, blank=True, default='', help_text=_("Trend granularity, blank for the legacy month-of-year trend."))
+    data = models.JSONField(help_text=_("The rendered report, exactly as returned by the report endpoint."))
+    data_version = models.BigIntegerField(null=True, blank=True, help_text=_("The user's data version the report was computed from."))
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = _("Report Snapshot")
+        verbose_name_plural = _("Report Snapshots")
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'start_date', 'end_date', 'granularity'], name='unique_report_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"{self.user} - {self.start_date} to {self.end_date}"
 
@@ -0,0 +1,147 @@
+import base64
+import json
+from django.db.models import Q
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination that switches to keyset (cursor) pagination on request.
+
+    Keyset mode is enabled with `?pagination=cursor` (or any `cursor` parameter) and
+    follows the sort requested through OrderingFilter / CustomDynamicFilterBackend.
+    Without one it uses the view's `keyset_ordering` (not the view queryset's default
+    order), then the queryset's or the model's ordering. `id` is appended as a
+    tie-breaker, and each page continues strictly after the last row of the previous one
+    with a `WHERE (a, b, id) > (...)` style filter, so there is no COUNT(*) and no OFFSET
+    and every page costs the same however deep the client scrolls.
+
+    ** Example url:
+    http://127.0.0.1:8000/finance/income/?pagination=cursor&sort_by=amount&order=desc
+    """
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    cursor_page_size_query_param = 'page_size'
+    max_cursor_page_size = 1000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def use_keyset(self, request):
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.use_keyset(request)
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.cursor_page_size = self.get_cursor_page_size(request)
+        self.ordering = self.get_keyset_ordering(queryset, view)
+        queryset = queryset.order_by(*[f"-{field.attname}" if descending else field.attname for field, descending in self.ordering])
+
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            queryset = queryset.filter(self.get_keyset_filter(self.decode_cursor(encoded)))
+
+        rows = list(queryset[:self.cursor_page_size + 1])
+        self.has_next = len(rows) > self.cursor_page_size
+        self.page_rows = rows[:self.cursor_page_size]
+        return self.page_rows
+
+    def get_cursor_page_size(self, request):
+        try:
+            size = int(request.query_params[self.cursor_page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_cursor_page_size)
+
+    def get_keyset_ordering(self, queryset, view):
+        """
+        Resolve the ordering to [(model field, descending)], ending with `id`.
+        """
+        view_ordering = getattr(view, 'keyset_ordering', None)
+        if view_ordering and not self.sort_requested(self.request, view):
+            ordering = list(view_ordering)
+        else:
+            ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering) or list(view_ordering or ['id'])
+        resolved = []
+        for item in ordering:
+            if not isinstance(item, str):
+                raise ValidationError({'ordering': ["Cursor pagination only supports ordering by model fields."]})
+            descending = item.startswith('-')
+            name = item.lstrip('-')
+            name = 'id' if name == 'pk' else name
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                raise ValidationError({'ordering': [f"Cursor pagination cannot sort by '{name}'."]})
+            if not field.concrete or field.null:
+                raise ValidationError({'ordering': [f"Cursor pagination cannot sort by '{name}'."]})
+            if all(existing.name != field.name for existing, _ in resolved):
+                resolved.append((field, descending))
+
+        if all(field.name != 'id' for field, _ in resolved):
+            resolved.append((queryset.model._meta.pk, resolved[-1][1] if resolved else False))
+        return resolved
+
+    def sort_requested(self, request, view):
+        """
+        Whether the client asked for a sort through one of the view's ordering backends.
+        """
+        for backend in getattr(view, 'filter_backends', ()):
+            for attribute in ('ordering_param', 'sort_param'):
+                param = getattr(backend, attribute, None)
+                if param and request.query_params.get(param):
+                    return True
+        return False
+
+    def get_keyset_filter(self, values):
+        """
+        Rows strictly after `values` in the current ordering. The redundant bound on the
+        leading field lets the database seek into the composite index.
+        """
+        condition = Q()
+        equal_prefix = Q()
+        for (field, descending), value in zip(self.ordering, values):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal_prefix & Q(**{f"{field.attname}__{lookup}": value})
+            equal_prefix &= Q(**{field.attname: value})
+
+        leading_field, leading_descending = self.ordering[0]
+        leading_bound = Q(**{f"{leading_field.attname}__{'lte' if leading_descending else 'gte'}": values[0]})
+        return leading_bound & condition
+
+    def encode_cursor(self, instance):
+        values = [field.value_to_string(instance) for field, _ in self.ordering]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, encoded):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [field.to_python(value) for (field, _), value in zip(self.ordering, values)]
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.page_rows[-1]))
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
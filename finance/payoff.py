@@ -0,0 +1,134 @@
+"""
+Multi-loan payoff planner.
+
+Loans are simulated month by month as parallel columns (balance, monthly rate,
+minimum payment). Every month each open loan accrues interest and receives its
+minimum payment; whatever is left of the budget, including the minimums freed by
+loans already paid off, goes to the loans in the strategy's priority order.
+"""
+from datetime import date
+from finance.amortization import add_months, calculate_emis, to_money
+
+STRATEGIES = ('avalanche', 'snowball', 'custom')
+
+# Safety net for plans that cannot finish (e.g. a minimum payment below the interest)
+MAX_PLAN_MONTHS = 1200
+
+# Installments are rounded to cents, which leaves a few cents after the last scheduled month;
+# like a lender's final installment, a payment absorbs a residue below this amount
+RESIDUE_TOLERANCE = 1.0
+
+
+class PayoffPlanner:
+    """
+    Payoff simulation of a set of loans under a fixed monthly budget.
+    """
+
+    def __init__(self, loans, budget, start_date=None):
+        self.loans = list(loans)
+        self.ids = [loan.id for loan in self.loans]
+        self.budget = float(budget)
+        self.start_date = start_date or date.today()
+        self.balances = [float(loan.remaining_balance) for loan in self.loans]
+        self.rates = [float(loan.interest_rate) / 12 / 100 for loan in self.loans]
+        # Loans missing an installment fall back to the EMI of their terms
+        emis = calculate_emis(
+            [loan.principal_amount for loan in self.loans],
+            [loan.interest_rate for loan in self.loans],
+            [loan.tenure_months for loan in self.loans],
+        )
+        self.payments = [
+            float(loan.monthly_installment if loan.monthly_installment is not None else emi or 0)
+            for loan, emi in zip(self.loans, emis)
+        ]
+
+    @property
+    def minimum_budget(self):
+        return to_money(sum(payment for payment, balance in zip(self.payments, self.balances) if balance > 0))
+
+    def priority(self, strategy, order=None):
+        """
+        Loan indexes in the order extra payments are applied.
+        """
+        indexes = range(len(self.loans))
+        # Avalanche: highest rate first; also the tie-breaker for loans a custom order leaves out
+        avalanche = sorted(indexes, key=lambda i: (-self.rates[i], self.balances[i], self.ids[i]))
+        if strategy == 'avalanche':
+            return avalanche
+        if strategy == 'snowball':
+            return sorted(indexes, key=lambda i: (self.balances[i], -self.rates[i], self.ids[i]))
+        if strategy == 'custom':
+            position = {loan_id: index for index, loan_id in enumerate(order or [])}
+            return sorted(avalanche, key=lambda i: position.get(self.ids[i], len(position)))
+        raise ValueError(f"Unknown payoff strategy: {strategy}")
+
+    def simulate(self, priority):
+        """
+        Run the plan; `priority` is the order extra payments go to (empty: minimums only).
+        """
+        balances = list(self.balances)
+        interest_paid = [0.0] * len(balances)
+        payoff_months = [0 if balance <= 0 else None for balance in balances]
+        open_loans = [i for i, balance in enumerate(balances) if balance > 0]
+
+        month = 0
+        while open_loans and month < MAX_PLAN_MONTHS:
+            month += 1
+            available = self.budget
+            for i in open_loans:
+                interest = round(balances[i] * self.rates[i], 2)
+                interest_paid[i] += interest
+                due = balances[i] + interest
+                payment = due if due - self.payments[i] < RESIDUE_TOLERANCE else self.payments[i]
+                balances[i] = round(due - payment, 2)
+                available -= payment
+
+            for i in priority:
+                if available < 0.01:
+                    break
+                if balances[i] > 0:
+                    extra = min(available, balances[i])
+                    balances[i] = round(balances[i] - extra, 2)
+                    available -= extra
+
+            for i in open_loans:
+                if balances[i] <= 0:
+                    payoff_months[i] = month
+            open_loans = [i for i in open_loans if balances[i] > 0]
+
+        finished = not open_loans
+        return {
+            "months": month if finished else None,
+            "payoff_date": self.payment_date(month) if finished else None,
+            "total_interest": to_money(sum(interest_paid)),
+            "loans": [
+                {
+                    "loan": self.ids[i],
+                    "payoff_month": payoff_months[i],
+                    "payoff_date": self.payment_date(payoff_months[i]) if payoff_months[i] else None,
+                    "interest": to_money(interest_paid[i]),
+                }
+                for i in (priority or range(len(balances)))
+            ],
+        }
+
+    def payment_date(self, month):
+        return add_months(self.start_date, month)
+
+    def plan(self, strategies, order=None):
+        """
+        Results for each strategy, with the interest saved against paying only the minimums.
+        """
+        baseline = self.simulate([])
+        results = []
+        for strategy in strategies:
+            result = self.simulate(self.priority(strategy, order))
+            result["strategy"] = strategy
+            result["interest_saved"] = baseline["total_interest"] - result["total_interest"]
+            results.append(result)
+        return {
+            "budget": to_money(self.budget),
+            "minimum_budget": self.minimum_budget,
+            "minimum_payments_only": {key: baseline[key] for key in ("months", "payoff_date", "total_interest")},
+            "strategies": results,
+        }
@@ -0,0 +1,196 @@
+"""
+Incremental maintenance of the per-user monthly Income and Expense rollups.
+
+Every write to an Income or Expense row is turned into signed deltas keyed by
+(user, month, grouping fields) and applied to the matching rollup row with an
+`F()` increment, so a rollup never has to be recomputed from the raw table.
+`rebuild_rollups` reconciles the tables if they ever drift (raw SQL, fixtures).
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, Count
+from django.db.models.functions import TruncMonth
+from finance.models import Income, Expense, IncomeMonthlyRollup, ExpenseMonthlyRollup
+
+
+# Source model -> (rollup model, date field bucketed by month, grouping fields)
+ROLLUP_SPECS = {
+    Income: (IncomeMonthlyRollup, 'date_received', ('status',)),
+    Expense: (ExpenseMonthlyRollup, 'due_date', ('category', 'status')),
+}
+
+
+def month_start(value):
+    return value.replace(day=1)
+
+
+def next_month(value):
+    """
+    First day of the following month, or date.max for December 9999 (which has none).
+    """
+    if (value.year, value.month) == (date.max.year, date.max.month):
+        return date.max
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def month_end(value):
+    return value.replace(day=31) if value.month == 12 else next_month(value) - timedelta(days=1)
+
+
+def tracked_fields(model):
+    """
+    Fields whose values decide which rollup row an instance belongs to.
+    """
+    _, date_field, group_fields = ROLLUP_SPECS[model]
+    return ('user_id', date_field, *group_fields, 'amount')
+
+
+def _row_key(model, row):
+    _, date_field, group_fields = ROLLUP_SPECS[model]
+    meta = model._meta
+    month = month_start(meta.get_field(date_field).to_python(row[date_field]))
+    amount = meta.get_field('amount').to_python(row['amount'])
+    return (row['user_id'], month, *(row[field] for field in group_fields)), amount
+
+
+def fetch_previous(instance):
+    """
+    Return the stored values of an instance about to be saved, or None if it is new.
+    The row stays locked until the caller's transaction ends, so an overlapping update
+    of it can't subtract the same previous values from the rollups again.
+    """
+    if instance.pk is None:
+        return None
+    model = type(instance)
+    return model.objects.select_for_update().filter(pk=instance.pk).values(*tracked_fields(model)).first()
+
+
+def instance_row(instance):
+    return {field: getattr(instance, field) for field in tracked_fields(type(instance))}
+
+
+def apply_rows(model, rows, sign=1):
+    """
+    Add (sign=1) or remove (sign=-1) many source rows from the rollups at once.
+    Rows are dicts holding `tracked_fields(model)`; this is the entry point for bulk paths.
+    """
+    apply_deltas(model, collect_deltas(model, rows, sign))
+
+
+def collect_deltas(model, rows, sign=1, deltas=None):
+    """
+    Sum rows into {rollup key: [amount, count]}, adding to `deltas` if given.
+    """
+    deltas = defaultdict(lambda: [0, 0]) if deltas is None else deltas
+    for row in rows:
+        key, amount = _row_key(model, row)
+        deltas[key][0] += sign * amount
+        deltas[key][1] += sign
+    return deltas
+
+
+def apply_deltas(model, deltas):
+    rollup_model, _, group_fields = ROLLUP_SPECS[model]
+    key_fields = ('user_id', 'month', *group_fields)
+
+    for key, (amount, count) in deltas.items():
+        if not amount and not count:
+            continue
+        lookup = dict(zip(key_fields, key))
+        increment = {
+            'total_amount': F('total_amount') + amount,
+            'entry_count': F('entry_count') + count,
+        }
+        if rollup_model.objects.filter(**lookup).update(**increment) or count <= 0:
+            # A missing row can only be decremented while its user is being deleted, skip it
+            continue
+        try:
+            with transaction.atomic():
+                rollup_model.objects.create(**lookup, total_amount=amount, entry_count=count)
+        except IntegrityError:
+            # Created concurrently by another request, fall back to incrementing it
+            rollup_model.objects.filter(**lookup).update(**increment)
+
+
+def record_change(previous, instance, update_fields=None):
+    """
+    Move a saved instance from its previous rollup bucket (if any) to its current one.
+    With `update_fields` only those fields were written, the others keep their stored values.
+    """
+    model = type(instance)
+    current = instance_row(instance)
+    if previous is not None and update_fields is not None:
+        written = {model._meta.get_field(name).attname for name in update_fields}
+        current = {field: value if field in written else previous[field] for field, value in current.items()}
+    deltas = defaultdict(lambda: [0, 0])
+    if previous is not None:
+        key, amount = _row_key(model, previous)
+        deltas[key][0] -= amount
+        deltas[key][1] -= 1
+    key, amount = _row_key(model, current)
+    deltas[key][0] += amount
+    deltas[key][1] += 1
+    apply_deltas(model, deltas)
+
+
+def record_deletion(instance):
+    apply_rows(type(instance), [instance_row(instance)], sign=-1)
+
+
+def compute_rollups(model, queryset=None):
+    """
+    Aggregate the raw table into {rollup key: (total_amount, entry_count)}.
+    """
+    _, date_field, group_fields = ROLLUP_SPECS[model]
+    queryset = model.objects.all() if queryset is None else queryset
+    rows = (
+        queryset.order_by()
+        .annotate(month=TruncMonth(date_field))
+        .values('user_id', 'month', *group_fields)
+        .annotate(total=Sum('amount'), count=Count('id'))
+    )
+    return {
+        (row['user_id'], row['month'], *(row[field] for field in group_fields)): (row['total'], row['count'])
+        for row in rows.iterator()
+    }
+
+
+def stored_rollups(model, queryset=None):
+    rollup_model, _, group_fields = ROLLUP_SPECS[model]
+    queryset = rollup_model.objects.all() if queryset is None else queryset
+    rows = queryset.exclude(entry_count=0).values_list('user_id', 'month', *group_fields, 'total_amount', 'entry_count')
+    return {tuple(row[:-2]): (row[-2], row[-1]) for row in rows.iterator()}
+
+
+def split_date_range(start_date, end_date):
+    """
+    Split an inclusive date range into whole months answered by rollups and partial-month edges.
+
+    Returns (full_from, full_until, edges): rollup months m with full_from <= m < full_until
+    (either bound may be None for an open range) plus at most two (start, end) date ranges
+    that must be scanned from the raw tables.
+    """
+    if start_date and end_date and start_date > end_date:
+        return start_date, start_date, []
+
+    edges = []
+    full_from = start_date
+    if start_date and start_date.day != 1:
+        full_from = next_month(start_date)
+        edge_end = month_end(start_date)
+        if end_date and end_date < edge_end:
+            edge_end = end_date
+        edges.append((start_date, edge_end))
+
+    full_until = None
+    if end_date:
+        if end_date == month_end(end_date):
+            full_until = next_month(end_date)
+        else:
+            full_until = month_start(end_date)
+            edge_start = max(full_until, start_date) if start_date else full_until
+            if not edges or edges[0][1] < edge_start:
+                edges.append((edge_start, end_date))
+
+    return full_from, full_until, edges
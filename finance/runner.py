@@ -0,0 +1,34 @@
+"""
+Test runner keeping test requests out of the real API request log and metrics files.
+"""
+import os
+import shutil
+import tempfile
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from finance import log_writer, metrics
+
+
+class FinanceTestRunner(DiscoverRunner):
+    """
+    DiscoverRunner that points FINANCE_LOG_FILE and FINANCE_METRICS_DIR at a temporary
+    directory for the whole run, so the test clients' requests never show up in
+    logs/api_requests.log or in the totals of the /finance/metrics/ endpoint.
+    """
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.logs_dir = tempfile.mkdtemp(prefix='finance-tests-')
+        self.logs_settings = override_settings(
+            FINANCE_LOG_FILE=os.path.join(self.logs_dir, 'api_requests.log'),
+            FINANCE_METRICS_DIR=os.path.join(self.logs_dir, 'metrics'),
+        )
+        self.logs_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        # Write out what is pending while the settings still point at the temporary directory,
+        # or the exit handlers would flush it to the real ones
+        metrics.store.close()
+        log_writer.stop_writer()
+        self.logs_settings.disable()
+        shutil.rmtree(self.logs_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
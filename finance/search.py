@@ -0,0 +1,164 @@
+"""
+Pluggable full-text search over the text fields of Income, Expense and Loan.
+
+The index lives in the database and is maintained by the database itself, so it
+follows every write path (save(), bulk_create/bulk_update, queryset.update(),
+deletes and raw SQL):
+
+* SQLite: an external-content FTS5 table per model, kept in sync by triggers.
+* PostgreSQL: a GIN index over the model's `to_tsvector(...)` expression, which
+  search queries repeat verbatim so the planner can use it.
+
+The backend follows the database vendor and can be overridden with the
+`FINANCE_SEARCH_BACKEND` setting (a dotted path, or None to disable full-text
+search and fall back to SearchFilter's `icontains` lookups).
+"""
+import re
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+# Indexed text fields per model label
+SEARCH_FIELDS = {
+    'finance.Income': ('source_name', 'notes'),
+    'finance.Expense': ('category', 'notes'),
+    'finance.Loan': ('loan_name', 'notes'),
+}
+
+DEFAULT_BACKENDS = {
+    'sqlite': 'finance.search.SQLiteFTS5Backend',
+    'postgresql': 'finance.search.PostgresSearchBackend',
+}
+
+# Rank annotation added to searched querysets (better matches sort first)
+RANK_ALIAS = 'search_rank'
+
+_word_re = re.compile(r'\w+', re.UNICODE)
+
+
+def search_words(terms):
+    """
+    Plain words of the search terms; operators and quotes are dropped so user input
+    can never break the engine's query syntax.
+    """
+    return [word for term in terms for word in _word_re.findall(term)]
+
+
+class BaseSearchBackend:
+    """
+    Interface of a search backend. `model` may be a historical model inside migrations,
+    so backends only rely on its table and field names; `executor` is a schema editor
+    or a cursor.
+    """
+    def fields(self, model):
+        return SEARCH_FIELDS[model._meta.label]
+
+    def supports(self, model):
+        return model._meta.label in SEARCH_FIELDS
+
+    def install(self, executor, model):
+        raise NotImplementedError
+
+    def uninstall(self, executor, model):
+        raise NotImplementedError
+
+    def rebuild(self, model):
+        raise NotImplementedError
+
+    def search(self, queryset, terms):
+        """
+        Restrict the queryset to rows matching every word of `terms`, annotated with RANK_ALIAS.
+        """
+        raise NotImplementedError
+
+
+class SQLiteFTS5Backend(BaseSearchBackend):
+    def index_table(self, model):
+        return f"{model._meta.db_table}_fts"
+
+    def install(self, executor, model):
+        table, index = model._meta.db_table, self.index_table(model)
+        fields = self.fields(model)
+        columns = ', '.join(fields)
+        new_values = ', '.join(f"new.{field}" for field in fields)
+        old_values = ', '.join(f"old.{field}" for field in fields)
+        statements = [
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5({columns}, content='{table}', content_rowid='id')",
+            f"CREATE TRIGGER IF NOT EXISTS {index}_ai AFTER INSERT ON {table} BEGIN "
+            f"INSERT INTO {index}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {index}_ad AFTER DELETE ON {table} BEGIN "
+            f"INSERT INTO {index}({index}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {index}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+            f"INSERT INTO {index}({index}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {index}(rowid, {columns}) VALUES (new.id, {new_values}); END",
+            f"INSERT INTO {index}({index}) VALUES ('rebuild')",
+        ]
+        for statement in statements:
+            executor.execute(statement)
+
+    def uninstall(self, executor, model):
+        index = self.index_table(model)
+        for suffix in ('ai', 'ad', 'au'):
+            executor.execute(f"DROP TRIGGER IF EXISTS {index}_{suffix}")
+        executor.execute(f"DROP TABLE IF EXISTS {index}")
+
+    def rebuild(self, model):
+        index = self.index_table(model)
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {index}({index}) VALUES ('rebuild')")
+
+    def search(self, queryset, terms):
+        table, index = queryset.model._meta.db_table, self.index_table(queryset.model)
+        # Every word must match, as a prefix like the icontains search it replaces
+        match = ' '.join(f'"{word}"*' for word in search_words(terms))
+        return queryset.extra(
+            select={RANK_ALIAS: f"-bm25({index})"},
+            tables=[index],
+            where=[f"{index} MATCH %s", f"{index}.rowid = {table}.id"],
+            params=[match],
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    config = 'english'
+
+    def index_name(self, model):
+        return f"{model._meta.db_table}_search_idx"
+
+    def document(self, model):
+        columns = " || ' ' || ".join(f"coalesce({field}, '')" for field in self.fields(model))
+        return f"to_tsvector('{self.config}', {columns})"
+
+    def install(self, executor, model):
+        executor.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.index_name(model)} ON {model._meta.db_table} "
+            f"USING gin ({self.document(model)})"
+        )
+
+    def uninstall(self, executor, model):
+        executor.execute(f"DROP INDEX IF EXISTS {self.index_name(model)}")
+
+    def rebuild(self, model):
+        with connection.cursor() as cursor:
+            cursor.execute(f"REINDEX INDEX {self.index_name(model)}")
+
+    def search(self, queryset, terms):
+        # Unqualified column names keep the expression identical to the indexed one
+        document = self.document(queryset.model)
+        query = f"to_tsquery('{self.config}', %s)"
+        tsquery = ' & '.join(f"{word}:*" for word in search_words(terms))
+        return queryset.extra(
+            select={RANK_ALIAS: f"ts_rank({document}, {query})"},
+            select_params=[tsquery],
+            where=[f"{document} @@ {query}"],
+            params=[tsquery],
+        )
+
+
+def get_backend(using_connection=None):
+    """
+    Return the configured search backend instance, or None when full-text search is disabled.
+    """
+    vendor = (using_connection or connection).vendor
+    path = getattr(settings, 'FINANCE_SEARCH_BACKEND', DEFAULT_BACKENDS.get(vendor))
+    return import_string(path)() if path else None
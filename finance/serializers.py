@@ -1,8 +1,99 @@
 from rest_framework import serializers
-from .models import Income, Expense, Loan
+from django.db import transaction
+from django.utils import timezone
+from .models import Income, Expense, Loan, invalidate_user_reports
+from finance import rollups
 from datetime import date
+from decimal import Decimal
+from finance.trends import GRANULARITIES, MAX_BUCKETS, bucket_count
+from finance.payoff import STRATEGIES
+from finance.forecast import FORECAST_GRANULARITIES, MAX_HORIZON_MONTHS
 
 
+# ListSerializer used by the batch endpoints (many=True)
+class BatchListSerializer(serializers.ListSerializer):
+    """
+    Validates every item independently: invalid items are collected in `item_errors`
+    (keyed by their index in the request) instead of failing the whole batch, and the
+    valid ones are written with a single bulk_create/bulk_update in one transaction.
+
+    For updates `instance` is an {id: object} mapping and each item must carry its `id`.
+    """
+    bulk_batch_size = 500
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            try:
+                pk = int(data['id'])
+            except (TypeError, KeyError, ValueError):
+                raise serializers.ValidationError({'id': ["A valid id is required."]})
+            if pk not in self.instance:
+                raise serializers.ValidationError({'id': ["Not found."]})
+            if pk in self.seen_ids:
+                raise serializers.ValidationError({'id': ["Duplicate id in batch."]})
+            self.seen_ids.add(pk)
+            self.child.instance = self.instance[pk]
+            self.child.initial_data = data
+            return {**super().run_child_validation(data), 'id': pk}
+        return super().run_child_validation(data)
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            message = self.error_messages['not_a_list'].format(input_type=type(data).__name__)
+            raise serializers.ValidationError({'non_field_errors': [message]}, code='not_a_list')
+        if self.max_length is not None and len(data) > self.max_length:
+            message = self.error_messages['max_length'].format(max_length=self.max_length)
+            raise serializers.ValidationError({'non_field_errors': [message]}, code='max_length')
+
+        self.item_errors = {}
+        self.valid_indexes = []
+        self.seen_ids = set()
+        validated = []
+        for index, item in enumerate(data):
+            try:
+                validated.append(self.run_child_validation(item))
+            except serializers.ValidationError as exc:
+                self.item_errors[index] = exc.detail
+            else:
+                self.valid_indexes.append(index)
+        return validated
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        objects = [model(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            model.objects.bulk_create(objects, batch_size=self.bulk_batch_size)
+            self.record_writes(model, objects)
+        return objects
+
+    def update(self, instance, validated_data):
+        model = self.child.Meta.model
+        objects, previous_rows, fields = [], [], {'updated_at'}
+        now = timezone.now()
+        for attrs in validated_data:
+            obj = instance[attrs.pop('id')]
+            previous_rows.append(rollups.instance_row(obj))
+            for attr, value in attrs.items():
+                setattr(obj, attr, value)
+                fields.add(attr)
+            obj.updated_at = now  # bulk_update does not apply auto_now
+            objects.append(obj)
+
+        if objects:
+            with transaction.atomic():
+                model.objects.bulk_update(objects, list(fields), batch_size=self.bulk_batch_size)
+                rollups.apply_rows(model, previous_rows, sign=-1)
+                self.record_writes(model, objects)
+        return objects
+
+    def record_writes(self, model, objects):
+        """
+        Bulk writes skip Model.save(), so keep rollups and derived reports in sync here.
+        """
+        rollups.apply_rows(model, [rollups.instance_row(obj) for obj in objects])
+        for user_id in {obj.user_id for obj in objects}:
+            invalidate_user_reports(user_id)
+
 
 # ModelSerializer for Income Model
 class IncomeSerializer(serializers.ModelSerializer):
@@ -10,6 +101,7 @@ class IncomeSerializer(serializers.ModelSerializer):
         model = Income
         fields = ['id', 'user', 'source_name', 'amount', 'date_received', 'status', 'notes', 'created_at', 'updated_at']
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        list_serializer_class = BatchListSerializer
 
     def validate_amount(self, value):
         if value <= 0:
@@ -24,6 +116,7 @@ class ExpenseSerializer(serializers.ModelSerializer):
         model = Expense
         fields = ['id', 'user', 'category', 'amount', 'due_date', 'status', 'notes', 'created_at', 'updated_at']
         read_only_fields = ['id', 'user', 'created_at', 'updated_at']
+        list_serializer_class = BatchListSerializer
 
     def validate_amount(self, value):
         if value <= 0:
@@ -37,6 +130,12 @@ class ExpenseSerializer(serializers.ModelSerializer):
         return value
     
 
+# Expenses imported from statements are history, so their due dates may be past
+class ExpenseImportSerializer(ExpenseSerializer):
+    def validate_due_date(self, value):
+        return value
+
+
 # ModelSerializer for Loan Model
 class LoanSerializer(serializers.ModelSerializer):
     monthly_installment = serializers.DecimalField(
@@ -78,4 +177,168 @@ class LoanSerializer(serializers.ModelSerializer):
 # Serializer fo Report
 class ReportSerializer(serializers.Serializer):
     start_date = serializers.DateField(required=False)
-    end_date = serializers.DateField(required=False)
\ No newline at end of file
+    end_date = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(
+        choices=GRANULARITIES,
+        required=False,
+        help_text="Bucket size of the trend series. When set, buckets are year-aware and empty ones are zero-filled."
+    )
+
+    def validate(self, attrs):
+        start_date, end_date, granularity = attrs.get('start_date'), attrs.get('end_date'), attrs.get('granularity')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError("start_date cannot be after end_date.")
+        if granularity and start_date and end_date and bucket_count(start_date, end_date, granularity) > MAX_BUCKETS[granularity]:
+            raise serializers.ValidationError(
+                f"The range spans more than {MAX_BUCKETS[granularity]} {granularity} buckets, choose a shorter range or a coarser granularity."
+            )
+        return attrs
+
+
+def parse_id_list(value, field_name):
+    try:
+        return list(dict.fromkeys(int(pk) for pk in value.split(',') if pk.strip()))
+    except ValueError:
+        raise serializers.ValidationError(f"{field_name} must be a comma separated list of integers.")
+
+
+# Serializers for the loan amortization schedule
+class LoanScheduleSerializer(serializers.Serializer):
+    start_date = serializers.DateField(required=False, help_text="Only include installments due on or after this date.")
+    end_date = serializers.DateField(required=False, help_text="Only include installments due on or before this date.")
+    ids = serializers.CharField(required=False, help_text="Comma separated loan ids (multi-loan endpoint only).")
+
+    def validate_ids(self, value):
+        return sorted(set(parse_id_list(value, 'ids')))
+
+    def validate(self, attrs):
+        start_date, end_date = attrs.get('start_date'), attrs.get('end_date')
+        if start_date and end_date and start_date > end_date:
+            raise serializers.ValidationError("start_date cannot be after end_date.")
+        return attrs
+
+
+class AmortizationRowSerializer(serializers.Serializer):
+    period = serializers.IntegerField()
+    payment_date = serializers.DateField()
+    installment = serializers.DecimalField(max_digits=14, decimal_places=2)
+    principal = serializers.DecimalField(max_digits=14, decimal_places=2)
+    interest = serializers.DecimalField(max_digits=14, decimal_places=2)
+    balance = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+# Serializers for the loan what-if simulator
+class PrepaymentSerializer(serializers.Serializer):
+    month = serializers.IntegerField(min_value=1, help_text="Installment number after which the lump sum is paid.")
+    amount = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'))
+
+
+class LoanScenarioSerializer(serializers.Serializer):
+    label = serializers.CharField(required=False, max_length=120)
+    prepayments = PrepaymentSerializer(many=True, required=False, default=list)
+    emi_change = serializers.DecimalField(max_digits=12, decimal_places=2, required=False, default=Decimal('0'), help_text="Amount added to (or, if negative, removed from) the EMI.")
+    emi_change_from = serializers.IntegerField(min_value=1, required=False, default=1, help_text="First installment paid with the changed EMI.")
+
+    def validate_prepayments(self, value):
+        # Several lump sums in the same month are paid together
+        prepayments = {}
+        for item in value:
+            prepayments[item['month']] = prepayments.get(item['month'], 0) + item['amount']
+        return prepayments
+
+
+class LoanSimulationSerializer(serializers.Serializer):
+    scenarios = LoanScenarioSerializer(many=True, allow_empty=False, max_length=500)
+
+
+class SimulationBaselineSerializer(serializers.Serializer):
+    monthly_installment = serializers.DecimalField(max_digits=14, decimal_places=2)
+    payoff_month = serializers.IntegerField()
+    payoff_date = serializers.DateField(allow_null=True)
+    total_interest = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class ScenarioResultSerializer(serializers.Serializer):
+    index = serializers.IntegerField()
+    label = serializers.CharField(allow_null=True)
+    paid_off = serializers.BooleanField()
+    payoff_month = serializers.IntegerField(allow_null=True)
+    payoff_date = serializers.DateField(allow_null=True)
+    months_saved = serializers.IntegerField(allow_null=True)
+    total_interest = serializers.DecimalField(max_digits=14, decimal_places=2, allow_null=True)
+    interest_saved = serializers.DecimalField(max_digits=14, decimal_places=2, allow_null=True)
+    total_prepaid = serializers.DecimalField(max_digits=14, decimal_places=2)
+    balance_left = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+# Serializer for the multi-loan payoff planner
+class PayoffPlanSerializer(serializers.Serializer):
+    budget = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'), help_text="Total amount available for loan payments every month.")
+    strategy = serializers.ChoiceField(choices=STRATEGIES, required=False, help_text="Only simulate this strategy (default: avalanche and snowball, plus custom when an order is given).")
+    order = serializers.CharField(required=False, help_text="Comma separated loan ids in the order extra payments go to (custom strategy).")
+
+    def validate_order(self, value):
+        return parse_id_list(value, 'order')
+
+    def validate(self, attrs):
+        if attrs.get('strategy') == 'custom' and not attrs.get('order'):
+            raise serializers.ValidationError({"order": "The custom strategy requires an order."})
+        if 'strategy' in attrs:
+            attrs['strategies'] = [attrs['strategy']]
+        else:
+            attrs['strategies'] = ['avalanche', 'snowball'] + (['custom'] if attrs.get('order') else [])
+        return attrs
+
+
+class PayoffLoanResultSerializer(serializers.Serializer):
+    loan = serializers.IntegerField()
+    payoff_month = serializers.IntegerField(allow_null=True)
+    payoff_date = serializers.DateField(allow_null=True)
+    interest = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class PayoffBaselineSerializer(serializers.Serializer):
+    months = serializers.IntegerField(allow_null=True)
+    payoff_date = serializers.DateField(allow_null=True)
+    total_interest = serializers.DecimalField(max_digits=14, decimal_places=2)
+
+
+class PayoffStrategyResultSerializer(PayoffBaselineSerializer):
+    strategy = serializers.ChoiceField(choices=STRATEGIES)
+    interest_saved = serializers.DecimalField(max_digits=14, decimal_places=2)
+    loans = PayoffLoanResultSerializer(many=True)
+
+
+class PayoffPlanResultSerializer(serializers.Serializer):
+    budget = serializers.DecimalField(max_digits=14, decimal_places=2)
+    minimum_budget = serializers.DecimalField(max_digits=14, decimal_places=2)
+    minimum_payments_only = PayoffBaselineSerializer()
+    strategies = PayoffStrategyResultSerializer(many=True)
+
+
+# Serializer for the cash-flow forecast
+class ForecastSerializer(serializers.Serializer):
+    horizon_months = serializers.IntegerField(min_value=1, max_value=MAX_HORIZON_MONTHS, default=12, help_text="Number of calendar months to project, starting with the current one.")
+    granularity = serializers.ChoiceField(choices=FORECAST_GRANULARITIES, default='month')
+    opening_balance = serializers.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0'), help_text="Cash available at the start of the forecast.")
+
+
+# Serializer for the statement import endpoints (multipart form)
+class StatementImportSerializer(serializers.Serializer):
+    file = serializers.FileField(help_text="CSV file with a header row, or OFX statement.")
+    mapping = serializers.JSONField(required=False, help_text='CSV only: {"field": "column"} for columns not named like the fields, e.g. {"amount": "Debit"}.')
+    date_format = serializers.CharField(required=False, max_length=50, help_text="CSV only: strptime format of the date column, e.g. %d/%m/%Y (default YYYY-MM-DD).")
+    signed_amounts = serializers.BooleanField(
+        required=False, default=False,
+        help_text="CSV only: amounts are signed like a bank statement (debits negative), rows of the other kind are skipped.",
+    )
+
+    def validate_mapping(self, value):
+        if not isinstance(value, dict) or not all(isinstance(column, str) for column in value.values()):
+            raise serializers.ValidationError("mapping must be an object of field names to column names.")
+        return value
+
+
+# Serializer for the batch delete endpoints
+class BatchDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
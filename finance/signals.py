@@ -0,0 +1,59 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from finance.models import Income, Expense, Loan, invalidate_user_reports
+from finance import rollups, instrumentation
+
+# Bookkeeping collected by `batched_deletes()`, None outside of a batch
+_pending_deletes = ContextVar('finance_pending_deletes', default=None)
+
+
+@contextmanager
+def batched_deletes():
+    """
+    Aggregate the post_delete bookkeeping of a bulk delete: rollup deltas are applied
+    once per bucket and each user's reports are invalidated once, when the block exits.
+    Use it inside the transaction that performs the delete.
+    """
+    pending = {'rows': defaultdict(list), 'user_ids': set()}
+    token = _pending_deletes.set(pending)
+    try:
+        yield
+    finally:
+        _pending_deletes.reset(token)
+
+    for model, rows in pending['rows'].items():
+        rollups.apply_rows(model, rows, sign=-1)
+    for user_id in pending['user_ids']:
+        invalidate_user_reports(user_id)
+
+
+# post_delete runs inside the deletion transaction and also fires for queryset/admin bulk deletes
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+def remove_from_rollups(sender, instance, **kwargs):
+    pending = _pending_deletes.get()
+    if pending is not None:
+        pending['rows'][sender].append(rollups.instance_row(instance))
+        return
+    rollups.record_deletion(instance)
+
+
+@receiver(post_delete, sender=Income)
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Loan)
+def invalidate_derived_reports(sender, instance, **kwargs):
+    pending = _pending_deletes.get()
+    if pending is not None:
+        pending['user_ids'].add(instance.user_id)
+        return
+    invalidate_user_reports(instance.user_id)
+
+
+# Count every query against the request being handled (see finance.instrumentation)
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    instrumentation.instrument_connection(connection)
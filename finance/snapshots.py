@@ -0,0 +1,104 @@
+"""
+Bulk computation of report snapshots for many users at once.
+
+Instead of running the per-user report query once per user, a shard of
+consecutive user ids is answered with three queries grouped by `user_id`
+(income and expense trend buckets plus active loan balances). The rows are
+assembled with the report view's own logic so a snapshot is byte-for-byte what
+the endpoint would have returned.
+
+Each snapshot stores the user's data version read before its queries ran, and
+is only served while that version is still current, so a write that commits
+during a build can never be masked by the upsert that follows it. Ranges that
+have snapshots are recorded in the cache, letting reports for any other range
+skip the snapshot lookup entirely.
+"""
+import json
+from collections import defaultdict
+from django.core.cache import cache
+from django.db.models import Sum, DecimalField
+from rest_framework.utils.encoders import JSONEncoder
+from finance import caching
+from finance.models import Income, Expense, Loan, ReportSnapshot
+
+
+def render_report(report_data):
+    """
+    Convert report data to the JSON values the API renders (Decimal -> number, date -> ISO string).
+    """
+    return json.loads(json.dumps(report_data, cls=JSONEncoder))
+
+
+def snapshot_range_key(start_date, end_date, granularity=None):
+    return f"finance_snapshot_range_{start_date}_{end_date}_{granularity or ''}"
+
+
+def mark_snapshot_range(start_date, end_date, granularity=None):
+    """
+    Record that snapshots were built for this range so report requests look them up.
+    """
+    cache.set(snapshot_range_key(start_date, end_date, granularity), True, timeout=None)
+
+
+def compute_snapshots(user_ids, start_date, end_date, granularity=None):
+    """
+    Return {user_id: (data version, rendered report)} for a shard of user ids.
+    """
+    from finance.views.report_views import FinancialReportViewBase
+
+    if not user_ids:
+        return {}
+    # Read before querying, a write committed mid-build leaves the snapshot behind the current version
+    versions = caching.get_data_versions(user_ids)
+    report = FinancialReportViewBase()
+    total_field = DecimalField(max_digits=20, decimal_places=2)
+    first_id, last_id = min(user_ids), max(user_ids)
+    rows_by_user = defaultdict(list)
+
+    for kind, model, date_field in (('income', Income, 'date_received'), ('expense', Expense, 'due_date')):
+        queryset = report.filter_by_date(model.objects.filter(user__id__range=(first_id, last_id)), start_date, end_date, date_field)
+        rows = (
+            queryset.order_by()
+            .annotate(bucket=report.get_bucket(date_field, granularity))
+            .values('user_id', 'bucket')
+            .annotate(total=Sum('amount', output_field=total_field))
+        )
+        for row in rows.iterator():
+            rows_by_user[row['user_id']].append({'kind': kind, 'bucket': row['bucket'], 'total': row['total']})
+
+    loans = (
+        Loan.objects.filter(user__id__range=(first_id, last_id), status=Loan.LoanStatus.ACTIVE)
+        .order_by()
+        .values('user_id')
+        .annotate(total=Sum('remaining_balance', output_field=total_field))
+    )
+    for row in loans.iterator():
+        rows_by_user[row['user_id']].append({'kind': 'loan', 'bucket': None, 'total': row['total']})
+
+    return {
+        user_id: (versions[user_id], render_report(report.build_report_data(rows_by_user[user_id], start_date, end_date, granularity)))
+        for user_id in user_ids
+    }
+
+
+def get_snapshot(user, start_date, end_date, granularity=None):
+    """
+    Return the stored report for exactly this range if it is still current, or None.
+    """
+    if not (start_date and end_date):
+        return None
+    if not cache.get(snapshot_range_key(start_date, end_date, granularity)):
+        return None
+    snapshot = (
+        ReportSnapshot.objects.filter(user=user, start_date=start_date, end_date=end_date, granularity=granularity or '')
+        .values_list('data', 'data_version')
+        .first()
+    )
+    if snapshot is None:
+        return None
+    data, data_version = snapshot
+    # Without a readable version the snapshot can't be proven fresh, so fall back to the live report
+    current_version = caching.get_data_version(user.id)
+    if data_version is None or data_version != current_version:
+        return None
+    return data
@@ -0,0 +1,265 @@
+# tests/test_amortization.py
+import io
+from datetime import date, datetime
+from decimal import Decimal
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import override_settings
+from unittest import mock
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance.amortization import Amortization, calculate_emis
+from finance.models import Loan
+from accounts.models import User
+
+
+class AmortizationEngineTestCase(APITestCase):
+    def test_schedule_amortizes_to_zero(self):
+        plan = Amortization(10000, 7, 36, first_payment_date=date(2024, 1, 31))
+        schedule = plan.schedule()
+
+        self.assertEqual(len(schedule), 36)
+        self.assertEqual(schedule[0]['installment'], Decimal('308.77'))
+        self.assertEqual(schedule[0]['interest'], Decimal('58.33'))
+        self.assertEqual(schedule[-1]['balance'], Decimal('0.00'))
+        self.assertEqual(sum(row['principal'] for row in schedule), Decimal('10000.00'))
+        self.assertEqual(sum(row['interest'] for row in schedule), plan.total_interest())
+        # Month-end due dates are clamped for shorter months
+        self.assertEqual(schedule[1]['payment_date'], date(2024, 2, 29))
+
+    def test_window_matches_full_schedule(self):
+        plan = Amortization(250000, 9.5, 120, first_payment_date=date(2024, 1, 15))
+        full = plan.schedule()
+        window = plan.schedule(date(2026, 3, 16), date(2027, 1, 15))
+        self.assertEqual(window, [row for row in full if date(2026, 3, 16) <= row['payment_date'] <= date(2027, 1, 15)])
+        self.assertEqual(window[0]['payment_date'], date(2026, 4, 15))
+
+    def test_calculate_emis_over_columns(self):
+        emis = calculate_emis([10000, 2000, 1200, 500], [7, 7, 0, 5], [36, 36, 12, 0])
+        self.assertEqual(emis, [Decimal('308.77'), Decimal('61.75'), Decimal('100.00'), None])
+
+    def test_zero_interest(self):
+        schedule = Amortization(1200, 0, 12).schedule()
+        self.assertEqual({row['installment'] for row in schedule}, {Decimal('100.00')})
+        self.assertEqual({row['interest'] for row in schedule}, {Decimal('0.00')})
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class LoanScheduleViewTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(email="other.user@example.com", username='otheruser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+
+        self.loan = Loan.objects.create(user=self.user, loan_name='Car Loan', principal_amount=10000, interest_rate=7, tenure_months=36, remaining_balance=10000)
+        self.second_loan = Loan.objects.create(user=self.user, loan_name='Bike Loan', principal_amount=2000, interest_rate=5, tenure_months=12, remaining_balance=2000)
+        self.other_loan = Loan.objects.create(user=self.other_user, loan_name='House', principal_amount=90000, interest_rate=8, tenure_months=240, remaining_balance=90000)
+        created_at = timezone.make_aware(datetime(2024, 1, 10))
+        Loan.objects.filter(id__in=[self.loan.id, self.second_loan.id]).update(created_at=created_at)
+        self.loan.refresh_from_db()
+
+    def test_schedule_with_window(self):
+        url = reverse('loan-schedule', args=[self.loan.id])
+        response = self.client.get(url, {'start_date': '2024-06-01', 'end_date': '2024-08-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['monthly_installment'], '308.77')
+        self.assertEqual(response.data['total_interest'], '1115.76')
+        self.assertEqual([row['payment_date'] for row in response.data['schedule']], ['2024-06-10', '2024-07-10', '2024-08-10'])
+        self.assertEqual(response.data['schedule'][0]['period'], 5)
+
+        full = self.client.get(url)
+        self.assertEqual(len(full.data['schedule']), 36)
+        self.assertEqual(full.data['schedule'][4], response.data['schedule'][0])
+
+    def test_invalid_window_and_other_users_loan(self):
+        url = reverse('loan-schedule', args=[self.loan.id])
+        response = self.client.get(url, {'start_date': '2024-09-01', 'end_date': '2024-08-31'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('loan-schedule', args=[self.other_loan.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_schedule_is_cached_until_the_loan_changes(self):
+        url = reverse('loan-schedule', args=[self.loan.id])
+        self.client.get(url)
+        with mock.patch('finance.views.loan_views.build_schedules') as build_schedules:
+            response = self.client.get(url)
+        build_schedules.assert_called_once_with([], None, None)
+        self.assertEqual(len(response.data['schedule']), 36)
+
+        self.loan.principal_amount = 5000
+        self.loan.save()
+        response = self.client.get(url)
+        self.assertEqual(response.data['principal_amount'], '5000.00')
+        self.assertEqual(sum(Decimal(row['principal']) for row in response.data['schedule']), Decimal('5000.00'))
+
+        # Bulk edits bypass save(), they must still move the cache key
+        self.loan.tenure_months = 12
+        Loan.objects.bulk_update([self.loan], ['tenure_months'])
+        response = self.client.get(url)
+        self.assertEqual(len(response.data['schedule']), 12)
+
+    def test_many_loans_at_once(self):
+        url = reverse('loan-schedule-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({item['loan'] for item in response.data['results']}, {self.loan.id, self.second_loan.id})
+
+        response = self.client.get(url, {'ids': f'{self.second_loan.id},{self.other_loan.id}', 'end_date': '2024-03-31'})
+        payload, = response.data['results']
+        self.assertEqual(payload['loan'], self.second_loan.id)
+        self.assertEqual(len(payload['schedule']), 2)
+
+
+class LoanInstallmentBulkTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+
+    def make_loans(self, count):
+        return [
+            Loan(user=self.user, loan_name=f'Loan {index}', principal_amount=1000 * (index + 1), interest_rate=7, tenure_months=36, remaining_balance=1000)
+            for index in range(count)
+        ]
+
+    def test_bulk_create_and_update_set_installments(self):
+        Loan.objects.bulk_create(self.make_loans(3))
+        loans = list(Loan.objects.filter(user=self.user).order_by('principal_amount'))
+        self.assertEqual([loan.monthly_installment for loan in loans], [Decimal('30.88'), Decimal('61.75'), Decimal('92.63')])
+
+        for loan in loans:
+            loan.tenure_months = 12
+        before = Loan.objects.get(id=loans[0].id).updated_at
+        Loan.objects.bulk_update(loans, ['tenure_months'])
+        updated = Loan.objects.get(id=loans[0].id)
+        self.assertEqual(updated.monthly_installment, Decimal('86.53'))
+        self.assertGreater(updated.updated_at, before)
+
+    def test_backfill_command_fixes_missing_and_stale_installments(self):
+        Loan.objects.bulk_create(self.make_loans(7))
+        ids = list(Loan.objects.order_by('id').values_list('id', flat=True))
+        Loan.objects.filter(id__in=ids[:3]).update(monthly_installment=None)
+        Loan.objects.filter(id=ids[3]).update(monthly_installment=1)
+
+        out = io.StringIO()
+        call_command('backfill_loan_installments', '--batch-size', '2', '--dry-run', stdout=out)
+        self.assertIn("Would update 4 of 7 loans", out.getvalue())
+        self.assertEqual(Loan.objects.filter(monthly_installment__isnull=True).count(), 3)
+
+        call_command('backfill_loan_installments', '--batch-size', '2', stdout=io.StringIO())
+        for loan in Loan.objects.all():
+            self.assertEqual(loan.monthly_installment, loan.calculate_monthly_installment())
+
+
+class LoanSimulationViewTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+        self.loan = Loan.objects.create(user=self.user, loan_name='Car Loan', principal_amount=10000, interest_rate=7, tenure_months=36, remaining_balance=10000)
+        self.url = reverse('loan-simulate', args=[self.loan.id])
+
+    def test_scenarios_report_interest_saved_and_payoff_month(self):
+        scenarios = [
+            {"label": "unchanged"},
+            {"label": "prepay", "prepayments": [{"month": 6, "amount": "1500"}, {"month": 6, "amount": "500"}]},
+            {"label": "raise emi", "emi_change": "100"},
+            {"label": "lower emi", "emi_change": "-100"},
+            {"label": "too slow", "emi_change": "-240"},
+        ]
+        response = self.client.post(self.url, {"scenarios": scenarios}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['baseline']['total_interest'], '1115.76')
+
+        results = {result['label']: result for result in response.data['scenarios']}
+        self.assertEqual(results['unchanged']['payoff_month'], 36)
+        self.assertEqual(results['unchanged']['interest_saved'], '0.00')
+        self.assertEqual(results['prepay']['payoff_month'], 29)
+        self.assertEqual(results['prepay']['total_prepaid'], '2000.00')
+        self.assertEqual(results['prepay']['interest_saved'], '335.85')
+        self.assertEqual(results['raise emi']['payoff_month'], 27)
+        self.assertGreater(Decimal(results['raise emi']['interest_saved']), 0)
+        self.assertGreater(results['lower emi']['payoff_month'], 36)
+        self.assertLess(Decimal(results['lower emi']['interest_saved']), 0)
+        self.assertTrue(results['lower emi']['paid_off'])
+        self.assertEqual(results['lower emi']['balance_left'], '0.00')
+
+        # Still owing money after the simulated months: reported as such, not as a payoff
+        self.assertEqual(response.data['simulated_months'], 144)
+        self.assertFalse(results['too slow']['paid_off'])
+        self.assertIsNone(results['too slow']['payoff_month'])
+        self.assertIsNone(results['too slow']['interest_saved'])
+        self.assertGreater(Decimal(results['too slow']['balance_left']), 0)
+
+    def test_emi_below_the_interest_is_rejected(self):
+        scenarios = [{"label": "fine"}, {"label": "too low", "emi_change": "-300", "emi_change_from": 4}]
+        response = self.client.post(self.url, {"scenarios": scenarios}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([(result['index'], result['label']) for result in response.data['scenarios']], [(0, 'fine')])
+        error, = response.data['errors']
+        self.assertEqual(error['index'], 1)
+        self.assertIn('does not cover the interest', error['errors']['emi_change'][0])
+
+        response = self.client.post(self.url, {"scenarios": scenarios[1:]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['scenarios'], [])
+
+    def test_invalid_scenarios(self):
+        response = self.client.post(self.url, {"scenarios": []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {"scenarios": [{"prepayments": [{"month": 0, "amount": "10"}]}]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class LoanPayoffPlanViewTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+        self.card = Loan.objects.create(user=self.user, loan_name='Card', principal_amount=5000, interest_rate=20, tenure_months=24, remaining_balance=5000)
+        self.car = Loan.objects.create(user=self.user, loan_name='Car', principal_amount=2000, interest_rate=5, tenure_months=24, remaining_balance=2000)
+        Loan.objects.create(user=self.user, loan_name='Old', principal_amount=1000, interest_rate=9, tenure_months=12, remaining_balance=0, status=Loan.LoanStatus.PAID)
+        self.url = reverse('loan-payoff-plan')
+
+    def test_strategies(self):
+        response = self.client.get(self.url, {'budget': '600'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        plans = {plan['strategy']: plan for plan in response.data['strategies']}
+        self.assertEqual(set(plans), {'avalanche', 'snowball'})
+
+        # Avalanche targets the 20% loan first, snowball the smaller balance
+        self.assertEqual([item['loan'] for item in plans['avalanche']['loans']], [self.card.id, self.car.id])
+        self.assertEqual([item['loan'] for item in plans['snowball']['loans']], [self.car.id, self.card.id])
+        self.assertLess(Decimal(plans['avalanche']['total_interest']), Decimal(plans['snowball']['total_interest']))
+        self.assertGreater(Decimal(plans['avalanche']['interest_saved']), 0)
+        self.assertLess(plans['avalanche']['months'], 24)
+        self.assertEqual(response.data['minimum_payments_only']['months'], 24)
+        self.assertEqual(response.data['budget'], '600.00')
+        self.assertIsInstance(plans['avalanche']['loans'][0]['interest'], str)
+
+        response = self.client.get(self.url, {'budget': '600', 'strategy': 'custom', 'order': f'{self.car.id}'})
+        custom, = response.data['strategies']
+        self.assertEqual([item['loan'] for item in custom['loans']], [self.car.id, self.card.id])
+
+    def test_budget_must_cover_minimum_payments(self):
+        response = self.client.get(self.url, {'budget': '100'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'budget': '600', 'strategy': 'custom'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_plan_is_cached_until_a_loan_changes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.client.get(self.url, {'budget': '600'})
+        with self.assertNumQueries(2):  # Session and user only
+            self.client.get(self.url, {'budget': '600'})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.car.remaining_balance = 500
+            self.car.save()
+        second = self.client.get(self.url, {'budget': '600'})
+        self.assertLess(Decimal(second.data['strategies'][0]['total_interest']), Decimal(first.data['strategies'][0]['total_interest']))
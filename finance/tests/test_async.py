@@ -0,0 +1,72 @@
+# tests/test_async.py
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+from finance.models import Income, Expense, Loan
+from accounts.models import User
+
+
+# Transaction test case: the async report reads on worker threads with their own
+# connections, which cannot see the rows of an open test transaction
+class AsyncViewsTestCase(APITransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="async.user@example.com", username='asyncuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        for month in range(1, 8):
+            Income.objects.create(
+                user=self.user, source_name=f'Job {month}', amount=100 * month,
+                date_received=f'2024-{month:02d}-15', status=Income.IncomeStatus.RECEIVED,
+            )
+        Expense.objects.create(
+            user=self.user, category='Food', amount=80, due_date='2024-03-01', status=Expense.ExpenseStatus.PAID
+        )
+        Loan.objects.create(
+            user=self.user, loan_name='Car Loan', principal_amount=5000, interest_rate=5.0,
+            tenure_months=24, remaining_balance=3000, status=Loan.LoanStatus.ACTIVE,
+        )
+
+    def test_async_report_matches_sync_report(self):
+        for params in (
+            {'start_date': '2024-01-01', 'end_date': '2024-12-31'},
+            {'start_date': '2024-02-10', 'end_date': '2024-06-20', 'granularity': 'month'},
+            {'start_date': '2024-01-01', 'end_date': '2024-03-31', 'granularity': 'day'},
+        ):
+            sync_response = self.client.get(reverse('financial-report'), params)
+            async_response = self.client.get(reverse('financial-report-async'), params)
+            self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+            self.assertEqual(async_response.json(), sync_response.json())
+
+    def test_async_report_validates_parameters(self):
+        response = self.client.get(reverse('financial-report-async'), {'granularity': 'fortnight'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_async_report_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('financial-report-async'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_async_list_pages(self):
+        url = reverse('income-list-async')
+        first = self.client.get(url, {'ordering': 'amount'})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data['count'], 7)
+        self.assertEqual([row['amount'] for row in first.data['results']], ['100.00', '200.00', '300.00', '400.00', '500.00'])
+        self.assertIsNone(first.data['previous'])
+
+        second = self.client.get(first.data['next'])
+        self.assertEqual([row['amount'] for row in second.data['results']], ['600.00', '700.00'])
+        self.assertIsNone(second.data['next'])
+        self.assertEqual(second.data['previous'], first.data['next'].replace('&page=2', '').replace('page=2&', ''))
+
+        self.assertEqual(self.client.get(url, {'page': 3}).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_async_list_applies_filters_and_scopes_to_user(self):
+        other = User.objects.create_user(email="other@example.com", username='other', password='testpass')
+        Expense.objects.create(user=other, category='Food', amount=10, due_date='2024-03-01')
+        response = self.client.get(reverse('expense-list-async'), {'category': 'Food'})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(self.client.get(reverse('loan-list-async')).data['count'], 1)
+
+    def test_async_list_is_read_only(self):
+        response = self.client.post(reverse('income-list-async'), {})
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
@@ -0,0 +1,71 @@
+# tests/test_batch.py
+from datetime import date, timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance.models import Income, Expense, IncomeMonthlyRollup
+from accounts.models import User
+
+
+class BatchViewsTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(email="other.user@example.com", username='otheruser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+        self.url = reverse('income-batch')
+
+    def assertRollupsInSync(self):
+        call_command('rebuild_rollups', '--verify', stdout=StringIO())
+
+    def test_batch_create_reports_per_item_errors(self):
+        data = [
+            {'source_name': 'Job', 'amount': 1000, 'date_received': '2024-01-01', 'status': 'received'},
+            {'source_name': 'Broken', 'amount': -5, 'date_received': '2024-01-02'},
+            {'source_name': 'Gift', 'amount': 200, 'date_received': '2024-02-01'},
+        ]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual([item['index'] for item in response.data['created']], [0, 2])
+        self.assertEqual(response.data['errors'][0]['index'], 1)
+        self.assertIn('amount', response.data['errors'][0]['errors'])
+        self.assertEqual(Income.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(IncomeMonthlyRollup.objects.get(user=self.user, month=date(2024, 1, 1)).total_amount, 1000)
+        self.assertRollupsInSync()
+
+        due_date = (date.today() + timedelta(days=5)).isoformat()
+        response = self.client.post(reverse('expense-batch'), [{'category': 'Food', 'amount': 10, 'due_date': due_date}] * 3, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 3)
+
+    def test_batch_update_and_delete(self):
+        income1 = Income.objects.create(user=self.user, source_name='Job', amount=1000, date_received='2024-01-01')
+        income2 = Income.objects.create(user=self.user, source_name='Gift', amount=200, date_received='2024-01-15')
+        foreign = Income.objects.create(user=self.other_user, source_name='Job', amount=50, date_received='2024-01-01')
+
+        data = [
+            {'id': income1.id, 'amount': 1500, 'date_received': '2024-03-01'},
+            {'id': foreign.id, 'amount': 1},
+            {'id': income2.id, 'status': 'received'},
+        ]
+        response = self.client.patch(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['errors'], [{'index': 1, 'errors': {'id': ['Not found.']}}])
+        income1.refresh_from_db()
+        self.assertEqual((income1.amount, str(income1.date_received)), (1500, '2024-03-01'))
+        foreign.refresh_from_db()
+        self.assertEqual(foreign.amount, 50)
+        self.assertRollupsInSync()
+
+        response = self.client.delete(self.url, {'ids': [income1.id, income2.id, foreign.id]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['deleted'], sorted([income1.id, income2.id]))
+        self.assertTrue(Income.objects.filter(id=foreign.id).exists())
+        self.assertFalse(Income.objects.filter(user=self.user).exists())
+        self.assertRollupsInSync()
+
+    def test_batch_rejects_non_list_payload(self):
+        response = self.client.post(self.url, {'source_name': 'Job'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
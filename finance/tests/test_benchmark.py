@@ -0,0 +1,77 @@
+# tests/test_benchmark.py
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from finance.management.commands.benchmark import ENDPOINTS, SKIPPED, benchmarked_url_names
+from finance import metrics
+from finance.models import Income, Expense, Loan
+
+
+class BenchmarkEndpointsTestCase(SimpleTestCase):
+    def test_every_url_is_benchmarked_or_skipped(self):
+        covered = {endpoint.name for endpoint in ENDPOINTS} | set(SKIPPED)
+        self.assertEqual(benchmarked_url_names() - covered, set())
+
+
+# Transaction test case: the benchmark's client threads use their own connections
+class BenchmarkCommandTestCase(TransactionTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.output = os.path.join(self.directory, 'results.json')
+
+    def run_benchmark(self, only=('financial-report', 'loan-detail'), **options):
+        call_command(
+            'benchmark', reuse_db=True, users=2, incomes=20, expenses=20, loans=2, requests=4, concurrency=2,
+            only=list(only), output=self.output, stdout=StringIO(), **options
+        )
+        with open(self.output) as results_file:
+            return json.load(results_file)
+
+    def test_seeds_dataset_and_reports_latencies(self):
+        results = self.run_benchmark()
+        self.assertEqual((Income.objects.count(), Expense.objects.count(), Loan.objects.count()), (40, 40, 4))
+        self.assertEqual(
+            set(results['endpoints']),
+            {'GET loan-detail', 'GET financial-report', 'GET financial-report-cached', 'GET financial-report-async'},
+        )
+        for result in results['endpoints'].values():
+            self.assertEqual(result['requests'], 4)
+            self.assertEqual(result['errors'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p95_ms'])
+            self.assertLessEqual(result['p95_ms'], result['p99_ms'])
+            self.assertGreater(result['throughput_rps'], 0)
+            self.assertGreaterEqual(result['queries_per_request'], 1)
+        self.assertEqual(results['config']['users'], 2)
+
+    def test_leaves_request_log_and_metrics_alone(self):
+        log_file = os.path.join(self.directory, 'logs', 'api_requests.log')
+        metrics_dir = os.path.join(self.directory, 'logs', 'metrics')
+        with override_settings(FINANCE_LOG_FILE=log_file, FINANCE_METRICS_DIR=metrics_dir):
+            self.run_benchmark(only=['metrics', 'loan-detail'])
+            self.assertEqual(metrics.collect(), {})
+        self.assertFalse(os.path.exists(os.path.join(self.directory, 'logs')))
+
+    def test_flags_regressions_against_baseline(self):
+        baseline_path = os.path.join(self.directory, 'baseline.json')
+        baseline = {'endpoints': {
+            'GET loan-detail': {'p95_ms': 0.001, 'queries_per_request': 100},
+            'GET financial-report': {'p95_ms': 100000, 'queries_per_request': 0},
+        }}
+        with open(baseline_path, 'w') as baseline_file:
+            json.dump(baseline, baseline_file)
+
+        results = self.run_benchmark(baseline=baseline_path)
+        self.assertTrue(results['comparison']['GET loan-detail']['regression'])  # slower
+        self.assertTrue(results['comparison']['GET financial-report']['regression'])  # more queries
+        self.assertNotIn('GET financial-report-async', results['comparison'])
+
+        with self.assertRaises(CommandError):
+            self.run_benchmark(baseline=baseline_path, fail_on_regression=True)
+        # Results are still written before failing
+        self.assertTrue(os.path.exists(self.output))
@@ -0,0 +1,112 @@
+# tests/test_caching.py
+from unittest import mock
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance.models import Income, Loan
+from finance import caching
+from finance.serializers import IncomeSerializer
+from accounts.models import User
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class VersionedCacheTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+        self.income = Income.objects.create(user=self.user, source_name='Job', amount=1000, date_received='2024-01-01', status=Income.IncomeStatus.RECEIVED)
+
+    def test_write_bumps_data_version(self):
+        version = caching.get_data_version(self.user.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            Loan.objects.create(user=self.user, loan_name='Car', principal_amount=5000, interest_rate=5, tenure_months=12, remaining_balance=5000)
+        self.assertEqual(caching.get_data_version(self.user.id), version + 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.income.delete()
+        self.assertEqual(caching.get_data_version(self.user.id), version + 2)
+
+    def test_cached_report_is_invalidated_by_writes(self):
+        url = reverse('financial-report-cached')
+        response = self.client.get(url)
+        self.assertEqual(response.data['summary']['total_income'], 1000)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('income-list-create'), {'source_name': 'Gift', 'amount': 200, 'date_received': '2024-02-01'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['summary']['total_income'], 1200)
+
+    def test_cached_list_is_invalidated_by_writes(self):
+        url = reverse('income-list-cached')
+        self.assertEqual(self.client.get(url).json()['count'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse('income-detail', args=[self.income.id]))
+        self.assertEqual(self.client.get(url).json()['count'], 0)
+
+    def test_cached_list_serves_rendered_pages(self):
+        for day in range(2, 10):
+            Income.objects.create(user=self.user, source_name='Gift', amount=10 * day, date_received=f'2024-01-{day:02d}')
+        url = reverse('income-list-cached')
+        first = self.client.get(url, {'page': 2, 'filter_source_name': 'Gift'})
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.json()['count'], 8)
+        self.assertEqual(len(first.json()['results']), 3)
+
+        # A hit is the stored bytes: no finance query and no serializer
+        with self.assertNumQueries(2), mock.patch.object(IncomeSerializer, 'to_representation') as to_representation:  # Session and user only
+            second = self.client.get(url, {'filter_source_name': 'Gift', 'page': 2})
+        to_representation.assert_not_called()
+        self.assertEqual(second.content, first.content)
+
+        # Every page and filter signature is cached on its own
+        self.assertEqual(len(self.client.get(url, {'page': 1, 'filter_source_name': 'Gift'}).json()['results']), 5)
+        self.assertEqual(self.client.get(url, {'filter_source_name': 'Job'}).json()['count'], 1)
+
+        # Errors are not cached
+        self.assertEqual(self.client.get(url, {'page': 9}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(url, {'filter_user__email': 'x'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.post(url, {}).status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+        self.income = Income.objects.create(user=self.user, source_name='Job', amount=1000, date_received='2024-01-01', status=Income.IncomeStatus.RECEIVED)
+
+    def test_unchanged_data_returns_304_without_running_the_view(self):
+        for url in (reverse('income-list-create'), reverse('income-detail', args=[self.income.id]), reverse('financial-report')):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            etag = response['ETag']
+
+            with self.assertNumQueries(2):  # Session and user only
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(response['ETag'], etag)
+            self.assertEqual(response.content, b'')
+
+    def test_etag_changes_with_the_data_and_the_query(self):
+        url = reverse('income-list-create')
+        etag = self.client.get(url)['ETag']
+        self.assertNotEqual(self.client.get(url, {'page': 1})['ETag'], etag)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Income.objects.create(user=self.user, source_name='Gift', amount=200, date_received='2024-02-01')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_no_etag_without_a_data_version(self):
+        with mock.patch('finance.caching.get_data_version', return_value=None):
+            response = self.client.get(reverse('income-list-create'), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('ETag'))
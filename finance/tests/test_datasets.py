@@ -0,0 +1,84 @@
+# tests/test_datasets.py
+import random
+from datetime import date
+from io import StringIO
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from rest_framework.test import APITestCase
+from finance.models import Income, Expense, Loan
+from finance import datasets, rollups, search
+from accounts.models import User
+
+
+def user_rows(model, prefix, *fields):
+    # Rows keyed by the user's index in the dataset rather than by database ids
+    return sorted(
+        (int(row[0][len(prefix):]), *row[1:])
+        for row in model.objects.filter(user__username__startswith=prefix).values_list('user__username', *fields)
+    )
+
+
+class SeedDatasetTestCase(APITestCase):
+    def seed(self, *args):
+        out = StringIO()
+        call_command('seed_dataset', '--end-date', '2025-06-30', *args, stdout=out)
+        return out.getvalue()
+
+    def test_creates_users_rows_and_rollups(self):
+        output = self.seed('--users', '6', '--seed', '3', '--incomes', '4', '--expenses', '10', '--loans', '2', '--batch-size', '7')
+
+        users = User.objects.filter(username__startswith='seed3-')
+        self.assertEqual(users.count(), 6)
+        self.assertTrue(users.first().check_password('password123'))
+        counts = (Income.objects.count(), Expense.objects.count(), Loan.objects.count())
+        self.assertIn(f"with {counts[0]} incomes, {counts[1]} expenses and {counts[2]} loans", output)
+        self.assertFalse(Loan.objects.filter(monthly_installment__isnull=True).exists())
+        self.assertFalse(Income.objects.filter(date_received__gt=date(2025, 6, 30)).exists())
+
+        # Rollups match the rows exactly (summed in Python, SQLite's SUM() is floating point)
+        for model in rollups.ROLLUP_SPECS:
+            expected = rollups.collect_deltas(model, model.objects.values(*rollups.tracked_fields(model)))
+            self.assertEqual(rollups.stored_rollups(model), {key: tuple(value) for key, value in expected.items()})
+
+    def test_same_seed_gives_same_rows_whatever_the_sharding(self):
+        self.seed('--users', '5', '--seed', '8', '--username-prefix', 'a', '--shard-size', '1')
+        self.seed('--users', '5', '--seed', '8', '--username-prefix', 'b', '--shard-size', '5', '--batch-size', '3')
+        self.seed('--users', '5', '--seed', '9', '--username-prefix', 'c')
+
+        fields = {
+            Income: ('source_name', 'amount', 'date_received', 'status', 'notes'),
+            Expense: ('category', 'amount', 'due_date', 'status', 'notes'),
+            Loan: ('loan_name', 'principal_amount', 'interest_rate', 'tenure_months', 'remaining_balance', 'status'),
+        }
+        for model, model_fields in fields.items():
+            self.assertEqual(user_rows(model, 'a', *model_fields), user_rows(model, 'b', *model_fields))
+        self.assertNotEqual(user_rows(Expense, 'a', 'amount'), user_rows(Expense, 'c', 'amount'))
+
+    def test_rows_per_user_follow_skew(self):
+        self.seed('--users', '4', '--skew', '0', '--incomes', '3', '--expenses', '5', '--loans', '0')
+        for user in User.objects.filter(username__startswith='seed0-'):
+            self.assertEqual((user.incomes.count(), user.expenses.count(), user.loans.count()), (3, 5, 0))
+
+        rng = random.Random(1)
+        counts = sorted((datasets.row_count(rng, 100, 1.5) for _ in range(10000)), reverse=True)
+        # A power law: the top 10% of users own far more than 10% of the rows
+        self.assertGreater(sum(counts[:1000]) / sum(counts), 0.35)
+        self.assertLessEqual(counts[0], 100 * datasets.MAX_ROWS_FACTOR)
+        light_tail = [datasets.row_count(rng, 100, 3) for _ in range(10000)]
+        self.assertAlmostEqual(sum(light_tail) / len(light_tail), 100, delta=5)
+
+    def test_refuses_taken_usernames(self):
+        User.objects.create_user(email="seed1-1@example.com", username='seed1-1', password='testpass')
+        with self.assertRaises(CommandError):
+            self.seed('--users', '3', '--seed', '1')
+        self.assertFalse(User.objects.filter(username='seed1-0').exists())
+
+    def test_deferred_search_index_is_rebuilt(self):
+        backend = search.get_backend()
+        self.seed('--users', '3', '--defer-search-index')
+        queryset = Expense.objects.all()
+        self.assertEqual(
+            backend.search(queryset, ['groceries']).count(),
+            queryset.filter(category__icontains='groceries').count(),
+        )
+        self.assertTrue(queryset.filter(category__icontains='groceries').exists())
@@ -0,0 +1,51 @@
+# tests/test_export.py
+import csv
+import io
+import json
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance.models import Income, Loan
+from accounts.models import User
+
+
+class ExportViewsTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(email="other.user@example.com", username='otheruser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+
+        for day in range(1, 13):
+            Income.objects.create(user=self.user, source_name='Job', amount=100 * day, date_received=f'2024-01-{day:02d}', status=Income.IncomeStatus.RECEIVED)
+        Income.objects.create(user=self.other_user, source_name='Job', amount=999, date_received='2024-01-05')
+        Loan.objects.create(user=self.user, loan_name='Car Loan', principal_amount=5000, interest_rate=5, tenure_months=24, remaining_balance=3000)
+
+    def read(self, response):
+        return b''.join(response.streaming_content).decode()
+
+    def test_income_csv_export_is_streamed_and_filtered(self):
+        url = reverse('income-export', args=['csv'])
+        response = self.client.get(url, {'date_received_gt': '2024-01-10'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        rows = list(csv.DictReader(io.StringIO(self.read(response))))
+        self.assertEqual([row['amount'] for row in rows], ['1100.00', '1200.00'])
+        self.assertEqual(rows[0]['date_received'], '2024-01-11')
+
+    def test_ndjson_export_covers_full_history(self):
+        response = self.client.get(reverse('income-export', args=['ndjson']))
+        lines = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(lines), 12)
+        self.assertEqual({line['user'] for line in lines}, {self.user.id})
+
+        response = self.client.get(reverse('loan-export', args=['ndjson']), {'status': 'active'})
+        loan = json.loads(self.read(response))
+        self.assertEqual(loan['loan_name'], 'Car Loan')
+        self.assertEqual(loan['remaining_balance'], '3000.00')
+
+    def test_unknown_export_format(self):
+        response = self.client.get(reverse('expense-export', args=['xlsx']))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
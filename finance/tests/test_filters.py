@@ -0,0 +1,61 @@
+# tests/test_filters.py
+from unittest import mock
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance.filters import CustomDynamicFilterBackend
+from finance.models import Income
+from accounts.models import User
+
+
+class CustomDynamicFilterBackendTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+        self.url = reverse('income-list-create')
+
+        self.january = Income.objects.create(user=self.user, source_name='Job', amount=100, date_received='2024-01-15', status=Income.IncomeStatus.RECEIVED, notes='paid')
+        self.february = Income.objects.create(user=self.user, source_name='Gift', amount=200, date_received='2024-02-15')
+        self.march = Income.objects.create(user=self.user, source_name='Rent', amount=300, date_received='2024-03-15', status=Income.IncomeStatus.RECEIVED)
+
+    def ids(self, params):
+        response = self.client.get(self.url, {**params, 'sort_by': 'date_received'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [row['id'] for row in response.data['results']]
+
+    def test_whitelisted_lookups(self):
+        self.assertEqual(self.ids({'filter_status': 'pending'}), [self.february.id])
+        self.assertEqual(self.ids({'filter_source_name__in': 'Job,Rent'}), [self.january.id, self.march.id])
+        self.assertEqual(self.ids({'filter_date_received__range': '2024-02-01,2024-03-31'}), [self.february.id, self.march.id])
+        self.assertEqual(self.ids({'filter_amount__gte': '200', 'filter_notes__isnull': 'true'}), [self.february.id, self.march.id])
+
+    def test_sorting(self):
+        response = self.client.get(self.url, {'sort_by': 'amount', 'order': 'desc'})
+        self.assertEqual([row['id'] for row in response.data['results']], [self.march.id, self.february.id, self.january.id])
+
+    def test_rejected_parameters(self):
+        for params in (
+            {'filter_user__email__icontains': 'test'},  # Not whitelisted (cross-table join)
+            {'filter_amount__icontains': '1'},  # Lookup not allowed on the field
+            {'filter_amount__gt': 'abc'},  # Invalid value
+            {'filter_date_received__range': '2024-01-01'},  # A range needs two bounds
+            {'filter_notes__isnull': 'maybe'},
+            {'sort_by': 'notes'},
+        ):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    @override_settings(FINANCE_STRICT_DYNAMIC_FILTERS=True)
+    def test_strict_mode_only_accepts_indexed_fields(self):
+        self.assertEqual(self.ids({'filter_status': 'received'}), [self.january.id, self.march.id])
+        self.assertEqual(self.client.get(self.url, {'filter_amount__gt': '100'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'sort_by': 'amount'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_filter_specs_are_compiled_once(self):
+        CustomDynamicFilterBackend._compiled_specs.clear()
+        with mock.patch.object(CustomDynamicFilterBackend, 'compile_filter', wraps=CustomDynamicFilterBackend().compile_filter) as compile_filter:
+            self.ids({'filter_status__in': 'pending'})
+            self.ids({'filter_status__in': 'received'})
+        self.assertEqual(compile_filter.call_count, 1)
@@ -0,0 +1,83 @@
+# tests/test_forecast.py
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance.models import Income, Expense, Loan
+from accounts.models import User
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CashFlowForecastTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+        self.url = reverse('cash-flow-forecast')
+
+        today = date.today()
+        Income.objects.create(user=self.user, source_name='Job', amount=500, date_received=today + timedelta(days=5))
+        Income.objects.create(user=self.user, source_name='Job', amount=999, date_received=today + timedelta(days=5), status=Income.IncomeStatus.RECEIVED)
+        Expense.objects.create(user=self.user, category='Rent', amount=200, due_date=today + timedelta(days=10), status=Expense.ExpenseStatus.PENDING)
+        Expense.objects.create(user=self.user, category='Bill', amount=50, due_date=today - timedelta(days=20), status=Expense.ExpenseStatus.PENDING)  # Overdue
+        self.loan = Loan.objects.create(user=self.user, loan_name='Car Loan', principal_amount=10000, interest_rate=7, tenure_months=36, remaining_balance=10000)
+
+    def test_monthly_forecast(self):
+        response = self.client.get(self.url, {'horizon_months': 3, 'opening_balance': '1000'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timeline = response.data['timeline']
+        self.assertEqual(len(timeline), 3)
+        self.assertEqual(timeline[0]['period'], date.today().replace(day=1))
+
+        totals = response.data['totals']
+        self.assertEqual(totals['income'], Decimal('500'))
+        self.assertEqual(totals['expenses'], Decimal('250'))
+        # First installment is due one month after the loan was created
+        self.assertEqual(totals['loan_installments'], 2 * self.loan.monthly_installment)
+        self.assertEqual(response.data['closing_balance'], Decimal('1250') - 2 * self.loan.monthly_installment)
+        self.assertEqual(timeline[-1]['balance'], response.data['closing_balance'])
+
+    def test_installments_follow_the_remaining_balance(self):
+        # Mostly prepaid: one full installment, then the rest of the balance with its interest
+        Loan.objects.filter(id=self.loan.id).update(remaining_balance=400)
+        response = self.client.get(self.url, {'horizon_months': 6})
+        rate = Decimal('0.07') / 12
+        first_interest = (400 * rate).quantize(Decimal('0.01'))
+        second_interest = ((400 + first_interest - self.loan.monthly_installment) * rate).quantize(Decimal('0.01'))
+        self.assertEqual(response.data['totals']['loan_installments'], 400 + first_interest + second_interest)
+        self.assertEqual(sum(1 for row in response.data['timeline'] if row['loan_installments']), 2)
+
+    def test_loans_behind_schedule_keep_paying_past_their_tenure(self):
+        # The original 36 months are over, yet money is still owed
+        created_at = self.loan.created_at.replace(year=self.loan.created_at.year - 4)
+        Loan.objects.filter(id=self.loan.id).update(created_at=created_at, remaining_balance=1000)
+        response = self.client.get(self.url, {'horizon_months': 3})
+        self.assertEqual(response.data['totals']['loan_installments'], 3 * self.loan.monthly_installment)
+
+    def test_daily_forecast_projects_overdue_items_onto_today(self):
+        response = self.client.get(self.url, {'horizon_months': 1, 'granularity': 'day'})
+        timeline = response.data['timeline']
+        self.assertEqual(timeline[0]['period'], date.today())
+        self.assertEqual(timeline[0]['expenses'], Decimal('50'))
+        self.assertEqual(timeline[1]['period'], date.today() + timedelta(days=1))
+        self.assertEqual(sum(row['net'] for row in timeline), response.data['closing_balance'])
+
+    def test_invalid_parameters(self):
+        response = self.client.get(self.url, {'horizon_months': 61})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {'granularity': 'year'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_forecast_is_cached_per_data_version(self):
+        self.client.get(self.url)
+        with mock.patch('finance.views.forecast_views.build_forecast') as build_forecast:
+            self.client.get(self.url)
+        build_forecast.assert_not_called()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Income.objects.create(user=self.user, source_name='Bonus', amount=300, date_received=date.today() + timedelta(days=3))
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['totals']['income'], Decimal('800'))
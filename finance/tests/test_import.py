@@ -0,0 +1,218 @@
+# tests/test_import.py
+import io
+import json
+import os
+import tempfile
+from datetime import date
+from unittest import mock
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import OperationalError
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance.models import Income, Expense, ExpenseMonthlyRollup
+from finance.views.import_views import ImportViewBase
+from finance import importers, rollups
+from accounts.models import User
+
+BANK_CSV = (
+    "Date,Payee,Debit,Memo\n"
+    "15/01/2024,Groceries,-42.50,weekly shop\n"
+    "20/01/2024,Groceries,-7.50,\n"
+    "31/02/2024,Rent,-900.00,bad date\n"
+    "\n"
+    "03/02/2024,Rent,-900.00,february\n"
+    "05/02/2024,Card refund,+12.00,credit\n"
+)
+
+OFX_SGML = """OFXHEADER:100
+DATA:OFXSGML
+VERSION:102
+
+<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240105120000[-5:EST]
+<TRNAMT>2500.00
+<FITID>1
+<NAME>ACME Payroll
+<MEMO>January salary
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240107
+<TRNAMT>-61.20
+<FITID>2
+<NAME>Corner &amp; Co
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240120
+<TRNAMT>+150.00
+<FITID>3
+<NAME>Refund
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>
+"""
+
+
+class ImportViewsTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+
+    def upload(self, name, file_format, content, **data):
+        url = reverse(name, args=[file_format])
+        upload = SimpleUploadedFile(f"statement.{file_format}", content.encode())
+        return self.client.post(url, {'file': upload, **data}, format='multipart')
+
+    def read(self, response):
+        return [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+
+    def test_csv_import_with_mapping_reports_progress_and_errors(self):
+        with mock.patch.object(ImportViewBase, 'chunk_size', 2):
+            response = self.upload(
+                'expense-import', 'csv', BANK_CSV, date_format='%d/%m/%Y', signed_amounts='true',
+                mapping=json.dumps({'category': 'Payee', 'amount': 'Debit', 'due_date': 'Date', 'notes': 'Memo'}),
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+            lines = self.read(response)
+
+        self.assertEqual([line['processed'] for line in lines], [2, 4, 4])
+        summary = lines[-1]
+        self.assertTrue(summary['done'])
+        self.assertEqual((summary['created'], summary['failed']), (3, 1))
+        self.assertEqual(summary['errors'][0]['position'], 4)  # CSV line of 31/02/2024
+        self.assertIn('due_date', summary['errors'][0]['errors'])
+
+        # Past due dates are fine for imported history, statuses default to paid
+        expenses = Expense.objects.filter(user=self.user).order_by('due_date')
+        self.assertEqual([str(expense.amount) for expense in expenses], ['42.50', '7.50', '900.00'])
+        self.assertEqual(expenses[0].due_date, date(2024, 1, 15))
+        self.assertEqual({expense.status for expense in expenses}, {Expense.ExpenseStatus.PAID})
+        january = ExpenseMonthlyRollup.objects.get(user=self.user, month=date(2024, 1, 1), category='Groceries')
+        self.assertEqual((january.total_amount, january.entry_count), (50, 2))
+
+    def test_csv_amount_signs(self):
+        mapping = {'amount': 'Debit', 'date_received': 'Date', 'notes': 'Memo'}
+        # Signed: only the credit of the statement is an income
+        summary = self.read(self.upload(
+            'income-import', 'csv', BANK_CSV, date_format='%d/%m/%Y', signed_amounts='true',
+            mapping=json.dumps({**mapping, 'source_name': 'Payee'}),
+        ))[-1]
+        self.assertEqual((summary['processed'], summary['created'], summary['failed']), (1, 1, 0))
+        self.assertEqual(Income.objects.get(user=self.user).source_name, 'Card refund')
+
+        # Unsigned (the export's convention): negative amounts are reported, not imported as their absolute value
+        summary = self.read(self.upload(
+            'expense-import', 'csv', BANK_CSV, date_format='%d/%m/%Y',
+            mapping=json.dumps({'category': 'Payee', 'amount': 'Debit', 'due_date': 'Date'}),
+        ))[-1]
+        self.assertEqual((summary['created'], summary['failed']), (1, 4))
+        self.assertIn('amount', summary['errors'][0]['errors'])
+        self.assertEqual(Expense.objects.get(user=self.user).category, 'Card refund')
+
+    def test_failure_mid_stream_reports_committed_chunks(self):
+        mapping = json.dumps({'category': 'Payee', 'amount': 'Debit', 'due_date': 'Date'})
+        insert_rows = importers.insert_rows
+
+        def fail_second_chunk(model, rows):
+            if insert.call_count > 1:
+                raise OperationalError("database is locked")
+            insert_rows(model, rows)
+
+        with mock.patch.object(ImportViewBase, 'chunk_size', 2), \
+                mock.patch('finance.importers.insert_rows', side_effect=fail_second_chunk) as insert, \
+                self.assertLogs('api_logger', level='ERROR') as logs:
+            response = self.upload('expense-import', 'csv', BANK_CSV, date_format='%d/%m/%Y', mapping=mapping, signed_amounts='true')
+            lines = self.read(response)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(lines[0]['created'], 2)
+        self.assertFalse(lines[-1]['done'])
+        self.assertEqual(lines[-1]['created'], 2)
+        self.assertIn('after 2 imported rows', lines[-1]['error'])
+        self.assertIn('database is locked', logs.output[0])
+        # The failing chunk was rolled back with its rollups
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(rollups.stored_rollups(Expense), rollups.compute_rollups(Expense))
+
+    def test_csv_export_imports_back(self):
+        other = User.objects.create_user(email="other.user@example.com", username='otheruser', password='testpass')
+        for day in range(1, 4):
+            Income.objects.create(user=other, source_name='Job', amount=100 * day, date_received=f'2024-03-{day:02d}', status=Income.IncomeStatus.PENDING)
+        self.client.login(email="other.user@example.com", password='testpass')
+        exported = b''.join(self.client.get(reverse('income-export', args=['csv'])).streaming_content).decode()
+
+        self.client.login(email="test.user@example.com", password='testpass')
+        summary = self.read(self.upload('income-import', 'csv', exported))[-1]
+        self.assertEqual((summary['created'], summary['failed']), (3, 0))
+        self.assertEqual(
+            list(Income.objects.filter(user=self.user).order_by('date_received').values_list('amount', 'status')),
+            list(Income.objects.filter(user=other).order_by('date_received').values_list('amount', 'status')),
+        )
+        for model in rollups.ROLLUP_SPECS:
+            self.assertEqual(rollups.stored_rollups(model), rollups.compute_rollups(model))
+
+    def test_ofx_credits_are_incomes_and_debits_expenses(self):
+        summary = self.read(self.upload('income-import', 'ofx', OFX_SGML))[-1]
+        self.assertEqual(summary['created'], 2)
+        summary = self.read(self.upload('expense-import', 'ofx', OFX_SGML))[-1]
+        self.assertEqual(summary['created'], 1)
+
+        salary = Income.objects.get(user=self.user, source_name='ACME Payroll')
+        self.assertEqual((str(salary.amount), salary.date_received, salary.notes), ('2500.00', date(2024, 1, 5), 'January salary'))
+        self.assertEqual(salary.status, Income.IncomeStatus.RECEIVED)
+        expense = Expense.objects.get(user=self.user)
+        self.assertEqual((expense.category, str(expense.amount), expense.notes), ('Corner & Co', '61.20', None))
+
+    def test_rejects_bad_requests(self):
+        response = self.upload('expense-import', 'qif', BANK_CSV)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.upload('expense-import', 'csv', BANK_CSV)  # Columns not mapped
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Missing column(s): category, amount, due_date', response.data['file'][0])
+        response = self.upload('expense-import', 'csv', BANK_CSV, mapping='["Payee"]')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Expense.objects.exists())
+
+        self.client.logout()
+        self.assertEqual(self.upload('expense-import', 'csv', BANK_CSV).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_ofx_parsing_does_not_depend_on_read_size(self):
+        expected = list(importers.read_ofx_transactions(io.StringIO(OFX_SGML)))
+        self.assertEqual(len(expected), 3)
+        for read_size in (1, 7, 64):
+            self.assertEqual(list(importers.read_ofx_transactions(io.StringIO(OFX_SGML), read_size=read_size)), expected)
+
+
+class ImportStatementCommandTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        handle, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as statement:
+            statement.write(BANK_CSV)
+        self.addCleanup(os.remove, self.path)
+
+    def test_imports_csv_in_chunks(self):
+        out = io.StringIO()
+        call_command(
+            'import_statement', self.path, '--user', self.user.email, '--kind', 'expense', '--chunk-size', '2',
+            '--map', 'category=Payee', '--map', 'amount=Debit', '--map', 'due_date=Date', '--date-format', '%d/%m/%Y', '--signed-amounts',
+            stdout=out,
+        )
+        output = out.getvalue()
+        self.assertIn("Processed 2 rows: 2 imported, 0 failed", output)
+        self.assertIn("Line 4:", output)
+        self.assertIn("Imported 3 Expenses for test.user@example.com", output)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 3)
+
+    def test_reports_unknown_user_and_columns(self):
+        with self.assertRaises(CommandError):
+            call_command('import_statement', self.path, '--user', '999', '--kind', 'expense', stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, "Missing column(s)"):
+            call_command('import_statement', self.path, '--user', str(self.user.id), '--kind', 'income', stdout=io.StringIO())
@@ -0,0 +1,186 @@
+# tests/test_instrumentation.py
+import json
+import logging
+import os
+import queue
+import shutil
+import tempfile
+import time
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance.models import Income
+from finance.instrumentation import collect_metrics, InstrumentedLocMemCache
+from finance import log_writer
+from finance.log_writer import BatchingQueueListener, BatchingRotatingFileHandler, DroppingQueueHandler
+from accounts.models import User
+
+
+def server_timing(response):
+    """Parse a Server-Timing header into {name: {'dur': ..., 'desc': ...}}."""
+    metrics = {}
+    for entry in response['Server-Timing'].split(', '):
+        name, *params = entry.split(';')
+        metrics[name] = {key: value.strip('"') for key, value in (param.split('=', 1) for param in params)}
+    return metrics
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'finance.instrumentation.InstrumentedLocMemCache'}})
+class RequestInstrumentationTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="metrics.user@example.com", username='metricsuser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+        Income.objects.create(user=self.user, source_name='Job', amount=1000, date_received='2024-01-01')
+        cache.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get(reverse('income-list-create'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        timings = server_timing(response)
+        self.assertEqual(set(timings), {'db', 'cache', 'view', 'render', 'total'})
+        # count + page queries
+        self.assertEqual(timings['db']['desc'], "2 queries")
+        self.assertGreater(float(timings['view']['dur']), 0)
+        self.assertGreater(float(timings['render']['dur']), 0)
+        self.assertGreaterEqual(float(timings['total']['dur']), float(timings['db']['dur']))
+
+    def test_cache_hits_and_misses(self):
+        url = reverse('income-list-cached')
+        # The page (and the user's data version) are missed the first time...
+        first = server_timing(self.client.get(url))
+        self.assertRegex(first['cache']['desc'], r'^\d+ hits [12] misses$')
+        # ...and only hit afterwards (the cached page is served without rendering)
+        second = self.client.get(url)
+        self.assertRegex(server_timing(second)['cache']['desc'], r'^[1-9]\d* hits 0 misses$')
+        self.assertEqual(second.json()['count'], 1)
+
+    def test_response_logged_as_json(self):
+        with self.assertLogs('api_logger', level='INFO') as logs:
+            self.client.get(reverse('income-list-create'))
+        line = next(message for message in logs.output if 'Response data: ' in message)
+        fields = json.loads(line.split('Response data: ', 1)[1])
+        self.assertEqual(fields['status_code'], 200)
+        self.assertEqual(fields['path'], reverse('income-list-create'))
+        self.assertEqual(fields['db_queries'], 2)
+        for field in ('duration_ms', 'db_ms', 'cache_hits', 'cache_misses', 'cache_ms', 'view_ms', 'render_ms'):
+            self.assertIn(field, fields)
+
+    def test_streamed_response_logged_when_closed(self):
+        with self.assertLogs('api_logger', level='INFO') as logs:
+            response = self.client.get(reverse('income-export', args=['csv']))
+            self.assertTrue(response.streaming)
+            logging.getLogger('api_logger').info("headers sent")
+            self.assertFalse(any('Response data: ' in message for message in logs.output))
+            b''.join(response.streaming_content)  # the test client closes the response once consumed
+        line = next(message for message in logs.output if 'Response data: ' in message)
+        fields = json.loads(line.split('Response data: ', 1)[1])
+        self.assertEqual(fields['path'], reverse('income-export', args=['csv']))
+        # The rows are read while the body streams, after the view has returned
+        self.assertGreater(fields['db_queries'], int(server_timing(response)['db']['desc'].split()[0]))
+
+    def test_response_logged_to_configured_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'logs', 'api.log')
+        with override_settings(FINANCE_LOG_FILE=path):
+            client = APIClient()  # New handler, so the middleware starts the writer for the new file
+            client.force_authenticate(user=self.user)
+            client.get(reverse('income-list-create'))
+            log_writer.stop_writer()
+        with open(path) as log_file:
+            self.assertIn(f'"path": "{reverse("income-list-create")}"', log_file.read())
+
+    @override_settings(FINANCE_SERVER_TIMING=False)
+    def test_server_timing_header_can_be_disabled(self):
+        self.assertNotIn('Server-Timing', self.client.get(reverse('income-list-create')))
+
+    def test_nothing_recorded_outside_requests(self):
+        backend = InstrumentedLocMemCache('test', {})
+        backend.set('key', 1)
+        self.assertEqual(backend.get('key'), 1)
+        self.assertEqual(backend.get('other', 'default'), 'default')
+        with collect_metrics() as metrics:
+            self.assertEqual(backend.get('key'), 1)
+            self.assertEqual(backend.get('other', 'default'), 'default')
+            self.assertEqual(backend.get_many(['key', 'other']), {'key': 1})
+            Income.objects.count()
+        self.assertEqual((metrics.cache_hits, metrics.cache_misses, metrics.db_queries), (2, 2, 1))
+
+
+class RequestLogSamplingTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="sampled.user@example.com", username='sampleduser', password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+    def logged_statuses(self, *urls):
+        with self.assertLogs('api_logger', level='INFO') as logs:
+            # assertLogs needs at least one record
+            logging.getLogger('api_logger').info("start")
+            for url in urls:
+                self.client.get(url)
+        return [json.loads(line.split('Response data: ', 1)[1])['status_code'] for line in logs.output if 'Response data: ' in line]
+
+    @override_settings(FINANCE_LOG_SAMPLE_RATE=0)
+    def test_errors_logged_when_successes_are_sampled_out(self):
+        statuses = self.logged_statuses(reverse('income-list-create'), reverse('income-detail', args=[999]))
+        self.assertEqual(statuses, [404])
+
+    @override_settings(FINANCE_LOG_SAMPLE_RATE=1)
+    def test_all_requests_logged_at_full_rate(self):
+        statuses = self.logged_statuses(reverse('income-list-create'), reverse('income-detail', args=[999]))
+        self.assertEqual(statuses, [200, 404])
+
+
+class LogWriterTestCase(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'api.log')
+        self.logger = logging.getLogger(f'api_logger_test_{id(self)}')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+
+    def make_writer(self, queue_size=100, max_bytes=0, backup_count=0):
+        handler = BatchingRotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        handler.setFormatter(logging.Formatter("%(levelname)s; %(message)s"))
+        log_queue = queue.Queue(maxsize=queue_size)
+        queue_handler = DroppingQueueHandler(log_queue)
+        self.logger.addHandler(queue_handler)
+        self.addCleanup(self.logger.removeHandler, queue_handler)
+        self.addCleanup(handler.close)
+        return BatchingQueueListener(log_queue, handler, queue_handler), queue_handler
+
+    def read_lines(self):
+        with open(self.path) as log_file:
+            return log_file.read().splitlines()
+
+    def test_stop_drains_queue(self):
+        listener, _ = self.make_writer(queue_size=1000)
+        for number in range(500):
+            self.logger.info("line %d", number)
+        listener.start()
+        listener.stop()
+        self.assertEqual(self.read_lines(), [f"INFO; line {number}" for number in range(500)])
+
+    def test_full_queue_drops_and_reports(self):
+        listener, queue_handler = self.make_writer(queue_size=3)
+        for number in range(5):
+            self.logger.error("line %d", number)
+        self.assertEqual(queue_handler.dropped, 2)
+        listener.start()
+        listener.stop()
+        self.assertEqual(self.read_lines(), [
+            "ERROR; line 0", "ERROR; line 1", "ERROR; line 2", "WARNING; Log queue full, dropped 2 records",
+        ])
+
+    def test_rollover_per_batch(self):
+        listener, _ = self.make_writer(max_bytes=50, backup_count=2)
+        listener.start()
+        for number in range(3):
+            self.logger.info("x" * 30)
+            time.sleep(0.05)  # let each line go out in its own batch
+        listener.stop()
+        self.assertTrue(os.path.exists(self.path + '.1'))
+        self.assertEqual(len(self.read_lines()), 1)
@@ -0,0 +1,109 @@
+# tests/test_metrics.py
+import json
+import os
+import shutil
+import tempfile
+import threading
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from finance import metrics
+from accounts.models import User
+
+
+class MetricsEndpointTestCase(APITestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        settings_override = override_settings(FINANCE_METRICS_DIR=directory)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.directory = directory
+        metrics.store.reset()
+
+        self.user = User.objects.create_user(email="metrics@example.com", username='metrics', password='testpass')
+        self.client.force_authenticate(user=self.user)
+
+    def scrape(self):
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode().splitlines()
+
+    def test_counts_and_histograms_by_route_and_status(self):
+        self.client.get(reverse('income-list-create'))
+        self.client.get(reverse('income-list-create'))
+        self.client.get(reverse('income-detail', args=[999]))
+        self.client.get('/finance/no-such-page/')
+
+        lines = self.scrape()
+        self.assertIn('finance_http_requests_total{route="income-list-create",status="2xx"} 2', lines)
+        self.assertIn('finance_http_requests_total{route="income-detail",status="4xx"} 1', lines)
+        self.assertIn('finance_http_requests_total{route="unmatched",status="4xx"} 1', lines)
+        self.assertIn('# TYPE finance_http_request_duration_seconds histogram', lines)
+        self.assertIn('finance_http_request_duration_seconds_bucket{route="income-list-create",status="2xx",le="+Inf"} 2', lines)
+        self.assertIn('finance_http_request_duration_seconds_count{route="income-list-create",status="2xx"} 2', lines)
+
+        buckets = [
+            int(line.rsplit(' ', 1)[1]) for line in lines
+            if line.startswith('finance_http_request_duration_seconds_bucket{route="income-list-create"')
+        ]
+        self.assertEqual(len(buckets), len(metrics.LATENCY_BUCKETS) + 1)
+        self.assertEqual(buckets, sorted(buckets))  # cumulative
+
+    def test_sums_all_worker_processes(self):
+        self.client.get(reverse('income-list-create'))
+        # Another worker's flushed counts: 3 fast requests on the same route
+        other = {'income-list-create\t2xx': {'buckets': [3] + [0] * len(metrics.LATENCY_BUCKETS), 'sum': 0.006}}
+        with open(os.path.join(self.directory, 'metrics-999999.json'), 'w') as metrics_file:
+            json.dump(other, metrics_file)
+
+        lines = self.scrape()
+        self.assertIn('finance_http_requests_total{route="income-list-create",status="2xx"} 4', lines)
+        self.assertIn('finance_http_request_duration_seconds_bucket{route="income-list-create",status="2xx",le="0.005"}', ' '.join(lines))
+
+    @override_settings(FINANCE_METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_only_allowed_clients_can_scrape(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.5').status_code, status.HTTP_200_OK)
+
+    @override_settings(FINANCE_METRICS_TRUSTED_PROXIES=['127.0.0.1'], FINANCE_METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_clients_behind_a_trusted_proxy(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR='10.0.0.5').status_code, status.HTTP_200_OK)
+        # A spoofed leftmost hop doesn't help, the proxy appends the real client
+        self.assertEqual(self.client.get(url, HTTP_X_FORWARDED_FOR='10.0.0.5, 203.0.113.9').status_code, status.HTTP_403_FORBIDDEN)
+        # Forwarded requests from a peer that isn't a trusted proxy are refused
+        self.assertEqual(self.client.get(url, REMOTE_ADDR='10.0.0.5', HTTP_X_FORWARDED_FOR='10.0.0.5').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_forwarded_requests_need_a_trusted_proxy(self):
+        # The default allow-list is localhost, which is where a reverse proxy usually connects from
+        response = self.client.get(reverse('metrics'), HTTP_X_FORWARDED_FOR='203.0.113.9')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(FINANCE_METRICS_TOKEN='scrape-secret')
+    def test_token_is_required_when_configured(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer scrape-secret', REMOTE_ADDR='203.0.113.9')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_concurrent_flushes_keep_the_newest_counts(self):
+        store = metrics.MetricsStore()
+        store._pid = os.getpid()  # No flusher thread
+        path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+
+        def observe_and_flush():
+            for _ in range(50):
+                store.observe('income-list-create', 200, 0.001)
+                store.flush()
+
+        threads = [threading.Thread(target=observe_and_flush) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        with open(path) as metrics_file:
+            self.assertEqual(sum(json.load(metrics_file)['income-list-create\t2xx']['buckets']), 200)
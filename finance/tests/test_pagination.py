@@ -0,0 +1,75 @@
+# tests/test_pagination.py
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance.models import Income, Expense, Loan
+from accounts.models import User
+
+
+class KeysetPaginationTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('income-list-create')
+
+        # Repeated amounts and dates make sure ties are broken by id without skipping rows
+        for index in range(13):
+            Income.objects.create(
+                user=self.user, source_name=f'Source {index}', amount=100 * (index % 4 + 1),
+                date_received=f'2024-0{index % 3 + 1}-01',
+            )
+
+    def collect(self, params):
+        ids, url, params = [], self.url, {**params, 'pagination': 'cursor'}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids += [item['id'] for item in response.data['results']]
+            url, params = response.data['next'], None
+        return ids
+
+    def test_cursor_pages_follow_requested_sort(self):
+        expected = list(Income.objects.order_by('-amount', '-id').values_list('id', flat=True))
+        self.assertEqual(self.collect({'sort_by': 'amount', 'order': 'desc'}), expected)
+
+        expected = list(Income.objects.order_by('date_received', 'id').values_list('id', flat=True))
+        self.assertEqual(self.collect({'ordering': 'date_received', 'page_size': 4}), expected)
+
+        expected = list(Income.objects.order_by('-date_received', '-id').values_list('id', flat=True))
+        self.assertEqual(self.collect({}), expected)
+
+    def test_cursor_pages_skip_count_and_offset(self):
+        first = self.client.get(self.url, {'pagination': 'cursor'})
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first.data['next'])
+        sql = ' '.join(query['sql'] for query in queries.captured_queries).upper()
+        self.assertNotIn('COUNT(', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_invalid_cursor_and_unsupported_sort(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        Loan.objects.create(user=self.user, loan_name='Car', principal_amount=5000, interest_rate=5, tenure_months=12, remaining_balance=5000)
+        response = self.client.get(reverse('loan-list-create'), {'pagination': 'cursor', 'sort_by': 'notes'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_page_number_mode_is_unchanged(self):
+        response = self.client.get(self.url, {'page': 2})
+        self.assertEqual(response.data['count'], 13)
+        self.assertEqual(len(response.data['results']), 5)
+
+    def test_expense_cursor_pages_default_to_newest_due_date(self):
+        # The expense list's queryset is ordered by id for page-number pagination
+        for day in (5, 30, 1, 20, 12):
+            Expense.objects.create(user=self.user, category='Rent', amount=10, due_date=f'2030-01-{day:02d}')
+        url, params, due_dates = reverse('expense-list-create'), {'pagination': 'cursor', 'page_size': 2}, []
+        while url:
+            response = self.client.get(url, params)
+            due_dates += [item['due_date'] for item in response.data['results']]
+            url, params = response.data['next'], None
+        self.assertEqual(due_dates, ['2030-01-30', '2030-01-20', '2030-01-12', '2030-01-05', '2030-01-01'])
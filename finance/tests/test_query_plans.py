@@ -0,0 +1,97 @@
+# tests/test_query_plans.py
+import random
+import re
+import unittest
+from datetime import date, timedelta
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase, APIClient
+from finance.models import Income, Expense, Loan
+from finance import rollups
+from accounts.models import User
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "EXPLAIN QUERY PLAN output is SQLite specific")
+class QueryPlanTestCase(APITestCase):
+    """
+    Runs every endpoint's queries through EXPLAIN QUERY PLAN on a seeded database and
+    fails if any of them reads a finance table with a full table scan.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(7)
+        cls.users = [
+            User.objects.create_user(email=f"user{index}@example.com", username=f'user{index}', password='testpass')
+            for index in range(4)
+        ]
+        incomes, expenses, loans = [], [], []
+        for user in cls.users:
+            for index in range(150):
+                day = date(2023, 1, 1) + timedelta(days=rng.randrange(730))
+                incomes.append(Income(user=user, source_name=rng.choice(['Job', 'Gift', 'Rent']), amount=rng.randrange(10, 5000), date_received=day, status=rng.choice(['pending', 'received']), notes='note'))
+                expenses.append(Expense(user=user, category=rng.choice(['Food', 'Travel']), amount=rng.randrange(10, 500), due_date=day, status=rng.choice(['pending', 'paid'])))
+            for index in range(20):
+                loans.append(Loan(user=user, loan_name=f'Loan {index}', principal_amount=10000, interest_rate=7, tenure_months=36, remaining_balance=rng.randrange(1000, 10000), status=rng.choice(['active', 'paid'])))
+        Income.objects.bulk_create(incomes)
+        Expense.objects.bulk_create(expenses)
+        Loan.objects.bulk_create(loans)
+        rollups.apply_rows(Income, [rollups.instance_row(income) for income in incomes])
+        rollups.apply_rows(Expense, [rollups.instance_row(expense) for expense in expenses])
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        self.user = self.users[1]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def full_scans(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            plan = [row[-1] for row in cursor.fetchall()]
+        # Older SQLite versions print "SCAN TABLE <name>"; FTS5 lookups show up as "SCAN <name> VIRTUAL TABLE INDEX"
+        return [step for step in plan if re.match(r'SCAN (TABLE )?finance_', step) and 'VIRTUAL TABLE' not in step]
+
+    def assertNoFullScans(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 400, response)
+
+        finance_queries = [query['sql'] for query in queries.captured_queries if 'finance_' in query['sql']]
+        self.assertTrue(finance_queries, f"No finance queries captured for {url}")
+        for sql in finance_queries:
+            self.assertEqual(self.full_scans(sql), [], f"Full table scan for {url} {params}:\n{sql}")
+
+    def test_list_endpoints(self):
+        self.assertNoFullScans(reverse('income-list-create'))
+        self.assertNoFullScans(reverse('income-list-create'), {'date_received_range_after': '2024-01-01', 'date_received_range_before': '2024-03-31'})
+        self.assertNoFullScans(reverse('income-list-create'), {'status': 'pending', 'ordering': 'amount'})
+        self.assertNoFullScans(reverse('expense-list-create'), {'due_date_gt': '2024-06-01'})
+        self.assertNoFullScans(reverse('expense-list-create'), {'status': 'pending'})
+        self.assertNoFullScans(reverse('loan-list-create'), {'status': 'active'})
+
+    def test_full_text_search(self):
+        self.assertNoFullScans(reverse('income-list-create'), {'search': 'note'})
+        self.assertNoFullScans(reverse('expense-list-create'), {'search': 'food'})
+
+    def test_cursor_pagination(self):
+        first = self.client.get(reverse('income-list-create'), {'pagination': 'cursor'})
+        self.assertNoFullScans(first.data['next'])
+        first = self.client.get(reverse('loan-list-create'), {'pagination': 'cursor'})
+        self.assertNoFullScans(first.data['next'])
+
+    def test_detail_endpoints(self):
+        self.assertNoFullScans(reverse('income-detail', args=[Income.objects.filter(user=self.user).first().id]))
+        self.assertNoFullScans(reverse('loan-detail', args=[Loan.objects.filter(user=self.user).first().id]))
+
+    def test_report_endpoints(self):
+        self.assertNoFullScans(reverse('financial-report'))
+        self.assertNoFullScans(reverse('financial-report'), {'start_date': '2023-03-15', 'end_date': '2024-08-20'})
+        self.assertNoFullScans(reverse('financial-report'), {'start_date': '2024-01-01', 'end_date': '2024-03-31', 'granularity': 'week'})
+
+    def test_export_endpoints(self):
+        self.assertNoFullScans(reverse('income-export', args=['csv']), {'date_received_gt': '2024-06-01'})
+        self.assertNoFullScans(reverse('loan-export', args=['ndjson']))
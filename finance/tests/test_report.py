@@ -64,4 +64,62 @@ class FinancialReportViewsTestCase(APITestCase):
         self.assertEqual(response.data['summary']['total_expenses'], 0)
         self.assertEqual(response.data['summary']['active_loans_balance'], 3000)
 
-   
\ No newline at end of file
+   
+    def test_financial_report_runs_single_query(self):
+        url = reverse('financial-report')
+        self.client.force_authenticate(user=self.user)
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {'start_date': '2023-02-01', 'end_date': '2024-12-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['summary']['total_income'], 1500)
+        self.assertEqual(response.data['summary']['active_loans_balance'], 3000)
+        self.assertEqual(
+            response.data['visualization']['income_trend'],
+            [{'month': 1, 'total': 1000}, {'month': 10, 'total': 500}],
+        )
+        self.assertEqual(response.data['visualization']['expense_trend'], [])
+
+    def test_financial_report_trend_granularity(self):
+        Income.objects.create(user=self.user, source_name='Job', amount=700, date_received='2025-01-15', status=Income.IncomeStatus.RECEIVED)
+        url = reverse('financial-report')
+        response = self.client.get(url, {'start_date': '2024-01-01', 'end_date': '2025-03-31', 'granularity': 'quarter'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        income_trend = [(str(point['period']), point['total']) for point in response.data['visualization']['income_trend']]
+        self.assertEqual(income_trend, [
+            ('2024-01-01', 1000), ('2024-04-01', 0), ('2024-07-01', 0), ('2024-10-01', 500), ('2025-01-01', 700),
+        ])
+        expense_trend = [(str(point['period']), point['total']) for point in response.data['visualization']['expense_trend']]
+        self.assertEqual(expense_trend, [
+            ('2024-01-01', 0), ('2024-04-01', 0), ('2024-07-01', 0), ('2024-10-01', 0), ('2025-01-01', 150),
+        ])
+
+        response = self.client.get(url, {'start_date': '2024-12-30', 'end_date': '2025-01-16', 'granularity': 'week'})
+        income_trend = [(str(point['period']), point['total']) for point in response.data['visualization']['income_trend']]
+        self.assertEqual(income_trend, [('2024-12-30', 0), ('2025-01-06', 0), ('2025-01-13', 700)])
+
+        response = self.client.get(url, {'granularity': 'fortnight'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_financial_report_rejects_reversed_and_oversized_ranges(self):
+        url = reverse('financial-report')
+        response = self.client.get(url, {'start_date': '2024-03-01', 'end_date': '2024-01-01'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {'start_date': '1900-01-01', 'end_date': '2100-12-31', 'granularity': 'day'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('3660 day buckets', str(response.data))
+        response = self.client.get(url, {'start_date': '1900-01-01', 'end_date': '2100-12-31', 'granularity': 'year'})
+        self.assertEqual(len(response.data['visualization']['income_trend']), 201)
+
+        # The last buckets before date.max have no successor
+        for granularity in ('day', 'week', 'month', 'quarter', 'year'):
+            response = self.client.get(url, {'start_date': '9999-12-01', 'end_date': '9999-12-31', 'granularity': granularity})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(str(response.data['visualization']['income_trend'][-1]['period'])[:4], '9999')
+
+    def test_open_ended_trend_wider_than_the_cap_skips_empty_buckets(self):
+        Income.objects.create(user=self.user, source_name='Job', amount=10, date_received='1950-06-01', status=Income.IncomeStatus.RECEIVED)
+        response = self.client.get(reverse('financial-report'), {'start_date': '1950-01-01', 'granularity': 'day'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        income_trend = response.data['visualization']['income_trend']
+        self.assertEqual(len(income_trend), Income.objects.filter(user=self.user).dates('date_received', 'day').count())
+        self.assertEqual((str(income_trend[0]['period']), income_trend[0]['total']), ('1950-06-01', 10))
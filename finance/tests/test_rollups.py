@@ -0,0 +1,115 @@
+# tests/test_rollups.py
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models.query import QuerySet
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance.models import Income, Expense, IncomeMonthlyRollup, ExpenseMonthlyRollup
+from finance import rollups
+from accounts.models import User
+
+
+class MonthlyRollupTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+
+        self.income1 = Income.objects.create(user=self.user, source_name='Job', amount=1000, date_received='2024-01-10', status=Income.IncomeStatus.RECEIVED)
+        self.income2 = Income.objects.create(user=self.user, source_name='Bonus', amount=300, date_received='2024-01-25', status=Income.IncomeStatus.RECEIVED)
+        self.income3 = Income.objects.create(user=self.user, source_name='Freelance', amount=500, date_received='2024-03-15', status=Income.IncomeStatus.PENDING)
+
+    def test_rollups_follow_create_update_delete(self):
+        january = IncomeMonthlyRollup.objects.get(user=self.user, month=date(2024, 1, 1), status='received')
+        self.assertEqual(january.total_amount, 1300)
+        self.assertEqual(january.entry_count, 2)
+
+        # Move income2 to February through the detail view
+        url = reverse('income-detail', args=[self.income2.id])
+        response = self.client.put(url, {'source_name': 'Bonus', 'amount': 400, 'date_received': '2024-02-05', 'status': 'received'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        january.refresh_from_db()
+        self.assertEqual((january.total_amount, january.entry_count), (1000, 1))
+        february = IncomeMonthlyRollup.objects.get(user=self.user, month=date(2024, 2, 1), status='received')
+        self.assertEqual((february.total_amount, february.entry_count), (400, 1))
+
+        response = self.client.delete(url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        february.refresh_from_db()
+        self.assertEqual((february.total_amount, february.entry_count), (0, 0))
+
+        due_date = date.today() + timedelta(days=10)
+        response = self.client.post(reverse('expense-list-create'), {'category': 'Food', 'amount': 75, 'due_date': due_date, 'status': 'paid'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        expense_rollup = ExpenseMonthlyRollup.objects.get(user=self.user, month=due_date.replace(day=1), category='Food')
+        self.assertEqual((expense_rollup.total_amount, expense_rollup.entry_count), (75, 1))
+
+    def test_update_locks_the_previous_row(self):
+        with mock.patch.object(QuerySet, 'select_for_update', autospec=True, side_effect=QuerySet.select_for_update) as lock:
+            self.income1.amount = 1100
+            self.income1.save()
+        self.assertEqual(lock.call_args.args[0].model, Income)
+        january = IncomeMonthlyRollup.objects.get(user=self.user, month=date(2024, 1, 1), status='received')
+        self.assertEqual((january.total_amount, january.entry_count), (1400, 2))
+
+    def test_partial_save_only_moves_written_fields(self):
+        self.income1.amount = 50
+        self.income1.notes = 'bonus'
+        self.income1.save(update_fields=['notes'])
+        self.income1.date_received = date(2024, 3, 2)
+        self.income1.save(update_fields=['date_received'])
+        self.assertEqual(rollups.stored_rollups(Income), rollups.compute_rollups(Income))
+        march = IncomeMonthlyRollup.objects.get(user=self.user, month=date(2024, 3, 1), status='received')
+        self.assertEqual((march.total_amount, march.entry_count), (1000, 1))
+
+    def test_report_with_partial_months_matches_raw_rows(self):
+        Expense.objects.create(user=self.user, category='Rent', amount=200, due_date='2024-03-31', status=Expense.ExpenseStatus.PAID)
+        response = self.client.get(reverse('financial-report'), {'start_date': '2024-01-20', 'end_date': '2024-03-31'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['summary']['total_income'], 800)
+        self.assertEqual(response.data['summary']['total_expenses'], 200)
+        self.assertEqual(response.data['visualization']['income_trend'], [{'month': 1, 'total': 300}, {'month': 3, 'total': 500}])
+
+    def test_split_date_range(self):
+        self.assertEqual(
+            rollups.split_date_range(date(2024, 1, 20), date(2024, 3, 10)),
+            (date(2024, 2, 1), date(2024, 3, 1), [(date(2024, 1, 20), date(2024, 1, 31)), (date(2024, 3, 1), date(2024, 3, 10))]),
+        )
+        self.assertEqual(
+            rollups.split_date_range(date(2024, 1, 1), date(2024, 2, 29)),
+            (date(2024, 1, 1), date(2024, 3, 1), []),
+        )
+        self.assertEqual(
+            rollups.split_date_range(date(2024, 5, 3), date(2024, 5, 9)),
+            (date(2024, 6, 1), date(2024, 5, 1), [(date(2024, 5, 3), date(2024, 5, 9))]),
+        )
+        # December 9999 has no next month: bounds stop at date.max
+        self.assertEqual(
+            rollups.split_date_range(date(9999, 11, 1), date.max),
+            (date(9999, 11, 1), date.max, []),
+        )
+        self.assertEqual(
+            rollups.split_date_range(date(9999, 12, 15), date.max),
+            (date.max, date.max, [(date(9999, 12, 15), date.max)]),
+        )
+
+    def test_report_up_to_the_last_representable_date(self):
+        Income.objects.create(user=self.user, source_name='Job', amount=50, date_received='9999-12-20', status=Income.IncomeStatus.RECEIVED)
+        for start_date in ('2024-01-20', '9999-12-05'):
+            response = self.client.get(reverse('financial-report'), {'start_date': start_date, 'end_date': '9999-12-31'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['summary']['total_income'], 50)
+
+    def test_rebuild_rollups_command(self):
+        IncomeMonthlyRollup.objects.filter(month=date(2024, 3, 1)).update(total_amount=1)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--verify', stdout=StringIO())
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        out = StringIO()
+        call_command('rebuild_rollups', '--verify', stdout=out)
+        self.assertIn('All rollups match', out.getvalue())
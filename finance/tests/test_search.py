@@ -0,0 +1,62 @@
+# tests/test_search.py
+import io
+import unittest
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance.models import Income, Expense, Loan
+from accounts.models import User
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', "Exercises the SQLite FTS5 backend")
+class FullTextSearchTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(email="other.user@example.com", username='otheruser', password='testpass')
+        self.client = APIClient()
+        self.client.login(email="test.user@example.com", password='testpass')
+
+        self.salary = Income.objects.create(user=self.user, source_name='Salary', amount=1000, date_received='2024-01-01', notes='monthly salary payment')
+        self.bonus = Income.objects.create(user=self.user, source_name='Bonus', amount=500, date_received='2024-02-01', notes='year end salary bonus')
+        Income.objects.create(user=self.user, source_name='Gift', amount=50, date_received='2024-03-01', notes='birthday')
+        Income.objects.create(user=self.other_user, source_name='Salary', amount=2000, date_received='2024-01-01', notes='salary')
+
+    def search(self, url, term, **params):
+        response = self.client.get(url, {'search': term, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data['results']]
+
+    def test_search_is_ranked_and_scoped_to_the_user(self):
+        url = reverse('income-list-create')
+        self.assertEqual(self.search(url, 'salary'), [self.salary.id, self.bonus.id])
+        self.assertEqual(self.search(url, 'sal bon'), [self.bonus.id])  # Every word, as a prefix
+        self.assertEqual(self.search(url, 'salary', ordering='amount'), [self.bonus.id, self.salary.id])
+        self.assertEqual(self.search(url, '"salary*" ('), [self.salary.id, self.bonus.id])  # Query syntax is ignored
+        self.assertEqual(self.search(url, 'rent'), [])
+
+    def test_index_follows_updates_bulk_writes_and_deletes(self):
+        url = reverse('income-list-create')
+        Income.objects.filter(id=self.salary.id).update(notes='rent')
+        self.assertEqual(self.search(url, 'rent'), [self.salary.id])
+
+        Expense.objects.bulk_create([Expense(user=self.user, category='Travel', amount=10, due_date='2024-01-01', notes='train ticket')])
+        self.assertEqual(len(self.search(reverse('expense-list-create'), 'ticket')), 1)
+
+        self.salary.delete()
+        self.assertEqual(self.search(url, 'rent'), [])
+
+    def test_cursor_pagination_keeps_its_ordering(self):
+        Loan.objects.create(user=self.user, loan_name='Car Loan', principal_amount=5000, interest_rate=5, tenure_months=24, remaining_balance=3000, notes='car')
+        response = self.client.get(reverse('loan-list-create'), {'search': 'car', 'pagination': 'cursor'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM finance_income_fts")
+        self.assertEqual(self.search(reverse('income-list-create'), 'salary'), [])
+
+        call_command('rebuild_search_index', stdout=io.StringIO())
+        self.assertEqual(self.search(reverse('income-list-create'), 'salary'), [self.salary.id, self.bonus.id])
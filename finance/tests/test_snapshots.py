@@ -0,0 +1,66 @@
+# tests/test_snapshots.py
+from io import StringIO
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase, APIClient
+from finance import caching
+from finance.models import Income, Loan, ReportSnapshot
+from accounts.models import User
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ReportSnapshotTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="test.user@example.com", username='testuser', password='testpass')
+        self.other_user = User.objects.create_user(email="other.user@example.com", username='otheruser', password='testpass')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        Income.objects.create(user=self.user, source_name='Job', amount=1000, date_received='2024-01-15', status=Income.IncomeStatus.RECEIVED)
+        Income.objects.create(user=self.other_user, source_name='Job', amount=250, date_received='2024-01-20', status=Income.IncomeStatus.RECEIVED)
+        Loan.objects.create(user=self.user, loan_name='Car Loan', principal_amount=5000, interest_rate=5, tenure_months=24, remaining_balance=3000)
+        self.range = {'start_date': '2024-01-01', 'end_date': '2024-01-31'}
+
+    def build_snapshots(self, *args):
+        call_command('build_report_snapshots', '--start-date', '2024-01-01', '--end-date', '2024-01-31', '--workers', '1', *args, stdout=StringIO())
+
+    def test_snapshots_match_live_report(self):
+        live = self.client.get(reverse('financial-report'), self.range).json()
+        self.build_snapshots('--shard-size', '1')
+        self.assertEqual(ReportSnapshot.objects.count(), 2)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('financial-report'), self.range)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), live)
+
+        other = ReportSnapshot.objects.get(user=self.other_user)
+        self.assertEqual(other.data['summary'], {'total_income': 250.0, 'total_expenses': 0, 'active_loans_balance': 0})
+
+    def test_writes_invalidate_snapshots(self):
+        self.build_snapshots()
+        Income.objects.create(user=self.user, source_name='Gift', amount=100, date_received='2024-01-05')
+        self.assertFalse(ReportSnapshot.objects.filter(user=self.user).exists())
+        self.assertTrue(ReportSnapshot.objects.filter(user=self.other_user).exists())
+
+        response = self.client.get(reverse('financial-report'), self.range)
+        self.assertEqual(response.data['summary']['total_income'], 1100)
+
+    def test_stale_snapshots_are_not_served(self):
+        live = self.client.get(reverse('financial-report'), self.range).json()
+        self.build_snapshots()
+        ReportSnapshot.objects.filter(user=self.user).update(data={'stale': True})
+        self.assertEqual(self.client.get(reverse('financial-report'), self.range).json(), {'stale': True})
+
+        # A write committed after the build moves the user past the snapshot's version
+        caching.bump_data_version(self.user.id)
+        response = self.client.get(reverse('financial-report'), self.range)
+        self.assertEqual(response.json(), live)
+
+    def test_ranges_without_snapshots_skip_the_lookup(self):
+        self.build_snapshots()
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('financial-report'), {'start_date': '2024-02-01', 'end_date': '2024-02-29'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
@@ -0,0 +1,84 @@
+"""
+Calendar bucketing helpers for the report trend series.
+
+Buckets are identified by their first day (as produced by the database's date
+truncation), which keeps them unique across years.
+"""
+from datetime import timedelta
+
+GRANULARITIES = ('day', 'week', 'month', 'quarter', 'year')
+
+# Granularities whose buckets are whole months and can be answered from the monthly rollups
+MONTH_ALIGNED_GRANULARITIES = ('month', 'quarter', 'year')
+
+# Most buckets a zero-filled series may have: about 10 years of days, 20 of weeks and
+# 100 of months or quarters, and 500 years
+MAX_BUCKETS = {'day': 3660, 'week': 1044, 'month': 1200, 'quarter': 400, 'year': 500}
+
+_MONTHS_PER_BUCKET = {'month': 1, 'quarter': 3, 'year': 12}
+
+
+def period_start(value, granularity):
+    """
+    Return the first day of the bucket containing `value` (same semantics as SQL date truncation).
+    """
+    if granularity == 'day':
+        return value
+    if granularity == 'week':
+        return value - timedelta(days=value.weekday())
+    if granularity == 'month':
+        return value.replace(day=1)
+    if granularity == 'quarter':
+        return value.replace(month=(value.month - 1) // 3 * 3 + 1, day=1)
+    if granularity == 'year':
+        return value.replace(month=1, day=1)
+    raise ValueError(f"Unknown granularity: {granularity}")
+
+
+def next_period(value, granularity):
+    """
+    Return the first day of the bucket following the bucket starting at `value`.
+    """
+    if granularity == 'day':
+        return value + timedelta(days=1)
+    if granularity == 'week':
+        return value + timedelta(days=7)
+    month_index = value.year * 12 + value.month - 1 + _MONTHS_PER_BUCKET[granularity]
+    return value.replace(year=month_index // 12, month=month_index % 12 + 1, day=1)
+
+
+def bucket_count(start_date, end_date, granularity):
+    """
+    Return the number of buckets between the ones holding `start_date` and `end_date`, inclusive.
+    """
+    first, last = period_start(start_date, granularity), period_start(end_date, granularity)
+    if granularity in ('day', 'week'):
+        return (last - first).days // (1 if granularity == 'day' else 7) + 1
+    months = (last.year - first.year) * 12 + last.month - first.month
+    return months // _MONTHS_PER_BUCKET[granularity] + 1
+
+
+def fill_gaps(totals, start_date, end_date, granularity):
+    """
+    Turn {bucket start: total} into a complete, ordered series with zero-filled empty buckets.
+
+    The series spans the requested range, falling back to the first/last bucket
+    holding data when the range is open-ended. An open-ended range spanning more than
+    MAX_BUCKETS[granularity] buckets is returned without the empty ones.
+    """
+    if not totals and (start_date is None or end_date is None):
+        return []
+
+    first = period_start(start_date, granularity) if start_date else min(totals)
+    last = period_start(end_date, granularity) if end_date else max(totals)
+    if first <= last and bucket_count(first, last, granularity) > MAX_BUCKETS[granularity]:
+        return [{"period": period, "total": total} for period, total in sorted(totals.items())]
+
+    series = []
+    period = first
+    while period <= last:
+        series.append({"period": period, "total": totals.get(period, 0)})
+        if period == last:
+            break  # The last bucket of year 9999 has no successor
+        period = next_period(period, granularity)
+    return series
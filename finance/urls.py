@@ -1,5 +1,5 @@
 from django.urls import path
-from finance.views import income_views, expense_views, loan_views, report_views, logtest_views
+from finance.views import income_views, expense_views, loan_views, report_views, logtest_views, export_views, batch_views, forecast_views, async_views, metrics_views, import_views
 
 
 urlpatterns = [
@@ -8,20 +8,41 @@ urlpatterns = [
     # path('income/cached/', income_views.IncomeListCreateViewCached.as_view(), name='income-list-create-cached'),
     path('income/cached/', income_views.IncomeListCachedView.as_view(), name='income-list-cached'),
     path('income/<int:pk>/', income_views.IncomeRetrieveUpdateDeleteView.as_view(), name='income-detail'),
+    path('income/export/<str:file_format>/', export_views.IncomeExportView.as_view(), name='income-export'),
+    path('income/import/<str:file_format>/', import_views.IncomeImportView.as_view(), name='income-import'),
+    path('income/batch/', batch_views.IncomeBatchView.as_view(), name='income-batch'),
+    path('income/async/', async_views.AsyncIncomeListView.as_view(), name='income-list-async'),
 
     # Expense
     path('expense/', expense_views.ExpenseListCreateView.as_view(), name="expense-list-create"),
     path('expense/cached/', expense_views.ExpenseListCachedView.as_view(), name="expense-list-cached"),
     path('expense/<int:pk>/', expense_views.ExpenseRetrieveUpdateDeleteView.as_view(),name="expense-detail"),
+    path('expense/export/<str:file_format>/', export_views.ExpenseExportView.as_view(), name="expense-export"),
+    path('expense/import/<str:file_format>/', import_views.ExpenseImportView.as_view(), name="expense-import"),
+    path('expense/batch/', batch_views.ExpenseBatchView.as_view(), name="expense-batch"),
+    path('expense/async/', async_views.AsyncExpenseListView.as_view(), name="expense-list-async"),
 
     # Loan
     path('loan/', loan_views.LoanListCreateView.as_view(), name="loan-list-create"),
     path('loan/cached/', loan_views.LoanListCachedView.as_view(), name="loan-list-cached"),
     path('loan/<int:pk>/', loan_views.LoanRetrieveUpdateDeleteView.as_view(), name="loan-detail"),
+    path('loan/export/<str:file_format>/', export_views.LoanExportView.as_view(), name="loan-export"),
+    path('loan/async/', async_views.AsyncLoanListView.as_view(), name="loan-list-async"),
+    path('loan/schedule/', loan_views.LoanScheduleListView.as_view(), name="loan-schedule-list"),
+    path('loan/payoff-plan/', loan_views.LoanPayoffPlanView.as_view(), name="loan-payoff-plan"),
+    path('loan/<int:pk>/schedule/', loan_views.LoanScheduleView.as_view(), name="loan-schedule"),
+    path('loan/<int:pk>/simulate/', loan_views.LoanSimulationView.as_view(), name="loan-simulate"),
 
     # Report
     path('reports/', report_views.FinancialReportView.as_view(), name="financial-report"),
-    path('reports/cached', report_views.FinancialReportView.as_view(), name="financial-report-cached"),
+    path('reports/cached', report_views.FinancialReportViewCached.as_view(), name="financial-report-cached"),
+    path('reports/async/', async_views.AsyncFinancialReportView.as_view(), name="financial-report-async"),
+
+    # Forecast
+    path('forecast/', forecast_views.CashFlowForecastView.as_view(), name="cash-flow-forecast"),
+
+    # Metrics (Prometheus)
+    path('metrics/', metrics_views.MetricsView.as_view(), name="metrics"),
 
     # log test
     path('logtest/', logtest_views.my_view, name="logtest"),
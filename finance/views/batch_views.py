@@ -0,0 +1,104 @@
+from django.db import transaction
+from rest_framework import status
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from drf_spectacular.utils import extend_schema
+from finance.models import Income, Expense
+from finance.serializers import IncomeSerializer, ExpenseSerializer, BatchDeleteSerializer
+from finance.signals import batched_deletes
+
+
+class BatchViewBase(GenericAPIView):
+    """
+    Base view for batch create (POST), update (PATCH) and delete (DELETE) of the user's rows.
+
+    Every item is validated on its own; valid items are written with one bulk query
+    in a single transaction and invalid ones are reported by index, so one bad record
+    does not abort the rest of the batch. Responses are 201/200 when every item
+    succeeded, 207 when only some did and 400 when none did.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+    max_batch_size = 5000
+
+    def batch_status(self, succeeded, failed, success_status):
+        if not failed:
+            return success_status
+        return status.HTTP_207_MULTI_STATUS if succeeded else status.HTTP_400_BAD_REQUEST
+
+    def batch_response(self, serializer, objects, key, success_status):
+        errors = [{"index": index, "errors": detail} for index, detail in sorted(serializer.item_errors.items())]
+        results = [{"index": index, "id": obj.id} for index, obj in zip(serializer.valid_indexes, objects)]
+        return Response(
+            {key: results, "errors": errors},
+            status=self.batch_status(len(results), len(errors), success_status),
+        )
+
+    def post(self, request, *args, **kwargs):
+        """
+        Create many records at once from a JSON array.
+        """
+        serializer = self.get_serializer(data=request.data, many=True, max_length=self.max_batch_size)
+        serializer.is_valid(raise_exception=True)
+        objects = serializer.save(user=request.user)
+        return self.batch_response(serializer, objects, "created", status.HTTP_201_CREATED)
+
+    def patch(self, request, *args, **kwargs):
+        """
+        Partially update many records at once; every item must include its `id`.
+        """
+        ids = []
+        if isinstance(request.data, list):
+            for item in request.data:
+                try:
+                    ids.append(int(item['id']))
+                except (TypeError, KeyError, ValueError):
+                    pass
+
+        with transaction.atomic():
+            instances = self.get_queryset().select_for_update().in_bulk(ids)
+            serializer = self.get_serializer(instances, data=request.data, many=True, partial=True, max_length=self.max_batch_size)
+            serializer.is_valid(raise_exception=True)
+            objects = serializer.save()
+        return self.batch_response(serializer, objects, "updated", status.HTTP_200_OK)
+
+    def delete(self, request, *args, **kwargs):
+        """
+        Delete many records at once: {"ids": [...]}.
+        """
+        serializer = BatchDeleteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        if len(ids) > self.max_batch_size:
+            return Response(
+                {"ids": [f"Ensure this field has no more than {self.max_batch_size} elements."]},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic(), batched_deletes():
+            queryset = self.get_queryset().filter(id__in=ids)
+            found_ids = set(queryset.values_list('id', flat=True))
+            queryset.delete()
+
+        errors = [{"id": pk, "errors": "Not found."} for pk in dict.fromkeys(ids) if pk not in found_ids]
+        return Response(
+            {"deleted": sorted(found_ids), "errors": errors},
+            status=self.batch_status(len(found_ids), len(errors), status.HTTP_200_OK),
+        )
+
+
+@extend_schema(tags=["Income"])
+class IncomeBatchView(BatchViewBase):
+    serializer_class = IncomeSerializer
+
+    def get_queryset(self):
+        return Income.objects.filter(user=self.request.user)
+
+
+@extend_schema(tags=["Expense"])
+class ExpenseBatchView(BatchViewBase):
+    serializer_class = ExpenseSerializer
+
+    def get_queryset(self):
+        return Expense.objects.filter(user=self.request.user)
@@ -0,0 +1,86 @@
+import hashlib
+from urllib.parse import urlencode
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from rest_framework.renderers import JSONRenderer
+from finance import caching
+
+
+class CachedListMixin:
+    """
+    Serve list pages from the cache as pre-rendered JSON bytes.
+
+    Each page is cached per user under the user's data version and a signature of
+    the query string (page, cursor, filters, search, ordering), so a hit returns the
+    stored bytes without touching the database or the serializer, and any committed
+    write of the user's rows makes every cached page unreachable at once.
+    Error responses (invalid filters, missing pages) are never cached.
+    """
+    cache_prefix = None
+    renderer_classes = [JSONRenderer]
+
+    def get_cache_signature(self, request):
+        # Pagination links are absolute URLs, so the host is part of the signature
+        params = sorted((key, value) for key, values in request.query_params.lists() for value in values)
+        return hashlib.sha1(f"{request.get_host()}?{urlencode(params)}".encode()).hexdigest()
+
+    def list(self, request, *args, **kwargs):
+        cache_key = caching.user_cache_key(self.cache_prefix, request.user.id, self.get_cache_signature(request))
+        body = cache.get(cache_key)
+        if body is None:
+            response = super().list(request, *args, **kwargs)
+            body = JSONRenderer().render(response.data)
+            cache.set(cache_key, body, timeout=caching.CACHE_TIMEOUT)  # Invalidated by data version bumps
+        return HttpResponse(body, content_type='application/json')
+
+
+class NotModified(Exception):
+    """
+    Raised by ConditionalGetMixin to short-circuit a view with a 304.
+    """
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETags and `If-None-Match` handling for GET requests.
+
+    The ETag is derived from the user's data version (bumped after every committed
+    Income/Expense/Loan write), the full request path and the negotiated format, so
+    it costs a single cache read. It is checked right after authentication: when it
+    matches, a 304 is returned before the handler runs any query or serializer.
+    """
+    etag = None
+
+    def get_etag(self, request):
+        version = caching.get_data_version(request.user.id)
+        if version is None:  # Cache unavailable: no version, no safe validator
+            return None
+        renderer_format = request.accepted_renderer.format
+        digest = hashlib.sha1(f"{request.user.id}:{version}:{request.get_full_path()}:{renderer_format}".encode()).hexdigest()
+        return f'"{digest}"'
+
+    def etag_matches(self, request, etag):
+        header = request.META.get('HTTP_IF_NONE_MATCH')
+        if not header:
+            return False
+        # If-None-Match uses the weak comparison
+        etags = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+        return '*' in etags or etag in etags
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in ('GET', 'HEAD'):
+            self.etag = self.get_etag(request)
+            if self.etag is not None and self.etag_matches(request, self.etag):
+                raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return HttpResponseNotModified(headers={'ETag': self.etag})
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if self.etag is not None and response.status_code == 200:
+            response['ETag'] = self.etag
+        return response
@@ -2,24 +2,36 @@ from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIV
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from finance.serializers import ExpenseSerializer
 from finance.models import Expense
-from finance.filters import ExpenseFilter, CustomDynamicFilterBackend
+from finance.filters import ExpenseFilter, CustomDynamicFilterBackend, FullTextSearchFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from django.core.cache import cache
+from finance.pagination import KeysetPagination
+from finance.views.cached_views import CachedListMixin, ConditionalGetMixin
 from drf_spectacular.utils import extend_schema
 
 
 
 # class based views for Expense Management: ie. List, Create, Retrieve, Update and Delete 
 @extend_schema(tags=["Expense"])
-class ExpenseListCreateView(ListCreateAPIView):
+class ExpenseListCreateView(ConditionalGetMixin, ListCreateAPIView):
     serializer_class = ExpenseSerializer
     permission_classes = [IsAuthenticated]
     filterset_class = ExpenseFilter
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter, CustomDynamicFilterBackend]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter, CustomDynamicFilterBackend]
     search_fields = ['category', 'notes']
     ordering_fields = ['amount', 'due_date']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-due_date', '-id')  # used by ?pagination=cursor when no sort is requested
+    dynamic_filter_fields = {
+        'status': ['exact', 'in'],
+        'category': ['exact', 'iexact', 'in'],
+        'due_date': ['exact', 'gt', 'gte', 'lt', 'lte', 'range'],
+        'amount': ['exact', 'gt', 'gte', 'lt', 'lte', 'range'],
+        'notes': ['isnull'],
+    }
+    dynamic_sort_fields = ['due_date', 'amount', 'category', 'status', 'created_at']
 
     def get_queryset(self):
         auth_user_expenses_list = Expense.objects.filter(user=self.request.user).order_by('id')
@@ -32,38 +44,19 @@ class ExpenseListCreateView(ListCreateAPIView):
 
 # Expense List with cache implemented
 @extend_schema(tags=["Expense"])
-class ExpenseListCachedView(GenericAPIView):
+class ExpenseListCachedView(CachedListMixin, ExpenseListCreateView):
     """
-    View to return a cached list of expense data for authenticated users.
+    Cached variant of the expense list: same filters, search, ordering and pagination,
+    with each rendered page served from the cache until the user's data changes.
     Only handles GET requests.
     """
-    serializer_class = ExpenseSerializer
-    permission_classes = [IsAuthenticated]
-
-    def get_queryset(self):
-        user = self.request.user
-        cache_key = f"expense_list_{user.id}" # Create unique cache key for expense
-        cached_data = cache.get(cache_key)
+    http_method_names = ['get', 'head', 'options']
+    cache_prefix = "expense_list"
 
-        if cached_data is None:
-            auth_user_expense_list = Expense.objects.filter(user=user)
-            cache.set(cache_key, list(auth_user_expense_list), timeout=3600)
-            cached_data = auth_user_expense_list
-
-        return cached_data
-    
-    def get(self, request, *args, **kwargs):
-        """
-        Handle GET request to return a cached list of expense
-        """
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
-    
 
 # Income deatail view (retrieve, update, delete)
 @extend_schema(tags=["Expense"])
-class ExpenseRetrieveUpdateDeleteView(RetrieveUpdateDestroyAPIView):
+class ExpenseRetrieveUpdateDeleteView(ConditionalGetMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = ExpenseSerializer
     permission_classes = [IsAuthenticated]
 
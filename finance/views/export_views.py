@@ -0,0 +1,106 @@
+import csv
+from itertools import islice
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import NotFound
+from django_filters.rest_framework import DjangoFilterBackend
+from drf_spectacular.utils import extend_schema
+from finance.models import Income, Expense, Loan
+from finance.serializers import IncomeSerializer, ExpenseSerializer, LoanSerializer
+from finance.filters import IncomeFilter, ExpenseFilter, LoanFilter
+
+
+class EchoBuffer:
+    """
+    File-like object whose write() returns the value instead of storing it,
+    so csv.writer can be used to produce lines for a streaming response.
+    """
+    def write(self, value):
+        return value
+
+
+class ExportViewBase(GenericAPIView):
+    """
+    Base view streaming the authenticated user's full, filtered history as CSV or NDJSON.
+
+    Rows are read with `values_list(...).iterator()` in chunks and written out as
+    they arrive, so memory use stays flat however many rows a user has.
+    """
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    pagination_class = None
+    chunk_size = 2000
+    export_name = None
+    content_types = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    def get_export_fields(self):
+        return self.get_serializer_class().Meta.fields
+
+    def iter_rows(self, fields):
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        return queryset.values_list(*fields).iterator(chunk_size=self.chunk_size)
+
+    def iter_chunks(self, rows):
+        while chunk := list(islice(rows, self.chunk_size)):
+            yield chunk
+
+    def stream_csv(self, fields, rows):
+        writer = csv.writer(EchoBuffer())
+        yield writer.writerow(fields)
+        for chunk in self.iter_chunks(rows):
+            yield ''.join(writer.writerow(row) for row in chunk)
+
+    def stream_ndjson(self, fields, rows):
+        encoder = DjangoJSONEncoder()
+        for chunk in self.iter_chunks(rows):
+            yield ''.join(encoder.encode(dict(zip(fields, row))) + '\n' for row in chunk)
+
+    def get(self, request, file_format, *args, **kwargs):
+        """
+        Stream the export as `csv` or `ndjson`, honoring the list endpoint's filters.
+        """
+        if file_format not in self.content_types:
+            raise NotFound(f"Unsupported export format '{file_format}', use one of: {', '.join(self.content_types)}.")
+
+        fields = self.get_export_fields()
+        rows = self.iter_rows(fields)
+        stream = self.stream_csv(fields, rows) if file_format == 'csv' else self.stream_ndjson(fields, rows)
+
+        response = StreamingHttpResponse(stream, content_type=self.content_types[file_format])
+        response['Content-Disposition'] = f'attachment; filename="{self.export_name}.{file_format}"'
+        return response
+
+
+@extend_schema(tags=["Income"])
+class IncomeExportView(ExportViewBase):
+    serializer_class = IncomeSerializer
+    filterset_class = IncomeFilter
+    export_name = 'incomes'
+
+    def get_queryset(self):
+        return Income.objects.filter(user=self.request.user)
+
+
+@extend_schema(tags=["Expense"])
+class ExpenseExportView(ExportViewBase):
+    serializer_class = ExpenseSerializer
+    filterset_class = ExpenseFilter
+    export_name = 'expenses'
+
+    def get_queryset(self):
+        return Expense.objects.filter(user=self.request.user)
+
+
+@extend_schema(tags=["Loan"])
+class LoanExportView(ExportViewBase):
+    serializer_class = LoanSerializer
+    filterset_class = LoanFilter
+    export_name = 'loans'
+
+    def get_queryset(self):
+        return Loan.objects.filter(user=self.request.user)
@@ -0,0 +1,39 @@
+from datetime import date
+from rest_framework.generics import GenericAPIView
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from django.core.cache import cache
+from drf_spectacular.utils import extend_schema
+from finance import caching
+from finance.forecast import build_forecast
+from finance.serializers import ForecastSerializer
+
+
+@extend_schema(tags=["Report"])
+class CashFlowForecastView(GenericAPIView):
+    """
+    Projected cash flow from pending incomes, pending expenses and loan installments,
+    per day or per month, with the running balance. Cached per user data version.
+
+    ** Example url:
+    http://127.0.0.1:8000/finance/forecast/?horizon_months=24&granularity=month&opening_balance=1500
+    """
+    serializer_class = ForecastSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
+
+        # The forecast starts today, so the day is part of the key as well
+        today = date.today()
+        cache_key = caching.user_cache_key(
+            "cash_flow_forecast", request.user.id, today, params['horizon_months'], params['granularity'], params['opening_balance']
+        )
+        forecast = cache.get(cache_key)
+        if forecast is None:
+            forecast = build_forecast(request.user, today, params['horizon_months'], params['granularity'], params['opening_balance'])
+            cache.set(cache_key, forecast, timeout=caching.CACHE_TIMEOUT)  # Invalidated by data version bumps
+        return Response(forecast)
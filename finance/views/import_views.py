@@ -0,0 +1,92 @@
+import csv
+import io
+import logging
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.generics import GenericAPIView
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAuthenticated
+from drf_spectacular.utils import extend_schema
+from finance import importers
+from finance.models import Income, Expense
+from finance.serializers import StatementImportSerializer
+
+logger = logging.getLogger("api_logger")
+
+
+class ImportViewBase(GenericAPIView):
+    """
+    Base view importing a CSV or OFX file of the user's transactions.
+
+    The file is parsed and imported chunk by chunk (see finance.importers) while the
+    response streams one NDJSON line of running totals per chunk, so huge files import
+    in flat memory and the client can show progress. The last line holds the final
+    totals, `"done": true` and the first errors by CSV line / OFX transaction.
+
+    The import runs after the 200 status has been sent, so a failure can only be
+    reported in the body: the last line is then `"done": false` with an `error`, and
+    its totals count the chunks that were committed before it (the failing chunk is
+    rolled back).
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+    serializer_class = StatementImportSerializer
+    pagination_class = None
+    chunk_size = 10000
+    model = None
+
+    def post(self, request, file_format, *args, **kwargs):
+        """
+        Import a `csv` or `ofx` file (multipart field `file`).
+        """
+        if file_format not in importers.FORMATS:
+            raise NotFound(f"Unsupported import format '{file_format}', use one of: {', '.join(importers.FORMATS)}.")
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        stream = io.TextIOWrapper(serializer.validated_data['file'].file, encoding='utf-8-sig', errors='replace', newline='')
+        if file_format == 'csv':
+            try:
+                records = importers.read_csv(
+                    stream, self.model, serializer.validated_data.get('mapping'), serializer.validated_data.get('date_format'),
+                    signed=serializer.validated_data['signed_amounts'],
+                )
+            except importers.StatementError as exc:
+                raise ValidationError({'file': [str(exc)]})
+        else:
+            records = importers.read_ofx(stream, self.model)
+
+        progress = importers.import_records(
+            records, importers.IMPORT_SERIALIZERS[self.model], request.user, chunk_size=self.chunk_size,
+        )
+        return StreamingHttpResponse(self.stream_progress(progress), content_type='application/x-ndjson')
+
+    def stream_progress(self, progress):
+        encoder = DjangoJSONEncoder()
+        totals = {'processed': 0, 'created': 0, 'failed': 0, 'errors': []}
+        try:
+            for totals in progress:
+                yield encoder.encode({key: totals[key] for key in ('processed', 'created', 'failed')}) + '\n'
+        except csv.Error as exc:
+            yield encoder.encode({**totals, 'done': False, 'error': f"Unreadable CSV: {exc}"}) + '\n'
+            return
+        except Exception as exc:
+            # The logging middleware has already seen the 200, log the failure here
+            logger.error(f"Error importing {self.model._meta.verbose_name_plural} for user {self.request.user.pk}: {exc}", exc_info=True)
+            yield encoder.encode({
+                **totals, 'done': False,
+                'error': f"The import stopped with an internal error after {totals['created']} imported rows.",
+            }) + '\n'
+            return
+        yield encoder.encode({**totals, 'done': True}) + '\n'
+
+
+@extend_schema(tags=["Income"])
+class IncomeImportView(ImportViewBase):
+    model = Income
+
+
+@extend_schema(tags=["Expense"])
+class ExpenseImportView(ImportViewBase):
+    model = Expense
@@ -2,24 +2,36 @@ from finance.serializers import IncomeSerializer
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView, GenericAPIView
 from finance.models import Income
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from finance.filters import IncomeFilter, CustomDynamicFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from finance.filters import IncomeFilter, CustomDynamicFilterBackend, FullTextSearchFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.core.cache import cache
+from finance.pagination import KeysetPagination
+from finance.views.cached_views import CachedListMixin, ConditionalGetMixin
 from drf_spectacular.utils import extend_schema
 
 
 
 # class based views for Income List, Create, Retrieve, Update and Delete 
 @extend_schema(tags=["Income"])
-class IncomeListCreateView(ListCreateAPIView):
+class IncomeListCreateView(ConditionalGetMixin, ListCreateAPIView):
     serializer_class = IncomeSerializer
     permission_classes = [IsAuthenticated]
     filterset_class = IncomeFilter
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter, CustomDynamicFilterBackend]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter, CustomDynamicFilterBackend]
     search_fields = ['source_name', 'notes']
     ordering_fields = ['amount', 'date_received', 'source_name']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-date_received', '-id')  # used by ?pagination=cursor when no sort is requested
+    dynamic_filter_fields = {
+        'status': ['exact', 'in'],
+        'source_name': ['exact', 'iexact', 'in'],
+        'date_received': ['exact', 'gt', 'gte', 'lt', 'lte', 'range'],
+        'amount': ['exact', 'gt', 'gte', 'lt', 'lte', 'range'],
+        'notes': ['isnull'],
+    }
+    dynamic_sort_fields = ['date_received', 'amount', 'source_name', 'status', 'created_at']
 
     def get_queryset(self):
         auth_user_income_list = Income.objects.filter(user=self.request.user)
@@ -32,38 +44,19 @@ class IncomeListCreateView(ListCreateAPIView):
 
 # Income List with Cache implemented
 @extend_schema(tags=["Income"])
-class IncomeListCachedView(GenericAPIView):
+class IncomeListCachedView(CachedListMixin, IncomeListCreateView):
     """
-    View to return a cached list of income data for authenticated users.
+    Cached variant of the income list: same filters, search, ordering and pagination,
+    with each rendered page served from the cache until the user's data changes.
     Only handles GET requests.
     """
-    serializer_class = IncomeSerializer
-    permission_classes = [IsAuthenticated]
-
-    def get_queryset(self):
-        user = self.request.user
-        cache_key = f"income_list_{user.id}"  # Create a unique cache key for the user
-        cached_data = cache.get(cache_key)  
+    http_method_names = ['get', 'head', 'options']
+    cache_prefix = "income_list"
 
-        if cached_data is None:  # If no cache, fetch data from the DB and cache it
-            auth_user_income_list = Income.objects.filter(user=user)
-            cache.set(cache_key, list(auth_user_income_list), timeout=3600)  # Cache the queryset as a list
-            cached_data = auth_user_income_list
-
-        return cached_data
-
-    def get(self, request, *args, **kwargs):
-        """
-        Handle GET requests to return a cached list of incomes.
-        """
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
-    
 
 # Income deatail view (retrieve, update, delete)
 @extend_schema(tags=["Income"])
-class IncomeRetrieveUpdateDeleteView(RetrieveUpdateDestroyAPIView):
+class IncomeRetrieveUpdateDeleteView(ConditionalGetMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = IncomeSerializer
     permission_classes = [IsAuthenticated]
 
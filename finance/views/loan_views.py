@@ -1,26 +1,49 @@
 from rest_framework.response import Response
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView, GenericAPIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from finance.serializers import LoanSerializer
+from finance.serializers import (
+    LoanSerializer, LoanScheduleSerializer, AmortizationRowSerializer, LoanSimulationSerializer, PayoffPlanSerializer,
+    SimulationBaselineSerializer, ScenarioResultSerializer, PayoffPlanResultSerializer,
+)
 from finance.models import Loan
-from finance.filters import LoanFilter, CustomDynamicFilterBackend
+from finance.filters import LoanFilter, CustomDynamicFilterBackend, FullTextSearchFilter
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from rest_framework.response import Response
 from django.core.cache import cache
+from finance import caching
+from finance.pagination import KeysetPagination
+from finance.views.cached_views import CachedListMixin, ConditionalGetMixin
+from finance.amortization import build_schedules, loan_amortization, simulate_scenarios, simulation_months, to_money
+from finance.payoff import PayoffPlanner
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from datetime import date
 from drf_spectacular.utils import extend_schema
 
 
 
 #class based views for Loan Management: ie. List, Create, Retrieve, Update and Delete 
 @extend_schema(tags=["Loan"])
-class LoanListCreateView(ListCreateAPIView):
+class LoanListCreateView(ConditionalGetMixin, ListCreateAPIView):
     serializer_class = LoanSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter, CustomDynamicFilterBackend]
+    filter_backends = [DjangoFilterBackend, FullTextSearchFilter, OrderingFilter, CustomDynamicFilterBackend]
     filterset_class = LoanFilter
     search_fields = ['loan_name', 'notes']
     ordering_fields = ['loan_name', 'principal_amount', 'remaining_balance']
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')  # used by ?pagination=cursor when no sort is requested
+    dynamic_filter_fields = {
+        'status': ['exact', 'in'],
+        'loan_name': ['exact', 'iexact', 'in'],
+        'interest_rate': ['exact', 'gt', 'gte', 'lt', 'lte', 'range'],
+        'tenure_months': ['exact', 'gt', 'gte', 'lt', 'lte', 'range'],
+        'remaining_balance': ['exact', 'gt', 'gte', 'lt', 'lte', 'range'],
+        'created_at': ['gt', 'gte', 'lt', 'lte', 'range'],
+        'notes': ['isnull'],
+    }
+    dynamic_sort_fields = ['created_at', 'loan_name', 'principal_amount', 'interest_rate', 'remaining_balance', 'status']
 
     def get_queryset(self):
         auth_user_loans_list = Loan.objects.filter(user=self.request.user)
@@ -32,38 +55,194 @@ class LoanListCreateView(ListCreateAPIView):
 
 # Loans List with cache inmplemented
 @extend_schema(tags=["Loan"])
-class LoanListCachedView(GenericAPIView):
+class LoanListCachedView(CachedListMixin, LoanListCreateView):
+    """
+    Cached variant of the loan list: same filters, search, ordering and pagination,
+    with each rendered page served from the cache until the user's data changes.
+    Only handles GET requests.
+    """
+    http_method_names = ['get', 'head', 'options']
+    cache_prefix = "loan_list"
+
+
+# Loan Details Veiw for (retrieve, update and delete)
+@extend_schema(tags=["Loan"])
+class LoanRetrieveUpdateDeleteView(ConditionalGetMixin, RetrieveUpdateDestroyAPIView):
     serializer_class = LoanSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        cache_key = f"loan_list_{user.id}"  # Create unique cache key for loan
-        cached_data = cache.get(cache_key)
+        return Loan.objects.filter(user=self.request.user)
+    
+    
 
-        if cached_data is None:
-            auth_user_loan_list = Loan.objects.filter(user=user)
-            cache.set(cache_key, list(auth_user_loan_list), timeout=3600)
-            cached_data = auth_user_loan_list
 
-        return cached_data
-    
-    def get(self, request, *args, **kwargs):
+# Amortization schedules, computed server side and cached per loan revision
+class LoanScheduleViewBase(GenericAPIView):
+    serializer_class = LoanScheduleSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return Loan.objects.filter(user=self.request.user)
+
+    def get_window(self):
+        serializer = self.get_serializer(data=self.request.query_params)
+        serializer.is_valid(raise_exception=True)
+        return serializer.validated_data
+
+    def schedule_cache_key(self, loan, start_date, end_date):
+        # updated_at changes on every save, so an edited loan never hits a stale schedule
+        return f"loan_schedule_{loan.id}_{loan.updated_at.timestamp()}_{start_date or 'none'}_{end_date or 'none'}"
+
+    def build_payload(self, loan, schedule):
+        plan = loan_amortization(loan)
+        return {
+            "loan": loan.id,
+            "principal_amount": str(loan.principal_amount),
+            "monthly_installment": str(to_money(plan.installment)),
+            "tenure_months": plan.tenure,
+            "total_interest": str(plan.total_interest()),
+            "schedule": AmortizationRowSerializer(schedule, many=True).data,
+        }
+
+    def get_schedules(self, loans, start_date=None, end_date=None):
         """
-        Handle GET request to return a cached list of loan
+        Schedule payloads for the given loans, computing only the ones missing from the cache.
         """
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
-    
+        keys = {loan.id: self.schedule_cache_key(loan, start_date, end_date) for loan in loans}
+        cached = cache.get_many(list(keys.values()))
+        missing = [loan for loan in loans if keys[loan.id] not in cached]
+
+        schedules = build_schedules(missing, start_date, end_date)
+        computed = {keys[loan.id]: self.build_payload(loan, schedules[loan.id]) for loan in missing}
+        if computed:
+            cache.set_many(computed, timeout=caching.CACHE_TIMEOUT)
+
+        cached.update(computed)
+        return [cached[keys[loan.id]] for loan in loans]
+
 
-# Loan Details Veiw for (retrieve, update and delete)
 @extend_schema(tags=["Loan"])
-class LoanRetrieveUpdateDeleteView(RetrieveUpdateDestroyAPIView):
-    serializer_class = LoanSerializer
+class LoanScheduleView(LoanScheduleViewBase):
+    """
+    Month-by-month principal/interest/balance schedule of one loan.
+
+    ** Example url:
+    http://127.0.0.1:8000/finance/loan/1/schedule/?start_date=2025-01-01&end_date=2025-12-31
+    """
+
+    def get(self, request, *args, **kwargs):
+        window = self.get_window()
+        loan = self.get_object()
+        payload, = self.get_schedules([loan], window.get('start_date'), window.get('end_date'))
+        return Response(payload)
+
+
+@extend_schema(tags=["Loan"])
+class LoanScheduleListView(LoanScheduleViewBase):
+    """
+    Schedules of many loans at once: all of the user's loans, or only `?ids=1,2,3`.
+    """
+
+    def get(self, request, *args, **kwargs):
+        window = self.get_window()
+        loans = self.get_queryset()
+        if 'ids' in window:
+            loans = loans.filter(id__in=window['ids'])
+        payloads = self.get_schedules(list(loans), window.get('start_date'), window.get('end_date'))
+        return Response({"results": payloads})
+
+
+# What-if simulation of prepayments / EMI changes on one loan
+@extend_schema(tags=["Loan"])
+class LoanSimulationView(GenericAPIView):
+    """
+    Simulate a batch of prepayment / EMI-change scenarios against a loan's original schedule
+    and return the payoff month and interest saved for each of them.
+
+    Scenarios are replayed for at most `simulated_months` months; one still owing money
+    by then has `"paid_off": false` and its `balance_left`. A scenario whose EMI doesn't
+    cover the interest of the month it starts in is reported in `errors` by index, like
+    the batch endpoints: 200 when every scenario ran, 207 when only some did and 400
+    when none did. Money amounts are rendered as decimal strings.
+
+    ** Example body:
+    {"scenarios": [{"label": "Prepay 5000", "prepayments": [{"month": 12, "amount": 5000}]},
+                   {"label": "EMI +100", "emi_change": 100, "emi_change_from": 6}]}
+    """
+    serializer_class = LoanSimulationSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = None
 
     def get_queryset(self):
         return Loan.objects.filter(user=self.request.user)
-    
-    
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        scenarios = serializer.validated_data['scenarios']
+        loan = self.get_object()
+
+        plan = loan_amortization(loan)
+        results, errors = simulate_scenarios(plan, scenarios)
+        for result in results:
+            result['label'] = scenarios[result['index']].get('label')
+
+        if not errors:
+            response_status = status.HTTP_200_OK
+        else:
+            response_status = status.HTTP_207_MULTI_STATUS if results else status.HTTP_400_BAD_REQUEST
+        return Response({
+            "loan": loan.id,
+            "baseline": SimulationBaselineSerializer({
+                "monthly_installment": to_money(plan.installment),
+                "payoff_month": plan.tenure,
+                "payoff_date": plan.payment_date(plan.tenure),
+                "total_interest": plan.total_interest(),
+            }).data,
+            "simulated_months": simulation_months(plan),
+            "scenarios": ScenarioResultSerializer(results, many=True).data,
+            "errors": [{"index": index, "errors": {"emi_change": [message]}} for index, message in sorted(errors.items())],
+        }, status=response_status)
+
+
+# Payoff planner across all of the user's active loans
+@extend_schema(tags=["Loan"])
+class LoanPayoffPlanView(GenericAPIView):
+    """
+    Compare avalanche (highest rate first), snowball (smallest balance first) and custom payoff
+    orders of the user's active loans under a fixed monthly budget. Plans are cached until any
+    of the user's loans changes; money amounts are rendered as decimal strings.
+
+    ** Example url:
+    http://127.0.0.1:8000/finance/loan/payoff-plan/?budget=2500
+    http://127.0.0.1:8000/finance/loan/payoff-plan/?budget=2500&strategy=custom&order=4,2,7
+    """
+    serializer_class = PayoffPlanSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        return Loan.objects.filter(user=self.request.user, status=Loan.LoanStatus.ACTIVE, remaining_balance__gt=0)
+
+    def get(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        budget = serializer.validated_data['budget']
+        strategies = serializer.validated_data['strategies']
+        order = serializer.validated_data.get('order', [])
+
+        # Payoff dates are relative to today, so the plan is cached per day as well
+        today = date.today()
+        cache_key = caching.user_cache_key(
+            "loan_payoff_plan", request.user.id, today, budget, '-'.join(strategies), '-'.join(map(str, order)) or 'none'
+        )
+        plan = cache.get(cache_key)
+        if plan is None:
+            planner = PayoffPlanner(self.get_queryset(), budget, start_date=today)
+            if budget < planner.minimum_budget:
+                raise ValidationError({"budget": [f"The budget must cover the minimum monthly payments of {planner.minimum_budget}."]})
+            plan = planner.plan(strategies, order)
+            cache.set(cache_key, plan, timeout=caching.CACHE_TIMEOUT)  # Invalidated by data version bumps
+        return Response(PayoffPlanResultSerializer(plan).data)
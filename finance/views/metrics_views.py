@@ -0,0 +1,54 @@
+import hmac
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.permissions import BasePermission
+from rest_framework.views import APIView
+from drf_spectacular.utils import extend_schema
+from finance import metrics
+
+
+class MetricsScrapePermission(BasePermission):
+    """
+    Scrapers (e.g. the Prometheus server) must send `Authorization: Bearer <FINANCE_METRICS_TOKEN>`
+    when a token is configured; otherwise the client address must be in FINANCE_METRICS_ALLOWED_IPS.
+
+    Behind a reverse proxy REMOTE_ADDR is the proxy's address, so the client is only read from
+    X-Forwarded-For when the request comes from one of FINANCE_METRICS_TRUSTED_PROXIES, and a
+    forwarded request from any other peer is refused.
+    """
+    def has_permission(self, request, view):
+        token = getattr(settings, 'FINANCE_METRICS_TOKEN', None)
+        if token:
+            scheme, _, credentials = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+            return scheme.lower() == 'bearer' and hmac.compare_digest(credentials.encode(), token.encode())
+        return self.client_address(request) in getattr(settings, 'FINANCE_METRICS_ALLOWED_IPS', ['127.0.0.1'])
+
+    def client_address(self, request):
+        address = request.META.get('REMOTE_ADDR')
+        forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if not forwarded_for:
+            return address
+        trusted_proxies = getattr(settings, 'FINANCE_METRICS_TRUSTED_PROXIES', [])
+        if address not in trusted_proxies:
+            return None
+        # The rightmost address not added by one of our proxies is the one that reached them
+        for hop in reversed([hop.strip() for hop in forwarded_for.split(',')]):
+            if hop not in trusted_proxies:
+                return hop
+        return None
+
+
+@extend_schema(exclude=True)
+class MetricsView(APIView):
+    """
+    Request counts and latency histograms by route and status class, summed over all
+    worker processes, in Prometheus text exposition format.
+
+    ** Example url:
+    http://127.0.0.1:8000/finance/metrics/
+    """
+    authentication_classes = []
+    permission_classes = [MetricsScrapePermission]
+
+    def get(self, request, *args, **kwargs):
+        return HttpResponse(metrics.render(metrics.collect()), content_type=metrics.CONTENT_TYPE)
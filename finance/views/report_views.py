@@ -1,12 +1,15 @@
 from rest_framework.generics import GenericAPIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, F
+from django.db.models import Sum, F, Value, CharField, IntegerField, DecimalField, DateField
+from django.db.models.functions import Trunc
 from django.core.cache import cache
-from finance.models import Income, Expense, Loan
+from finance.models import Income, Expense, Loan, IncomeMonthlyRollup, ExpenseMonthlyRollup
+from finance import rollups, caching, trends, snapshots
 from finance.serializers import ReportSerializer
+from finance.views.cached_views import ConditionalGetMixin
 
-class FinancialReportViewBase(GenericAPIView):
+class FinancialReportViewBase(ConditionalGetMixin, GenericAPIView):
     """
     Base view for generating financial reports.
     """
@@ -34,33 +37,124 @@ class FinancialReportViewBase(GenericAPIView):
             queryset = queryset.filter(**{f"{date_field}__lte": end_date})
         return queryset
 
-    def aggregate_data(self, income_queryset, expense_queryset, loan_queryset):
+    def get_rollup_queryset(self):
+        """
+        Monthly rollups of the authenticated user, kept in sync on every Income/Expense write.
+        """
+        user = self.request.user
+        return {
+            "income": IncomeMonthlyRollup.objects.filter(user=user),
+            "expense": ExpenseMonthlyRollup.objects.filter(user=user),
+        }
+
+    def get_bucket(self, date_field, granularity):
+        """
+        Expression identifying the trend bucket a date falls into.
+        Without a granularity the legacy month-of-year number is used.
+        """
+        if granularity is None:
+            return F(f'{date_field}__month')
+        return Trunc(date_field, granularity, output_field=DateField())
+
+    def get_report_rows(self, start_date, end_date, granularity=None):
+        """
+        Build a single grouped query returning every figure the report needs:
+        the UNION ALL of every branch, so the whole report is one round trip.
+        Summary totals are derived from the trend rows.
+        """
+        branches = [queryset for _, queryset in self.get_report_branches(start_date, end_date, granularity)]
+        return branches[0].union(*branches[1:], all=True)
+
+    def get_report_branches(self, start_date, end_date, granularity=None):
+        """
+        (kind, queryset) pairs of the grouped `kind`/`bucket`/`total` querysets behind the report.
+
+        Each branch is tagged with a `kind` so the rows can be told apart
+        afterwards. For month-aligned granularities whole months inside the
+        range are read from the monthly rollups and only the (at most two)
+        partial months at the edges are scanned from the raw Income/Expense
+        tables; day and week buckets are grouped from the raw tables. The loan
+        branch collapses to one row holding the active loans balance.
+        """
+        total_field = DecimalField(max_digits=20, decimal_places=2)
+        querysets = self.get_queryset()
+        rollup_querysets = self.get_rollup_queryset()
+        use_rollups = granularity is None or granularity in trends.MONTH_ALIGNED_GRANULARITIES
+        full_from, full_until, edges = rollups.split_date_range(start_date, end_date)
+
+        def grouped(queryset, kind, bucket, amount_field):
+            return (
+                queryset.order_by()
+                .annotate(kind=Value(kind, output_field=CharField()), bucket=bucket)
+                .values('kind', 'bucket')
+                .annotate(total=Sum(amount_field, output_field=total_field))
+            )
+
+        branches = []
+        for kind, date_field in (('income', 'date_received'), ('expense', 'due_date')):
+            if not use_rollups:
+                raw_queryset = self.filter_by_date(querysets[kind], start_date, end_date, date_field)
+                branches.append((kind, grouped(raw_queryset, kind, self.get_bucket(date_field, granularity), 'amount')))
+                continue
+
+            rollup_queryset = rollup_querysets[kind]
+            if full_from:
+                rollup_queryset = rollup_queryset.filter(month__gte=full_from)
+            if full_until:
+                rollup_queryset = rollup_queryset.filter(month__lt=full_until)
+            branches.append((kind, grouped(rollup_queryset, kind, self.get_bucket('month', granularity), 'total_amount')))
+
+            for edge_start, edge_end in edges:
+                edge_queryset = self.filter_by_date(querysets[kind], edge_start, edge_end, date_field)
+                branches.append((kind, grouped(edge_queryset, kind, self.get_bucket(date_field, granularity), 'amount')))
+
+        no_bucket = Value(None, output_field=IntegerField() if granularity is None else DateField())
+        branches.append(('loan', grouped(querysets["loan"], 'loan', no_bucket, 'remaining_balance')))
+
+        return branches
+
+    def aggregate_data(self, report_rows):
         """
         Aggregate the financial data.
         """
-        total_income = income_queryset.aggregate(total=Sum('amount'))['total'] or 0
-        total_expenses = expense_queryset.aggregate(total=Sum('amount'))['total'] or 0
-        active_loans = loan_queryset.aggregate(total_balance=Sum('remaining_balance'))['total_balance'] or 0
-        return total_income, total_expenses, active_loans
+        totals = {"income": 0, "expense": 0, "loan": 0}
+        for row in report_rows:
+            totals[row["kind"]] += row["total"] or 0
+        return totals["income"], totals["expense"], totals["loan"]
 
-    def get_trend_data(self, queryset, date_field):
+    def get_trend_data(self, report_rows, kind, start_date=None, end_date=None, granularity=None):
         """
         Get trend data for visualization.
+        With a granularity the series covers every bucket between start_date and end_date.
         """
-        return (
-            queryset.annotate(month=F(f'{date_field}__month'))
-            .values('month')
-            .annotate(total=Sum('amount'))
-            .order_by('month')
-        )
-
-    def prepare_report_data(self, income_queryset, expense_queryset, loan_queryset):
+        totals = {}
+        for row in report_rows:
+            if row["kind"] == kind and row["total"] is not None:
+                totals[row["bucket"]] = totals.get(row["bucket"], 0) + row["total"]
+        if granularity is None:
+            return [{"month": month, "total": total} for month, total in sorted(totals.items())]
+        return trends.fill_gaps(totals, start_date, end_date, granularity)
+
+    def prepare_report_data(self, start_date, end_date, granularity=None):
         """
         Prepare the report data for response.
         """
-        total_income, total_expenses, active_loans = self.aggregate_data(income_queryset, expense_queryset, loan_queryset)
-        income_trend = self.get_trend_data(income_queryset, 'date_received')
-        expense_trend = self.get_trend_data(expense_queryset, 'due_date')
+        report_rows = list(self.get_report_rows(start_date, end_date, granularity))
+        return self.build_report_data(report_rows, start_date, end_date, granularity)
+
+    def build_report_data(self, report_rows, start_date, end_date, granularity=None):
+        """
+        Assemble the report from `kind`/`bucket`/`total` rows.
+        """
+        total_income, total_expenses, active_loans = self.aggregate_data(report_rows)
+
+        # Open-ended ranges span the buckets holding data, shared by both series
+        buckets = [row["bucket"] for row in report_rows if row["kind"] != "loan" and row["total"] is not None]
+        if buckets:
+            start_date = start_date or min(buckets)
+            end_date = end_date or max(buckets)
+        income_trend = self.get_trend_data(report_rows, 'income', start_date, end_date, granularity)
+        expense_trend = self.get_trend_data(report_rows, 'expense', start_date, end_date, granularity)
 
         return {
             "summary": {
@@ -69,8 +163,8 @@ class FinancialReportViewBase(GenericAPIView):
                 "active_loans_balance": active_loans,
             },
             "visualization": {
-                "income_trend": list(income_trend),
-                "expense_trend": list(expense_trend),
+                "income_trend": income_trend,
+                "expense_trend": expense_trend,
             },
         }
 
@@ -85,15 +179,15 @@ class FinancialReportView(FinancialReportViewBase):
         serializer.is_valid(raise_exception=True)
         start_date = serializer.validated_data.get('start_date')
         end_date = serializer.validated_data.get('end_date')
+        granularity = serializer.validated_data.get('granularity')
 
-        # Retrieve querysets for filtering
-        querysets = self.get_queryset()
-        income_queryset = self.filter_by_date(querysets["income"], start_date, end_date, 'date_received')
-        expense_queryset = self.filter_by_date(querysets["expense"], start_date, end_date, 'due_date')
-        loan_queryset = querysets["loan"]
+        # Serve a precomputed snapshot when one exists for exactly this range
+        snapshot = snapshots.get_snapshot(request.user, start_date, end_date, granularity)
+        if snapshot is not None:
+            return Response(snapshot)
 
         # Prepare response data
-        report_data = self.prepare_report_data(income_queryset, expense_queryset, loan_queryset)
+        report_data = self.prepare_report_data(start_date, end_date, granularity)
 
         return Response(report_data)
 
@@ -109,24 +203,21 @@ class FinancialReportViewCached(FinancialReportViewBase):
         serializer.is_valid(raise_exception=True)
         start_date = serializer.validated_data.get('start_date')
         end_date = serializer.validated_data.get('end_date')
+        granularity = serializer.validated_data.get('granularity')
 
         # Generate a cache key
-        cache_key = f"financial_report_{request.user.id}_{start_date or 'none'}_{end_date or 'none'}"
+        cache_key = caching.user_cache_key(
+            "financial_report", request.user.id, start_date or 'none', end_date or 'none', granularity or 'none'
+        )
         cached_report = cache.get(cache_key)
         if cached_report:
             return Response(cached_report)
 
-        # Retrieve querysets for filtering
-        querysets = self.get_queryset()
-        income_queryset = self.filter_by_date(querysets["income"], start_date, end_date, 'date_received')
-        expense_queryset = self.filter_by_date(querysets["expense"], start_date, end_date, 'due_date')
-        loan_queryset = querysets["loan"]
-
         # Prepare response data
-        report_data = self.prepare_report_data(income_queryset, expense_queryset, loan_queryset)
+        report_data = self.prepare_report_data(start_date, end_date, granularity)
 
         # Cache the report data
-        cache.set(cache_key, report_data, timeout=3600)  # Cache for 1 hour
+        cache.set(cache_key, report_data, timeout=caching.CACHE_TIMEOUT)  # Invalidated by data version bumps
 
         return Response(report_data)
 
@@ -153,15 +153,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Redis as Cache Backend conf
 CACHES = {
     'default': {
-        'BACKEND': 'django_redis.cache.RedisCache',
+        'BACKEND': 'finance.instrumentation.InstrumentedRedisCache',  # RedisCache that counts hits/misses per request
         'LOCATION': 'redis://127.0.0.1:6380/0',  # redis-server runing on port(6380) via docker-container
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
             'KEY_PREFIX': 'finance_cache',  # Prefix for cache keys
+            'IGNORE_EXCEPTIONS': True,  # Writes bump cache versions, so a Redis outage must not fail them
         },
     },
     'fallback': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': 'finance.instrumentation.InstrumentedLocMemCache',
     },
 }
 
@@ -184,6 +185,31 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 5, # Number of items per page
 }
 
+# Reject ?filter_<field>/sort_by fields of CustomDynamicFilterBackend that no index can serve
+FINANCE_STRICT_DYNAMIC_FILTERS = False
+
+# Send per-request db/cache/view/render timings in a Server-Timing header (they are always logged)
+FINANCE_SERVER_TIMING = True
+
+# Share of successful requests written to the API request log (errors are always logged),
+# how many lines may wait for the background log writer before new ones are dropped,
+# and the log file
+FINANCE_LOG_SAMPLE_RATE = 1.0
+FINANCE_LOG_QUEUE_SIZE = 10000
+FINANCE_LOG_FILE = BASE_DIR / 'logs' / 'api_requests.log'
+
+# Per-process request metrics files summed by the /finance/metrics/ endpoint, how often
+# each process rewrites its file (seconds), and who may scrape the endpoint: a bearer token
+# when one is set, otherwise the allowed client IPs, seen through the trusted reverse proxies
+FINANCE_METRICS_DIR = BASE_DIR / 'logs' / 'metrics'
+FINANCE_METRICS_FLUSH_INTERVAL = 5
+FINANCE_METRICS_TOKEN = None
+FINANCE_METRICS_ALLOWED_IPS = ["127.0.0.1"]
+FINANCE_METRICS_TRUSTED_PROXIES = []
+
+# Points FINANCE_LOG_FILE and FINANCE_METRICS_DIR at a temporary directory while the tests run
+TEST_RUNNER = 'finance.runner.FinanceTestRunner'
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),